@@ -0,0 +1,250 @@
+# Benchmark of rootcomparer.compareROOTfiles on synthetic DQM files
+#
+# Generates a reference and a candidate ROOT file with the layout of the SimDoublets DQM folder (configurable numbers
+# of TH1, TH2 and TProfile histograms and fraction of differing histograms) and measures the throughput (histograms/s),
+# the peak memory (RSS) and the scaling with the number of worker processes. Everything runs offline.
+#
+# Usage:
+#   python benchmarks/benchmarkCompareROOT.py --jobs 1 2 4 -o benchmark.json
+#   python benchmarks/benchmarkCompareROOT.py --jobs 1 2 4 --baseline benchmark.json
+
+# import packages
+import os
+import sys
+import io
+import json
+import time
+import resource
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+import uproot
+import uproot.writing.identify
+
+# benchmark the rootcomparer of this checkout (not an installed version)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rootcomparer.compareROOTfiles import compareROOTfiles
+from rootcomparer.roottools import OBJECTTYPES
+
+# folder of the SimDoublets histograms in the DQM files
+FOLDER = "DQMData/Run 1/Tracking/Run summary/TrackingMCTruth/SimDoublets"
+
+# ------------------------------------------------------------------------------------------
+# synthetic DQM files
+# ------------------------------------------------------------------------------------------
+
+def makeTProfile(rng, nBins):
+    """
+    Returns a random TProfile with `nBins` bins that can be written with uproot.
+    """
+    xaxis = uproot.writing.identify.to_TAxis("xaxis", "", nBins, 0, nBins)
+    entries = rng.integers(1, 100, nBins + 2).astype(np.float64)
+    sumw = entries * rng.uniform(1, 3, nBins + 2)
+    return uproot.writing.identify.to_TProfile("profile", "", data=sumw, fEntries=entries.sum(), fTsumw=entries.sum(),
+                                               fTsumw2=entries.sum(), fTsumwx=0, fTsumwx2=0, fTsumwy=sumw.sum(),
+                                               fTsumwy2=(sumw**2).sum(), fSumw2=sumw**2 / entries, fBinEntries=entries,
+                                               fBinSumw2=np.array([]), fXaxis=xaxis)
+
+
+def writeSyntheticDQMfiles(directory, nTH1=500, nTH2=200, nTProfile=200, differingFraction=0.01, nOther=500,
+                           nBins1D=100, nBins2D=50, seed=42):
+    """
+    Writes a reference and a candidate DQM file (`reference.root` and `candidate.root`) into `directory`.
+    The histograms are spread over the SimDoublets folder and two subfolders. The first `differingFraction` of the
+    histograms of each type differ by one entry (or one profile bin) in the candidate, all others are identical.
+    `nOther` histograms are written into another DQM folder, which is not compared.
+
+    Returns the paths of the reference and candidate file and the number of differing histograms.
+    """
+    rng = np.random.default_rng(seed)
+    edges1D = np.linspace(0, 10, nBins1D + 1)
+    edges2D = np.linspace(0, 10, nBins2D + 1)
+    ROOTfiles = [os.path.join(directory, name) for name in ["reference.root", "candidate.root"]]
+    nDiffering = 0
+
+    with uproot.recreate(ROOTfiles[0]) as reference, uproot.recreate(ROOTfiles[1]) as candidate:
+        for i in range(nTH1):
+            values = rng.poisson(50, nBins1D).astype(np.float64)
+            reference["%s/h1_%i" % (FOLDER, i)] = (values, edges1D)
+            if i < differingFraction * nTH1:
+                values = values.copy()
+                values[rng.integers(nBins1D)] += 1
+                nDiffering += 1
+            candidate["%s/h1_%i" % (FOLDER, i)] = (values, edges1D)
+
+        for i in range(nTH2):
+            values = rng.poisson(5, (nBins2D, nBins2D)).astype(np.float64)
+            reference["%s/cutParameters/h2_%i" % (FOLDER, i)] = (values, edges2D, edges2D)
+            if i < differingFraction * nTH2:
+                values = values.copy()
+                values[rng.integers(nBins2D), rng.integers(nBins2D)] += 1
+                nDiffering += 1
+            candidate["%s/cutParameters/h2_%i" % (FOLDER, i)] = (values, edges2D, edges2D)
+
+        for i in range(nTProfile):
+            state = rng.bit_generator.state
+            reference["%s/general/profile_%i" % (FOLDER, i)] = makeTProfile(rng, nBins1D)
+            if i < differingFraction * nTProfile:
+                # the same profile with other bin contents
+                candidate["%s/general/profile_%i" % (FOLDER, i)] = makeTProfile(np.random.default_rng(seed + i + 1), nBins1D)
+                nDiffering += 1
+            else:
+                rng.bit_generator.state = state
+                candidate["%s/general/profile_%i" % (FOLDER, i)] = makeTProfile(rng, nBins1D)
+
+        for i in range(nOther):
+            values = rng.poisson(50, nBins1D).astype(np.float64)
+            for f in [reference, candidate]:
+                f["DQMData/Run 1/Tracking/Run summary/Other/h1_%i" % i] = (values, edges1D)
+
+    return ROOTfiles[0], ROOTfiles[1], nDiffering
+
+
+# ------------------------------------------------------------------------------------------
+# measurements
+# ------------------------------------------------------------------------------------------
+
+def measure(ROOTfile1, ROOTfile2, jobs=1, fastPath=True):
+    """
+    Runs `compareROOTfiles` once (in the current process) and returns the wall time, the number of compared and differing
+    histograms, the throughput and the peak RSS in MB of this process and of its worker processes.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = compareROOTfiles(ROOTfile1, ROOTfile2, folder=FOLDER, jobs=jobs, fastPath=fastPath)
+    seconds = time.perf_counter() - start
+
+    nCompared = sum(results[objectType][1] for objectType in OBJECTTYPES)
+    return {
+        "jobs" : jobs,
+        "fastPath" : fastPath,
+        "seconds" : seconds,
+        "compared" : nCompared,
+        "differing" : len(results["differing"]),
+        "histogramsPerSecond" : nCompared / seconds,
+        # ru_maxrss is given in kB on Linux
+        "peakRSS" : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peakRSSWorkers" : resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def measureInSubprocess(ROOTfile1, ROOTfile2, jobs=1, fastPath=True):
+    """
+    Runs `measure` in a fresh python process, such that the peak RSS and the caches are not affected by earlier runs.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--measure", ROOTfile1, ROOTfile2, "--jobs", str(jobs)]
+    if not fastPath:
+        command.append("--noFastPath")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def runBenchmark(directory, jobsList=(1, 2, 4), repeat=3, **fileSettings):
+    """
+    Generates the synthetic files in `directory` and measures the comparison with and without the fast path for each
+    number of worker processes in `jobsList`. Each measurement is repeated `repeat` times and the fastest run is kept.
+    Returns the settings of the files and the list of measurements.
+    """
+    ROOTfile1, ROOTfile2, nDiffering = writeSyntheticDQMfiles(directory, **fileSettings)
+    measurements = []
+    for fastPath in [True, False]:
+        for jobs in jobsList:
+            runs = [measureInSubprocess(ROOTfile1, ROOTfile2, jobs=jobs, fastPath=fastPath) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["seconds"])
+            if best["differing"] != nDiffering:
+                raise ValueError("Expected %i differing histograms but found %i" % (nDiffering, best["differing"]))
+            measurements.append(best)
+    return {"files" : dict(fileSettings, differing=nDiffering), "measurements" : measurements}
+
+
+def printBenchmark(benchmark, baseline=None):
+    """
+    Prints the table of measurements and, if given, the change of the throughput with respect to a baseline benchmark.
+    Returns the largest relative slowdown with respect to the baseline (0 without baseline).
+    """
+    reference = {}
+    if baseline is not None:
+        reference = {(m["jobs"], m["fastPath"]) : m for m in baseline["measurements"]}
+    single = {m["fastPath"] : m for m in benchmark["measurements"] if m["jobs"] == 1}
+
+    print("\n %-10s %5s %9s %10s %8s %11s %12s %10s" % ("mode", "jobs", "time [s]", "hists/s", "speedup", "RSS [MB]", "workers [MB]", "vs. base"))
+    maxSlowdown = 0
+    for m in benchmark["measurements"]:
+        speedup = m["histogramsPerSecond"] / single[m["fastPath"]]["histogramsPerSecond"] if m["fastPath"] in single else float("nan")
+        change = ""
+        base = reference.get((m["jobs"], m["fastPath"]))
+        if base is not None:
+            ratio = m["histogramsPerSecond"] / base["histogramsPerSecond"]
+            maxSlowdown = max(maxSlowdown, 1 - ratio)
+            change = "%+.1f%%" % (100 * (ratio - 1))
+        print(" %-10s %5i %9.3f %10.0f %8.2f %11.1f %12.1f %10s" % ("fast path" if m["fastPath"] else "bin by bin", m["jobs"], m["seconds"],
+              m["histogramsPerSecond"], speedup, m["peakRSS"], m["peakRSSWorkers"], change))
+    print("")
+    return maxSlowdown
+
+
+# ------------------------------------------------------------------------------------------
+
+#########################################################################################
+# For usage from command line
+#########################################################################################
+
+import argparse
+parser = argparse.ArgumentParser(description="Benchmark compareROOTfiles on synthetic DQM files with the SimDoublets layout.")
+parser.add_argument("--nTH1", default=500, type=int, help="Number of TH1 histograms (default is 500)")
+parser.add_argument("--nTH2", default=200, type=int, help="Number of TH2 histograms (default is 200)")
+parser.add_argument("--nTProfile", default=200, type=int, help="Number of TProfiles (default is 200)")
+parser.add_argument("--differing", default=0.01, type=float, help="Fraction of differing histograms of each type (default is 0.01)")
+parser.add_argument("-j", "--jobs", default=[1, 2, 4], type=int, nargs="+", help="Numbers of worker processes to be measured (default is 1 2 4)")
+parser.add_argument("--repeat", default=3, type=int, help="Number of repetitions per measurement, the fastest is kept (default is 3)")
+parser.add_argument("-d", "--directory", default=None, type=str, help="Directory for the synthetic files (default is a temporary directory)")
+parser.add_argument("-o", "--output", default=None, type=str, help="Path of a json file to write the benchmark results to")
+parser.add_argument("--baseline", default=None, type=str, help="Path of the json file of an earlier benchmark to compare the throughput to")
+parser.add_argument("--maxSlowdown", default=0.2, type=float, help="Maximum accepted relative slowdown with respect to the baseline (default is 0.2)")
+parser.add_argument("--measure", default=None, type=str, nargs=2, help=argparse.SUPPRESS)
+parser.add_argument("--noFastPath", default=False, action='store_true', help=argparse.SUPPRESS)
+def main():
+    args = parser.parse_args()
+
+    # single measurement in a subprocess (see `measureInSubprocess`)
+    if args.measure is not None:
+        print(json.dumps(measure(*args.measure, jobs=args.jobs[0], fastPath=not args.noFastPath)))
+        return
+
+    print("="*30)
+    print("  Start benchmarkCompareROOT()")
+    print("="*30)
+
+    fileSettings = dict(nTH1=args.nTH1, nTH2=args.nTH2, nTProfile=args.nTProfile, differingFraction=args.differing)
+    print("Synthetic DQM files:")
+    for name, value in fileSettings.items():
+        print(" * %s: %g" % (name, value))
+    print(" * measured numbers of worker processes:", " ".join(str(jobs) for jobs in args.jobs))
+
+    with tempfile.TemporaryDirectory() as tmpDirectory:
+        directory = tmpDirectory if args.directory is None else args.directory
+        os.makedirs(directory, exist_ok=True)
+        benchmark = runBenchmark(directory, jobsList=args.jobs, repeat=args.repeat, **fileSettings)
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f_:
+            baseline = json.load(f_)
+    maxSlowdown = printBenchmark(benchmark, baseline)
+
+    if args.output is not None:
+        with open(args.output, "w") as f_:
+            json.dump(benchmark, f_, indent=1)
+        print("Benchmark results written to", args.output)
+
+    print("="*30)
+    print("  End benchmarkCompareROOT()")
+    print("="*30)
+
+    if maxSlowdown > args.maxSlowdown:
+        print("Throughput dropped by %.0f%% with respect to the baseline." % (100 * maxSlowdown))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
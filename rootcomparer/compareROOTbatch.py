@@ -0,0 +1,272 @@
+# import packages
+import os
+import glob
+import shlex
+import functools
+import multiprocessing
+from collections import OrderedDict
+
+from rootcomparer.roottools import OBJECTTYPES, iterFolderKeys, openROOTfile
+from rootcomparer.indexROOTfile import ROOTfileIndex
+from rootcomparer.stattools import TESTS
+from rootcomparer.compareROOTfiles import compareKeys, mergeShards, openReference, iterReferenceKeys, chunkKeys, writeReport
+
+# ------------------------------------------------------------------------------------------
+# helper functions for comparing many pairs of files
+# ------------------------------------------------------------------------------------------
+
+# ROOT files (and indices) opened by the current process, reused for all shards of all pairs (see `getHandle`)
+openHandles = OrderedDict()
+# maximum number of files kept open per process (the least recently used ones are closed first)
+maxOpenFiles = 16
+
+
+def readPairs(listFile):
+    """
+    Reads the pairs of files to be compared from a text file with one pair `<reference> <candidate>` per line
+    (separated by whitespace or a comma). Empty lines and lines starting with `#` are ignored.
+    """
+    pairs = []
+    with open(listFile, "r") as f_:
+        for line in f_:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            files = shlex.split(line.replace(",", " "))
+            if len(files) != 2:
+                raise ValueError("Expected two files per line in %s, got: %s" % (listFile, line))
+            pairs.append(tuple(files))
+    return pairs
+
+
+def pairDirectories(directory1, directory2):
+    """
+    Returns the pairs of all ROOT files in `directory1` (and its subdirectories) and the files with the same relative
+    path in `directory2`.
+    """
+    files = sorted(glob.glob(os.path.join(directory1, "**", "*.root"), recursive=True))
+    return [(ROOTfile, os.path.join(directory2, os.path.relpath(ROOTfile, directory1))) for ROOTfile in files]
+
+
+def getHandle(ROOTfile, useIndex=False, cacheSettings=None):
+    """
+    Returns the opened ROOT file (or its index if `useIndex` is True). Each file is opened only once per process
+    and kept open for the following shards, up to `maxOpenFiles` files.
+    """
+    handleKey = (ROOTfile, useIndex)
+    if handleKey in openHandles:
+        openHandles.move_to_end(handleKey)
+    else:
+        openHandles[handleKey] = ROOTfileIndex(ROOTfile).load() if useIndex else openROOTfile(ROOTfile, **(cacheSettings or {}))
+        while len(openHandles) > maxOpenFiles:
+            openHandles.popitem(last=False)[1].close()
+    return openHandles[handleKey]
+
+
+def comparePairShard(task, useIndex=False, cacheSettings=None, **compareSettings):
+    """
+    Compares a shard of keys of one pair of files `(pair index, reference, candidate, keys)` (in a worker process).
+    Returns the pair index and the output of `compareKeys`.
+    """
+    pairIndex, ROOTfile1, ROOTfile2, keys = task
+    reference = getHandle(ROOTfile1, useIndex=useIndex, cacheSettings=cacheSettings)
+    candidate = getHandle(ROOTfile2, cacheSettings=cacheSettings)
+    return pairIndex, compareKeys(keys, reference, [candidate], **compareSettings)
+
+
+def iterPairShards(pairs, folder=None, useIndex=False, cacheSettings=None, referenceKeys=None):
+    """
+    Yields the shards `(pair index, reference, candidate, keys)` of all pairs of files. The keys of each reference
+    are enumerated lazily in the given folder and stored in `referenceKeys` (a dictionary per pair index).
+    """
+    for pairIndex, (ROOTfile1, ROOTfile2) in enumerate(pairs):
+        keys1 = referenceKeys.setdefault(pairIndex, set()) if referenceKeys is not None else set()
+        with openReference(ROOTfile1, useIndex=useIndex, **(cacheSettings or {})) as reference:
+            keys = (key for key in iterReferenceKeys(reference, folder) if "=" not in key)
+            for chunk in chunkKeys(keys):
+                keys1.update(chunk)
+                yield pairIndex, ROOTfile1, ROOTfile2, chunk
+
+
+def printBatchSummary(pairs, pairResults, structures):
+    """
+    Prints the consolidated summary of all compared pairs of files.
+    """
+    status = []
+    for results in pairResults:
+        if results is None:
+            status.append("MISSING")
+        else:
+            status.append("FAILED" if results["differing"] else "PASSED")
+
+    print("\n\nDiffering histograms:")
+    for (ROOTfile1, ROOTfile2), results, structure in zip(pairs, pairResults, structures):
+        if results is None or not (results["differing"] or structure):
+            continue
+        print(" %s vs. %s:" % (ROOTfile1, ROOTfile2))
+        if structure:
+            print("   WARNING: different structures (%i paths only in the reference, %i only in the candidate)" % structure)
+        for key in results["differing"]:
+            print("   ->", key)
+
+    print("\nSummary per pair of files:")
+    for (ROOTfile1, ROOTfile2), results, test in zip(pairs, pairResults, status):
+        if results is None:
+            print("  %-7s %15s  %s vs. %s" % (test, "", ROOTfile1, ROOTfile2))
+            continue
+        passed = sum(results[objectType][0] for objectType in OBJECTTYPES)
+        compared = sum(results[objectType][1] for objectType in OBJECTTYPES)
+        print("  %-7s %6i / %6i  %s vs. %s" % (test, passed, compared, ROOTfile1, ROOTfile2))
+
+    nPassed = status.count("PASSED")
+    print("\n /************************************************/")
+    print(  " /*  %4i / %4i compared file pairs passed       */" % (nPassed, len(pairs)))
+    print(  " /*                                              */")
+    print(  " /*                 TEST %s                  */" % ("PASSED" if nPassed == len(pairs) else "FAILED"))
+    print(  " /************************************************/\n")
+
+
+# ------------------------------------------------------------------------------------------
+# main function for comparing many pairs of root files
+# ------------------------------------------------------------------------------------------
+
+def compareROOTbatch(pairs, folder=None, tolerance=1e-5, jobs=1, fastPath=True, useIndex=False, tests=("allclose",),
+                     pValue=0.01, pullThreshold=5., objectCache=0, arrayCache=100, maxBatchMemory=64, treeStepSize="100 MB",
+                     earlyStop=False, reportFile=None, plotDirectory=None):
+    """
+    Compares many pairs of ROOT files in one go. The keys of all pairs are split into shards which are compared in
+    one process pool, where each worker keeps the files it opened for the following shards. A consolidated summary
+    of all pairs is printed. All parameters not listed here are the same as for `compareROOTfiles`.
+
+    :param pairs: list of pairs `(reference, candidate)` of paths to ROOT files
+    :param folder: folder to be compared in all files
+    :param jobs: number of parallel processes
+    :param reportFile: if given, the structured results of all pairs are written to this json or npz file
+    :param plotDirectory: if given, diff plots of the differing histograms are rendered into the subdirectory
+                          `pair<i>` of this directory for the i-th pair (counting from 1)
+    :return: list with the comparison results (see `emptyResults` in `compareROOTfiles`) per pair,
+             None for pairs with missing files
+    """
+    for test in tests:
+        if test not in TESTS:
+            raise ValueError("Unknown comparison test %s. Choose from: %s" % (test, ", ".join(TESTS)))
+    compareSettings = dict(tolerance=tolerance, fastPath=fastPath, tests=tuple(tests), pValue=pValue, pullThreshold=pullThreshold,
+                           maxBatchBytes=int(maxBatchMemory * 1024**2), treeStepSize=treeStepSize, earlyStop=earlyStop,
+                           useIndex=useIndex, cacheSettings=dict(objectCache=objectCache, arrayCache=arrayCache))
+
+    pairs = [tuple(pair) for pair in pairs]
+    existing = [i for i, pair in enumerate(pairs) if all(os.path.exists(ROOTfile) for ROOTfile in pair)]
+    comparedPairs = [pairs[i] for i in existing]
+
+    # compare the shards of all pairs
+    referenceKeys = {}
+    shards = iterPairShards(comparedPairs, folder=folder, useIndex=useIndex, cacheSettings=compareSettings["cacheSettings"], referenceKeys=referenceKeys)
+    compareShard = functools.partial(comparePairShard, **compareSettings)
+    outputs = [[] for _ in comparedPairs]
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            for pairIndex, output in pool.imap_unordered(compareShard, shards):
+                outputs[pairIndex].append(output)
+    else:
+        for pairIndex, output in map(compareShard, shards):
+            outputs[pairIndex].append(output)
+
+    # merge the results and check the structures
+    pairResults = [None] * len(pairs)
+    structures = [None] * len(pairs)
+    for pairIndex, i in enumerate(existing):
+        pairResults[i] = mergeShards(outputs[pairIndex], 1)[0][0]
+        keys1 = referenceKeys.get(pairIndex, set())
+        keys2 = {key for key in iterFolderKeys(getHandle(pairs[i][1], cacheSettings=compareSettings["cacheSettings"]), folder) if "=" not in key}
+        if keys1 != keys2:
+            structures[i] = (len(keys1 - keys2), len(keys2 - keys1))
+
+    printBatchSummary(pairs, pairResults, structures)
+
+    if reportFile is not None:
+        writeReport([results for results in pairResults if results is not None], [pair[1] for pair in comparedPairs],
+                    reportFile, references=[pair[0] for pair in comparedPairs])
+        print("Comparison report written to", reportFile)
+
+    if plotDirectory is not None:
+        # matplotlib is only needed for the plots
+        from rootcomparer.plottools import plotDiffs
+        for i, results in enumerate(pairResults):
+            if results is None or not results["diffs"]:
+                continue
+            directory = os.path.join(plotDirectory, "pair%i" % (i + 1))
+            plots = plotDiffs(results["diffs"], directory, jobs=jobs)
+            print("%i diff plots of %s vs. %s written to %s" % (len(plots), *pairs[i], directory))
+
+    for handle in openHandles.values():
+        handle.close()
+    openHandles.clear()
+    return pairResults
+
+
+# ------------------------------------------------------------------------------------------
+
+#########################################################################################
+# For usage from command line
+#########################################################################################
+
+import argparse
+parser = argparse.ArgumentParser(description="Compare many pairs of ROOT files in one go, given either as a text file with one pair of files per line or as two directories holding files with the same names.")
+parser.add_argument("inputs", type=str, nargs="+", help="Text file listing the pairs of files (reference and candidate per line) or two directories (reference and candidate directory)")
+parser.add_argument("-f", "--folder", default="DQMData/Run 1/Tracking/Run summary/TrackingMCTruth/SimDoublets", type=str, help="Folder to check (default is SimDoublets folder)")
+parser.add_argument("-t", "--tolerance", default=1e-5, type=float, help="Tolerance for comparison of values (default is 1e-5)")
+parser.add_argument("--tests", default=["allclose"], nargs="+", choices=TESTS, help="Tests a histogram has to pass: allclose (all bins within the tolerance), chi2, ks (Kolmogorov-Smirnov, only for TH1 histograms) and/or pull (default is allclose)")
+parser.add_argument("--pValue", default=0.01, type=float, help="Minimum p-value for passing the chi2 and ks tests (default is 0.01)")
+parser.add_argument("--maxPull", default=5., type=float, help="Maximum absolute pull in any bin for passing the pull test (default is 5)")
+parser.add_argument("--noFastPath", default=False, action='store_true', help="flag to always compare the histograms bin by bin instead of comparing their raw bytes first")
+parser.add_argument("--useIndex", default=False, action='store_true', help="flag to compare against the sidecar indices of the reference files (built here if missing or outdated)")
+parser.add_argument("-r", "--report", default=None, type=str, help="Path of a json or npz file to write the structured comparison results of all pairs to")
+parser.add_argument("--plotDir", default=None, type=str, help="Directory to render diff plots of the differing histograms into (one subdirectory pair<i> per pair of files)")
+parser.add_argument("--objectCache", default=0, type=int, help="Maximum number of objects kept in uproot's object cache per file (default is 0, i.e. only directories are cached)")
+parser.add_argument("--arrayCache", default=100, type=float, help="Maximum size of uproot's array cache per file in MB (default is 100, 0 disables the cache)")
+parser.add_argument("--maxBatchMemory", default=64, type=float, help="Maximum size in MB of the histograms held in memory for the bin-by-bin comparison at once (default is 64)")
+parser.add_argument("--treeStepSize", default="100 MB", type=str, help="Size of the chunks in which trees are compared, a number of entries or a memory size (default is \"100 MB\")")
+parser.add_argument("--earlyStop", default=False, action='store_true', help="flag to stop comparing two trees at the first chunk with differing branches")
+parser.add_argument("-j", "--jobs", default=1, type=int, help="Number of parallel processes used for the comparison (default is 1)")
+def main():
+    print("="*30)
+    print("  Start compareROOTbatch()")
+    print("="*30)
+
+    args = parser.parse_args()
+
+    if len(args.inputs) == 1:
+        pairs = readPairs(args.inputs[0])
+        print("Compare the pairs of ROOT files listed in", args.inputs[0])
+    elif len(args.inputs) == 2:
+        pairs = pairDirectories(*args.inputs)
+        print("Compare the ROOT files in the following directories:")
+        print(" * reference directory:", args.inputs[0])
+        print(" * candidate directory:", args.inputs[1])
+    else:
+        parser.error("Expected either one file listing the pairs or two directories")
+    print(" * number of file pairs:", len(pairs))
+    print("\nAdditional settings:")
+    print(" * folder to be compared:", args.folder)
+    print(" * accepted tolerance when comparing:", args.tolerance)
+    print(" * comparison tests:", ", ".join(args.tests))
+    print(" * number of parallel processes:", args.jobs)
+    print(" * uproot caches per file: %i objects, %g MB of arrays" % (args.objectCache, args.arrayCache))
+    if args.useIndex:
+        print(" * use the sidecar indices of the reference files")
+    if args.noFastPath:
+        print(" * compare all histograms bin by bin")
+
+    # compare all pairs
+    compareROOTbatch(pairs, folder=args.folder, tolerance=args.tolerance, jobs=args.jobs, fastPath=not args.noFastPath,
+                     useIndex=args.useIndex, tests=args.tests, pValue=args.pValue, pullThreshold=args.maxPull,
+                     objectCache=args.objectCache, arrayCache=args.arrayCache, maxBatchMemory=args.maxBatchMemory,
+                     treeStepSize=int(args.treeStepSize) if args.treeStepSize.isdigit() else args.treeStepSize, earlyStop=args.earlyStop,
+                     reportFile=args.report, plotDirectory=args.plotDir)
+
+    print("="*30)
+    print("  End compareROOTbatch()")
+    print("="*30)
+
+if __name__ == "__main__":
+    main()
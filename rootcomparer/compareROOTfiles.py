@@ -1,99 +1,549 @@
 # import packages
-import uproot
+import os
+import csv
+import json
+import contextlib
+import functools
+import multiprocessing
 import numpy as np
 
+from rootcomparer.roottools import OBJECTTYPES, TREECLASSES, getHistType, getComparisonArrays, readPayload, hashBytes, iterFolderKeys, openROOTfile
+from rootcomparer.indexROOTfile import ROOTfileIndex
+from rootcomparer.stattools import TESTS, runTests, binDiffs
+from rootcomparer.treetools import compareTrees
+
+# ------------------------------------------------------------------------------------------
+# helper functions for comparing histograms
+# ------------------------------------------------------------------------------------------
+
+# the reference and the candidate ROOT files opened once in each worker process (see `initWorker`)
+workerFiles = None
+
+
+class ReferenceHist:
+    """
+    Small helper class giving access to one histogram (or tree) of the reference, which is either an opened ROOT file
+    or a `ROOTfileIndex` (which holds the histograms, trees are read from the ROOT file itself). The payload hashes and the compared arrays are only evaluated when needed and only once,
+    no matter against how many candidates the histogram is compared.
+    """
+
+    def __init__(self, reference, key):
+        self.reference = reference
+        self.key = key
+        self.cache = {}
+        if isinstance(reference, ROOTfileIndex):
+            self.entry = reference.entry(key)
+            self.classname = reference.classname(key)
+        else:
+            self.entry = None
+            self.tkey = reference.key(key)
+            self.classname = self.tkey.fClassName
+        self.histType = None if self.classname is None else getHistType(self.classname)
+        self.isTree = self.classname in TREECLASSES
+
+    def payloadSize(self, uncompressed=False):
+        if self.entry is not None:
+            return self.entry["uncompressedBytes" if uncompressed else "compressedBytes"]
+        return self.tkey.data_uncompressed_bytes if uncompressed else self.tkey.data_compressed_bytes
+
+    def payloadHash(self, uncompressed=False):
+        if self.entry is not None:
+            return self.entry["uncompressedHash" if uncompressed else "compressedHash"]
+        if uncompressed not in self.cache:
+            self.cache[uncompressed] = hashBytes(readPayload(self.tkey, uncompressed=uncompressed))
+        return self.cache[uncompressed]
+
+    def tree(self):
+        if isinstance(self.reference, ROOTfileIndex):
+            return self.reference.tree(self.key)
+        return self.reference[self.key]
+
+    def arrays(self):
+        if "arrays" not in self.cache:
+            if self.entry is not None:
+                self.cache["arrays"] = self.reference.arrays(self.key)
+            else:
+                self.cache["arrays"] = getComparisonArrays(self.reference[self.key])[1]
+        return self.cache["arrays"]
+
+
+def payloadIdentical(refHist, key):
+    """
+    Cheap comparison of a candidate histogram (given by its TKey) to the reference based on the raw bytes stored in
+    the files. Returns True if they are byte-identical (i.e. the comparison passed) and False if this is inconclusive
+    and the histograms have to be compared bin by bin.
+
+    The compressed bytes are compared first (no decompression at all). If they differ, the decompressed bytes are
+    compared, which catches identical histograms written with different compression settings.
+    """
+    if key.fClassName != refHist.classname:
+        return False
+    for uncompressed in [False, True]:
+        size = key.data_uncompressed_bytes if uncompressed else key.data_compressed_bytes
+        if size == refHist.payloadSize(uncompressed) and hashBytes(readPayload(key, uncompressed=uncompressed)) == refHist.payloadHash(uncompressed):
+            return True
+    return False
+
+
+def compareTreeKey(refHist, candidates, key, tolerance=1e-5, treeStepSize="100 MB", earlyStop=False):
+    """
+    Compares the tree under `key` in the reference to the same tree in all candidate files chunk by chunk
+    (see `treetools.compareTrees`). Returns the list of statuses per candidate (see `compareKey`).
+    """
+    statuses = [None] * len(candidates)
+    refTree = refHist.tree()
+    for i, candidate in enumerate(candidates):
+        if key not in candidate or candidate.key(key).fClassName not in TREECLASSES:
+            continue
+        passed, differences = compareTrees(refTree, candidate[key], tolerance=tolerance, stepSize=treeStepSize, earlyStop=earlyStop)
+        statuses[i] = ("TTree", passed, False, None if passed else {"type" : "TTree", **differences})
+    return statuses
+
+
+def compareKey(reference, candidates, key, fastPath=True, tolerance=1e-5, treeStepSize="100 MB", earlyStop=False):
+    """
+    Prepares the comparison of the object under `key` in the reference (opened ROOT file or `ROOTfileIndex`) to the same
+    object in all candidate files. The reference histogram is read only once, no matter how many candidates there are.
+    Trees are compared right away, chunk by chunk (see `compareTreeKey`).
+
+    Returns a list with one entry per candidate: None if the key is not in the candidate, the objects are no
+    matching histograms or trees or they still have to be compared bin by bin, else a tuple of the object type, whether
+    the comparison passed, whether it was decided by identical raw bytes alone and the differences found if the
+    comparison failed (see `emptyResults`). The histograms that still have to be
+    compared bin by bin are returned as a second list of tuples `(candidate index, histogram type, reference arrays,
+    candidate arrays)`, such that they can be tested together with the histograms of many other keys (see `runBatch`).
+    """
+    statuses = [None] * len(candidates)
+    pending = []
+    refHist = ReferenceHist(reference, key)
+    if refHist.isTree:
+        return compareTreeKey(refHist, candidates, key, tolerance=tolerance, treeStepSize=treeStepSize, earlyStop=earlyStop), pending
+    if refHist.histType is None:
+        return statuses, pending
+
+    for i, candidate in enumerate(candidates):
+        if key not in candidate:
+            continue
+        # first check the raw bytes
+        if fastPath and payloadIdentical(refHist, candidate.key(key)):
+            statuses[i] = (refHist.histType, True, True, None)
+            continue
+        histType, arrays = getComparisonArrays(candidate[key])
+        if histType != refHist.histType:
+            continue
+        # histograms with different shapes differ anyway
+        refArrays = refHist.arrays()
+        if all(a.shape == r.shape for a, r in zip(arrays, refArrays)):
+            pending.append((i, histType, refArrays, arrays))
+        else:
+            statuses[i] = (histType, False, False, {"type" : histType, "shape" : list(refArrays[0].shape), "candidateShape" : list(arrays[0].shape)})
+    return statuses, pending
+
+
+def runBatch(batch, tests=("allclose",), tolerance=1e-5, pValue=0.01, pullThreshold=5.):
+    """
+    Compares a batch of histogram pairs bin by bin. The pairs are grouped by their type and shape and each group
+    is stacked into arrays of shape (pairs, bins), such that all tests are evaluated with one vectorized call per group
+    instead of one call per histogram.
+
+    :param batch: list of tuples `(..., histogram type, reference arrays, candidate arrays)` as returned by `compareKey`
+    :param tests: tests to be run (see `stattools.runTests`)
+    :return: list with the outcome (True/False) per pair and list with the bin-wise differences of each failing pair
+             (see `stattools.binDiffs`, None for passing pairs)
+    """
+    groups = {}
+    for j, (*_, histType, refArrays, candArrays) in enumerate(batch):
+        groups.setdefault((histType, tuple(a.shape for a in refArrays)), []).append(j)
+
+    passed = [False] * len(batch)
+    diffs = [None] * len(batch)
+    for (histType, shapes), indices in groups.items():
+        refStacks = [np.stack([batch[j][-2][n] for j in indices]) for n in range(len(shapes))]
+        candStacks = [np.stack([batch[j][-1][n] for j in indices]) for n in range(len(shapes))]
+        outcomes = runTests(histType, refStacks, candStacks, tests=tests, tolerance=tolerance, pValue=pValue, pullThreshold=pullThreshold)
+        for j, p in zip(indices, outcomes):
+            passed[j] = bool(p)
+
+        # bin-wise differences of the failing pairs
+        failing = ~outcomes
+        if failing.any():
+            failingIndices = [j for j, f in zip(indices, failing) if f]
+            groupDiffs = binDiffs(histType, [stack[failing] for stack in refStacks], [stack[failing] for stack in candStacks], tolerance=tolerance)
+            for j, diff in zip(failingIndices, groupDiffs):
+                diffs[j] = diff
+    return passed, diffs
+
+
+def openReference(ROOTfile, useIndex=False, **cacheSettings):
+    """
+    Opens the first (reference) ROOT file, or its sidecar index if `useIndex` is True (building or updating it if needed).
+    """
+    if useIndex:
+        return ROOTfileIndex(ROOTfile).update()
+    return openROOTfile(ROOTfile, **cacheSettings)
+
+
+def iterReferenceKeys(reference, folder=None):
+    """
+    Lazily yields the keys of all objects in `folder` of the reference (opened ROOT file or `ROOTfileIndex`).
+    """
+    if isinstance(reference, ROOTfileIndex):
+        return reference.iterkeys(folder)
+    return iterFolderKeys(reference, folder)
+
+
+def chunkKeys(keys, chunkSize=100):
+    """
+    Splits a stream of keys into lists of `chunkSize` keys (the shards compared by the worker processes).
+    """
+    chunk = []
+    for key in keys:
+        chunk.append(key)
+        if len(chunk) == chunkSize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def emptyResults():
+    """
+    Returns the empty comparison results: a counter [passed, compared] per object type, the list of differing keys,
+    the differences of each differing object and the number of histograms found identical by their raw bytes alone.
+
+    The differences are a dictionary per differing key with the object type and
+     - for histograms compared bin by bin: the shape, the indices of the differing bins (`differingBins`),
+       the maximum absolute and relative deviation and the (mean) values of both histograms (see `stattools.binDiffs`),
+     - for histograms of different shapes: the shapes of both histograms,
+     - for trees: the list of differing branches and, if they differ, the numbers of entries of both trees.
+    """
+    results = {histType : [0,0] for histType in OBJECTTYPES}
+    results["differing"] = []
+    results["diffs"] = {}
+    results["identicalPayloads"] = 0
+    return results
+
+
+def compareKeys(keys, reference=None, candidates=None, tolerance=1e-5, fastPath=True, tests=("allclose",),
+                pValue=0.01, pullThreshold=5., batchSize=1000, maxBatchBytes=64 * 1024**2, treeStepSize="100 MB", earlyStop=False):
+    """
+    Compares the objects under the given keys in the reference (opened ROOT file or `ROOTfileIndex`) to all opened
+    candidate files. If no files are given, the files opened by `initWorker` are used.
+    If `fastPath` is True, the raw bytes are compared first and the histograms are only read and compared
+    bin by bin if they are not byte-identical. The bin-by-bin comparisons are collected and run in batches of
+    at most `batchSize` histogram pairs or `maxBatchBytes` bytes of arrays (see `runBatch`). Only the compact outcome
+    (and the bin-wise differences of differing histograms) is kept per histogram, the arrays are released as soon as
+    their batch is done, so the memory stays bounded no matter how many histograms are compared. Trees are compared in chunks of `treeStepSize` (see `compareTrees`).
+
+    Returns the list of results per candidate (see `emptyResults`) and the comparison matrix, a dictionary holding
+    for each compared histogram the list of outcomes per candidate (True/False, or None if not compared).
+    """
+    if reference is None:
+        reference, candidates = workerFiles
+    allStatuses = {}
+    batch = []
+    batchBytes = 0
+
+    def flush():
+        nonlocal batchBytes
+        passed, diffs = runBatch([entry[1:] for entry in batch], tests=tests, tolerance=tolerance, pValue=pValue, pullThreshold=pullThreshold)
+        for (key, i, histType, *_), p, diff in zip(batch, passed, diffs):
+            allStatuses[key][i] = (histType, p, False, diff)
+        batch.clear()
+        batchBytes = 0
+
+    for key in keys:
+        statuses, pending = compareKey(reference, candidates, key, fastPath=fastPath, tolerance=tolerance,
+                                       treeStepSize=treeStepSize, earlyStop=earlyStop)
+        if all(status is None for status in statuses) and not pending:
+            continue
+        allStatuses[key] = statuses
+        batch += [(key, *entry) for entry in pending]
+        batchBytes += sum(a.nbytes + r.nbytes for *_, refArrays, arrays in pending for a, r in zip(arrays, refArrays))
+        if len(batch) >= batchSize or batchBytes >= maxBatchBytes:
+            flush()
+    if batch:
+        flush()
+
+    resultsList = [emptyResults() for _ in candidates]
+    matrix = {}
+    for key, statuses in allStatuses.items():
+        matrix[key] = [None if status is None else status[1] for status in statuses]
+        for results, status in zip(resultsList, statuses):
+            if status is None:
+                continue
+            histType, passed, identicalPayload, diff = status
+            if identicalPayload:
+                results["identicalPayloads"] += 1
+            if passed:
+                results[histType][0] += 1
+            else:
+                results["differing"].append(key)
+                if diff is not None:
+                    results["diffs"][key] = diff
+            results[histType][1] += 1
+    return resultsList, matrix
+
+
+def mergeResults(resultsList):
+    """
+    Merges the comparison results of several shards of keys into one.
+    """
+    merged = emptyResults()
+    for results in resultsList:
+        for histType in OBJECTTYPES:
+            merged[histType][0] += results[histType][0]
+            merged[histType][1] += results[histType][1]
+        merged["differing"] += results["differing"]
+        merged["diffs"].update(results["diffs"])
+        merged["identicalPayloads"] += results["identicalPayloads"]
+    merged["differing"].sort()
+    return merged
+
+
+def mergeShards(shardOutputs, nCandidates):
+    """
+    Merges the outputs `(resultsList, matrix)` of `compareKeys` for several shards of keys.
+    """
+    shardOutputs = list(shardOutputs)
+    resultsList = [mergeResults([output[0][i] for output in shardOutputs]) for i in range(nCandidates)]
+    matrix = {}
+    for output in shardOutputs:
+        matrix.update(output[1])
+    return resultsList, dict(sorted(matrix.items()))
+
+
+def initWorker(ROOTfile1, ROOTfiles2, useIndex=False, cacheSettings=None):
+    """
+    Initializer for the worker processes of the pool. Opens all ROOT files (or the index of the first one) once per worker.
+    """
+    global workerFiles
+    cacheSettings = cacheSettings or {}
+    workerFiles = (ROOTfileIndex(ROOTfile1).load() if useIndex else openROOTfile(ROOTfile1, **cacheSettings),
+                   [openROOTfile(ROOTfile2, **cacheSettings) for ROOTfile2 in ROOTfiles2])
+
+
+def compareKeysInWorker(keys, **kwargs):
+    """
+    Compares a shard of keys in a worker process using the files opened by `initWorker`.
+    """
+    return compareKeys(keys, **kwargs)
+
+
+def printSummary(results):
+    """
+    Prints the differing histograms and the summary box of the comparison.
+    """
+    if results["differing"]:
+        print("\n\nThe following histograms differ:")
+        for histo in results["differing"]:
+            print(" ->", histo)
+            diff = results["diffs"].get(histo, {})
+            if "entries" in diff:
+                print("      different numbers of entries", diff["entries"][0], "and", diff["entries"][1])
+            if diff.get("differingBranches"):
+                print("      differing branches:", ", ".join(diff["differingBranches"]))
+            elif "differingBins" in diff:
+                print("      %i differing bins, max. deviation %g (relative %g)" % (len(diff["differingBins"]), diff["maxAbsDeviation"], diff["maxRelDeviation"]))
+            elif "candidateShape" in diff:
+                print("      different shapes", diff["shape"], "and", diff["candidateShape"])
+        test = "FAILED"
+    else:
+        print("\n\nAll histograms identical.")
+        test = "PASSED"
+
+    if results["identicalPayloads"]:
+        print("\n(%i histograms were identical byte by byte and did not need to be compared bin by bin)" % results["identicalPayloads"])
+    print("\n /************************************************/")
+    print(  " /*  %4i / %4i compared TH1 histograms passed  */" % tuple(results["TH1"]))
+    print(  " /*  %4i / %4i compared TH2 histograms passed  */" % tuple(results["TH2"]))
+    print(  " /*  %4i / %4i compared TProfiles passed       */" % tuple(results["TProfile"]))
+    if results["TTree"][1]:
+        print(  " /*  %4i / %4i compared TTrees passed          */" % tuple(results["TTree"]))
+    print(  " /*                                              */")
+    print(  " /*                 TEST %s                  */" % test)
+    print(  " /************************************************/\n")
+
+
+def printMatrix(resultsList, matrix, candidates):
+    """
+    Prints the comparison matrix (histogram x candidate) for all histograms that differ in at least one candidate
+    and a summary line per candidate.
+    """
+    status = {True : "pass", False : "FAIL", None : "-"}
+    differing = [key for key, row in matrix.items() if False in row]
+
+    print("\n\nCandidates:")
+    for i, candidate in enumerate(candidates):
+        print(" [%i] %s" % (i + 1, candidate))
+
+    if differing:
+        print("\nThe following histograms differ in at least one candidate:")
+        print("  " + "".join("%6s" % ("[%i]" % (i + 1)) for i in range(len(candidates))))
+        for key in differing:
+            print("  " + "".join("%6s" % status[s] for s in matrix[key]) + "  " + key)
+    else:
+        print("\nAll histograms identical in all candidates.")
+
+    print("\nSummary per candidate:")
+    for i, results in enumerate(resultsList):
+        passed = sum(results[histType][0] for histType in OBJECTTYPES)
+        compared = sum(results[histType][1] for histType in OBJECTTYPES)
+        trees = (", TTree: %i/%i" % tuple(results["TTree"])) if results["TTree"][1] else ""
+        print(" [%i] %5i / %5i compared histograms passed (TH1: %i/%i, TH2: %i/%i, TProfile: %i/%i%s) -> TEST %s" % (
+            i + 1, passed, compared, *results["TH1"], *results["TH2"], *results["TProfile"], trees,
+            "FAILED" if results["differing"] else "PASSED"))
+    print("")
+
+
+def writeMatrix(matrix, candidates, filename):
+    """
+    Writes the comparison matrix (histogram x candidate) to a csv file with the entries "pass", "FAIL" or "" (not compared).
+    """
+    status = {True : "pass", False : "FAIL", None : ""}
+    with open(filename, "w", newline="") as f_:
+        writer = csv.writer(f_)
+        writer.writerow(["histogram"] + list(candidates))
+        for key, row in matrix.items():
+            writer.writerow([key] + [status[s] for s in row])
+
+
+def writeReport(resultsList, candidates, filename, references=None):
+    """
+    Writes the structured comparison results (see `emptyResults`) of all candidates to a json or npz file.
+    If the candidates were compared to different references, their list can be given as `references`.
+    In the json file, all arrays are stored as (nested) lists. In the npz file, the arrays of the differences are
+    stored as separate arrays named `<candidate index>/<key>/<field>` and everything else as json string in `report`.
+    """
+    asNpz = os.path.splitext(filename)[1] == ".npz"
+    report = {"candidates" : list(candidates), "results" : []}
+    if references is not None:
+        report["references"] = list(references)
+    arrays = {}
+    for i, results in enumerate(resultsList):
+        results = dict(results)
+        diffs = {}
+        for key, diff in results["diffs"].items():
+            diffs[key] = {}
+            for field, value in diff.items():
+                if not isinstance(value, np.ndarray):
+                    diffs[key][field] = value
+                elif asNpz:
+                    arrays["%i/%s/%s" % (i, key, field)] = value
+                else:
+                    diffs[key][field] = value.tolist()
+        results["diffs"] = diffs
+        report["results"].append(results)
+
+    if asNpz:
+        np.savez_compressed(filename, report=np.array(json.dumps(report)), **arrays)
+    else:
+        with open(filename, "w") as f_:
+            json.dump(report, f_, indent=1)
+
+
 # ------------------------------------------------------------------------------------------
 # main function for comparing two root files
 # ------------------------------------------------------------------------------------------
 
-def compareROOTfiles(ROOTfile1, ROOTfile2, folder=None, tolerance=1e-5):
+def compareROOTfiles(ROOTfile1, ROOTfile2, folder=None, tolerance=1e-5, jobs=1, fastPath=True, useIndex=False, matrixFile=None,
+                     tests=("allclose",), pValue=0.01, pullThreshold=5., objectCache=0, arrayCache=100, maxBatchMemory=64,
+                     treeStepSize="100 MB", earlyStop=False, reportFile=None, plotDirectory=None):
     """
-    Compare two ROOT files and returns which histograms differ.
+    Compare two ROOT files and returns which histograms differ, including where they differ (see `emptyResults`).
+    If a list of files is given as `ROOTfile2`, each histogram of the first (reference) file is read only once and
+    compared to all of them, and a comparison matrix (histogram x candidate) is printed.
     
     :param ROOTfile1: Path to first ROOT file
-    :param ROOTfile2: Path to second ROOT file
+    :param ROOTfile2: Path to second ROOT file or list of paths to several candidate ROOT files
     :param tolerance: tolerance for the comparison
+    :param jobs: number of parallel processes; if larger than 1, the keys are split into shards
+                 which are compared in a process pool where each worker opens all files once
+    :param fastPath: if True, histograms with byte-identical payloads in both files pass without being decompressed
+                     and compared bin by bin
+    :param useIndex: if True, compare against the sidecar index of the first file (see `ROOTfileIndex`)
+                     instead of reading the first file itself; the index is built or updated if needed
+    :param matrixFile: if given, the comparison matrix is written to this csv file
+    :param tests: tests a histogram has to pass, any of "allclose" (all bins agree within `tolerance`), "chi2" and "ks"
+                  (chi2 and Kolmogorov-Smirnov test with a p-value of at least `pValue`, the latter only for TH1
+                  histograms) and "pull" (no bin with a pull larger than `pullThreshold`); all tests are evaluated
+                  for stacks of same-shaped histograms at once
+    :param pValue: minimum p-value for passing the chi2 and Kolmogorov-Smirnov tests
+    :param pullThreshold: maximum absolute pull in any bin for passing the pull test
+    :param objectCache: maximum number of objects other than directories kept in uproot's object cache of each file
+                        (directories are always cached)
+    :param arrayCache: maximum size of uproot's array cache of each file in MB (0 disables the cache)
+    :param maxBatchMemory: maximum size in MB of the histogram arrays held for the bin-by-bin comparison at once
+                           (per process)
+    :param treeStepSize: size of the chunks in which trees (TTree, TNtuple) are read and compared, either a number
+                         of entries or a memory size such as "100 MB"
+    :param earlyStop: if True, the comparison of two trees stops at the first chunk with differing branches
+    :param reportFile: if given, the structured results including the bin-wise differences are written to this
+                       json or npz file
+    :param plotDirectory: if given, diff plots of the differing histograms are rendered into this directory
+                          (in `jobs` parallel processes)
+    :return: the comparison results (see `emptyResults`), a list of them if several candidates are given
     """
-    with uproot.open(ROOTfile1) as f1, uproot.open(ROOTfile2) as f2:
-        keys1 = set(f1.keys())
-        keys2 = set(f2.keys())
-
-        keys1 = {t for t in keys1 if ("=" not in t)}
-        keys2 = {t for t in keys2 if ("=" not in t)}
-        
-        # Check the structures
-        if keys1 != keys2:
-            print("\n\nWARNING: Different structures in the files!")
-            print("  -> only in file 1:", keys1 - keys2)
-            print("  -> only in file 2:", keys2 - keys1)
-            print("\nIgnore those paths in comparison...")
-        
-        differing_histos = []
-        
-        commonKeys = keys1.intersection(keys2)
-        if folder is not None:
-            commonKeys = {t for t in commonKeys if (folder in t)}
-
-        NTH1compared = [0,0]
-        NTH2compared = [0,0]
-        NProfilecompared = [0,0]
-        for key in commonKeys:
-            obj1 = f1[key]
-            obj2 = f2[key]
-            
-            if isinstance(obj1, uproot.behaviors.TH1.TH1) and isinstance(obj2, uproot.behaviors.TH1.TH1):
-                bins1 = obj1.to_numpy()
-                bins2 = obj2.to_numpy()
-                
-                if not np.allclose(bins1[0], bins2[0], atol=tolerance):
-                    differing_histos.append(key)
-                else:
-                    NTH1compared[0] += 1
-                
-                NTH1compared[1] += 1
-            
-            elif isinstance(obj1, uproot.behaviors.TH2.TH2) and isinstance(obj2, uproot.behaviors.TH2.TH2):
-                bins1 = obj1.to_numpy()
-                bins2 = obj2.to_numpy()
-                
-                if not np.allclose(bins1[0], bins2[0], atol=tolerance):
-                    differing_histos.append(key)
-                else:
-                    NTH2compared[0] += 1
-                
-                NTH2compared[1] += 1
-            
-            elif isinstance(obj1, uproot.behaviors.TProfile.TProfile) and isinstance(obj2, uproot.behaviors.TProfile.TProfile):
-                bins1 = obj1.values()
-                bins2 = obj2.values()
-                err1 = obj1.errors()
-                err2 = obj2.errors()
-                
-                if not np.allclose(bins1, bins2, atol=tolerance) or not np.allclose(err1, err2, atol=tolerance):
-                    differing_histos.append(key)
-                else:
-                    NProfilecompared[0] += 1
-                
-                NProfilecompared[1] += 1
-        
-
-        if differing_histos:
-            print("\n\nThe following histograms differ:")
-            for histo in differing_histos:
-                print(" ->", histo)
-            test = "FAILED"
+    for test in tests:
+        if test not in TESTS:
+            raise ValueError("Unknown comparison test %s. Choose from: %s" % (test, ", ".join(TESTS)))
+    compareSettings = dict(tolerance=tolerance, fastPath=fastPath, tests=tuple(tests), pValue=pValue, pullThreshold=pullThreshold,
+                           maxBatchBytes=int(maxBatchMemory * 1024**2), treeStepSize=treeStepSize, earlyStop=earlyStop)
+    cacheSettings = dict(objectCache=objectCache, arrayCache=arrayCache)
+
+    ROOTfiles2 = [ROOTfile2] if isinstance(ROOTfile2, str) else list(ROOTfile2)
+
+    with openReference(ROOTfile1, useIndex=useIndex, **cacheSettings) as f1, contextlib.ExitStack() as stack:
+        candidates = [stack.enter_context(openROOTfile(ROOTfile, **cacheSettings)) for ROOTfile in ROOTfiles2]
+
+        # enumerate the keys of the reference lazily (only in the requested folder) and compare them as they are found
+        keys1 = set()
+        def referenceKeys():
+            for key in iterReferenceKeys(f1, folder):
+                if "=" in key:
+                    continue
+                keys1.add(key)
+                yield key
+
+        if jobs > 1:
+            with multiprocessing.Pool(jobs, initializer=initWorker, initargs=(ROOTfile1, ROOTfiles2, useIndex, cacheSettings)) as pool:
+                resultsList, matrix = mergeShards(pool.imap_unordered(functools.partial(compareKeysInWorker, **compareSettings), chunkKeys(referenceKeys())), len(candidates))
         else:
-            print("\n\nAll histograms identical.")
-            test = "PASSED"
-        
-        print("\n /************************************************/")
-        print(  " /*  %4i / %4i compared TH1 histograms passed  */" % tuple(NTH1compared))
-        print(  " /*  %4i / %4i compared TH2 histograms passed  */" % tuple(NTH2compared))
-        print(  " /*  %4i / %4i compared TProfiles passed       */" % tuple(NProfilecompared))
-        print(  " /*                                              */")
-        print(  " /*                 TEST %s                  */" % test)
-        print(  " /************************************************/\n")
-    
+            resultsList, matrix = mergeShards([compareKeys(referenceKeys(), f1, candidates, **compareSettings)], len(candidates))
+
+        # Check the structures (of the compared folder)
+        for ROOTfile, f2 in zip(ROOTfiles2, candidates):
+            keys2 = {t for t in iterFolderKeys(f2, folder) if ("=" not in t)}
+            if keys1 != keys2:
+                print("\n\nWARNING: Different structures in the files!" if len(candidates) == 1 else
+                      "\n\nWARNING: Different structures in the reference and %s!" % ROOTfile)
+                print("  -> only in file 1:", keys1 - keys2)
+                print("  -> only in file 2:", keys2 - keys1)
+                print("\nIgnore those paths in comparison...")
+
+        if len(candidates) == 1:
+            printSummary(resultsList[0])
+        else:
+            printMatrix(resultsList, matrix, ROOTfiles2)
+
+        if matrixFile is not None:
+            writeMatrix(matrix, ROOTfiles2, matrixFile)
+            print("Comparison matrix written to", matrixFile)
+
+        if reportFile is not None:
+            writeReport(resultsList, ROOTfiles2, reportFile)
+            print("Comparison report written to", reportFile)
+
+        if plotDirectory is not None:
+            # matplotlib is only needed for the plots
+            from rootcomparer.plottools import plotDiffs
+            for i, results in enumerate(resultsList):
+                directory = plotDirectory if len(candidates) == 1 else os.path.join(plotDirectory, "candidate%i" % (i + 1))
+                plots = plotDiffs(results["diffs"], directory, jobs=jobs)
+                print("%i diff plots written to %s" % (len(plots), directory))
+
+    return resultsList[0] if len(candidates) == 1 else resultsList
+
 
 # ------------------------------------------------------------------------------------------
 
@@ -102,11 +552,25 @@ def compareROOTfiles(ROOTfile1, ROOTfile2, folder=None, tolerance=1e-5):
 #########################################################################################
 
 import argparse
-parser = argparse.ArgumentParser(description="Compare the content of two ROOT files by looping over the common histograms and checking their data.")
+parser = argparse.ArgumentParser(description="Compare the content of two ROOT files by looping over the common histograms and checking their data. If several files are given after the first one, all of them are compared to the first file.")
 parser.add_argument("DQMfile1", type=str, help="Path to the first ROOT DQM input file")
-parser.add_argument("DQMfile2", type=str, help="Path to the second ROOT DQM input file")
+parser.add_argument("DQMfile2", type=str, nargs="+", help="Path to the second ROOT DQM input file (or several candidate files)")
 parser.add_argument("-f", "--folder", default="DQMData/Run 1/Tracking/Run summary/TrackingMCTruth/SimDoublets", type=str, help="Folder to check (default is SimDoublets folder)")
 parser.add_argument("-t", "--tolerance", default=1e-5, type=float, help="Tolerance for comparison of values (default is 1e-5)")
+parser.add_argument("--tests", default=["allclose"], nargs="+", choices=TESTS, help="Tests a histogram has to pass: allclose (all bins within the tolerance), chi2, ks (Kolmogorov-Smirnov, only for TH1 histograms) and/or pull (default is allclose)")
+parser.add_argument("--pValue", default=0.01, type=float, help="Minimum p-value for passing the chi2 and ks tests (default is 0.01)")
+parser.add_argument("--maxPull", default=5., type=float, help="Maximum absolute pull in any bin for passing the pull test (default is 5)")
+parser.add_argument("--noFastPath", default=False, action='store_true', help="flag to always compare the histograms bin by bin instead of comparing their raw bytes first")
+parser.add_argument("--useIndex", default=False, action='store_true', help="flag to compare against the sidecar index of DQM file 1 (built with indexROOT, or built here if missing or outdated)")
+parser.add_argument("-m", "--matrix", default=None, type=str, help="Path of a csv file to write the comparison matrix (histogram x candidate) to")
+parser.add_argument("-r", "--report", default=None, type=str, help="Path of a json or npz file to write the structured comparison results (including the differing bins of each histogram) to")
+parser.add_argument("--plotDir", default=None, type=str, help="Directory to render diff plots of the differing histograms into")
+parser.add_argument("--objectCache", default=0, type=int, help="Maximum number of objects kept in uproot's object cache per file (default is 0, i.e. only directories are cached)")
+parser.add_argument("--arrayCache", default=100, type=float, help="Maximum size of uproot's array cache per file in MB (default is 100, 0 disables the cache)")
+parser.add_argument("--maxBatchMemory", default=64, type=float, help="Maximum size in MB of the histograms held in memory for the bin-by-bin comparison at once (default is 64)")
+parser.add_argument("--treeStepSize", default="100 MB", type=str, help="Size of the chunks in which trees are compared, a number of entries or a memory size (default is \"100 MB\")")
+parser.add_argument("--earlyStop", default=False, action='store_true', help="flag to stop comparing two trees at the first chunk with differing branches")
+parser.add_argument("-j", "--jobs", default=1, type=int, help="Number of parallel processes used for the comparison (default is 1)")
 def main():
     print("="*30)
     print("  Start compareROOTfiles()")
@@ -114,15 +578,39 @@ def main():
 
     args = parser.parse_args()
 
-    print("Compare the following two ROOT files:")
-    print(" * DQM file 1:", args.DQMfile1)
-    print(" * DQM file 2:", args.DQMfile2)
+    if len(args.DQMfile2) == 1:
+        print("Compare the following two ROOT files:")
+        print(" * DQM file 1:", args.DQMfile1)
+        print(" * DQM file 2:", args.DQMfile2[0])
+    else:
+        print("Compare the following ROOT files to the reference:")
+        print(" * reference DQM file:", args.DQMfile1)
+        for DQMfile in args.DQMfile2:
+            print(" * candidate DQM file:", DQMfile)
     print("\nAdditional settings:")
     print(" * folder to be compared:", args.folder)
     print(" * accepted tolerance when comparing:", args.tolerance)
+    print(" * comparison tests:", ", ".join(args.tests))
+    if ("chi2" in args.tests) or ("ks" in args.tests):
+        print(" * minimum p-value of chi2 and KS tests:", args.pValue)
+    if "ks" in args.tests:
+        print("   (the KS test is only applied to TH1 histograms, it is skipped for TH2 histograms and TProfiles)")
+    if "pull" in args.tests:
+        print(" * maximum pull per bin:", args.maxPull)
+    print(" * number of parallel processes:", args.jobs)
+    print(" * uproot caches per file: %i objects, %g MB of arrays" % (args.objectCache, args.arrayCache))
+    if args.useIndex:
+        print(" * use the sidecar index of DQM file 1")
+    if args.noFastPath:
+        print(" * compare all histograms bin by bin")
    
     # produce the plots
-    compareROOTfiles(args.DQMfile1, args.DQMfile2, folder=args.folder, tolerance=args.tolerance)
+    compareROOTfiles(args.DQMfile1, args.DQMfile2, folder=args.folder, tolerance=args.tolerance, jobs=args.jobs,
+                     fastPath=not args.noFastPath, useIndex=args.useIndex, matrixFile=args.matrix,
+                     tests=args.tests, pValue=args.pValue, pullThreshold=args.maxPull,
+                     objectCache=args.objectCache, arrayCache=args.arrayCache, maxBatchMemory=args.maxBatchMemory,
+                     treeStepSize=int(args.treeStepSize) if args.treeStepSize.isdigit() else args.treeStepSize, earlyStop=args.earlyStop,
+                     reportFile=args.report, plotDirectory=args.plotDir)
 
     print("="*30)
     print("  End compareROOTfiles()")
@@ -0,0 +1,234 @@
+# import packages
+import os
+import json
+import uproot
+import numpy as np
+
+from rootcomparer.roottools import TREECLASSES, getHistType, getComparisonArrays, readPayload, hashBytes, openROOTfile
+
+# ------------------------------------------------------------------------------------------
+# sidecar index of a ROOT file
+# ------------------------------------------------------------------------------------------
+
+def getIndexPath(ROOTfile):
+    """
+    Returns the default base path of the sidecar index of the given ROOT file (next to the file itself).
+    The index consists of `<base path>.json` (metadata) and `<base path>.npz` (compared arrays).
+    """
+    return ROOTfile + ".index"
+
+
+class ROOTfileIndex:
+    """
+    Persistent sidecar index of the histograms in a ROOT file. For each histogram it stores the key path, class,
+    shape, hashes of the compressed and uncompressed payload, some summary statistics and the arrays that are
+    compared by `compareROOTfiles`. Comparing against the index avoids reopening and decompressing the
+    reference file over and over again.
+
+    The index is only rebuilt if the modification time or the size of the ROOT file changed. Even then, the entries of
+    histograms whose compressed payload is unchanged are reused without decompressing them again.
+
+    Trees are not indexed, only their keys and classes are stored. They are read from the ROOT file itself,
+    which is only opened if a tree is needed (see `tree`).
+    """
+
+    def __init__(self, ROOTfile, indexPath=None):
+        self.ROOTfile = ROOTfile
+        self.path = getIndexPath(ROOTfile) if indexPath is None else indexPath
+        # metadata: file stats, all keys in the file and the entries of the histograms
+        self.meta = {"mtime" : None, "size" : None, "keys" : [], "histograms" : {}, "trees" : {}}
+        # lazily loaded arrays of the histograms (np.lib.npyio.NpzFile)
+        self.npz = None
+        # the ROOT file itself, only opened for reading trees
+        self.file = None
+
+    @property
+    def jsonPath(self):
+        return self.path + ".json"
+
+    @property
+    def npzPath(self):
+        return self.path + ".npz"
+
+    def load(self):
+        """
+        Loads the index from disk if it exists. Returns the index itself.
+        """
+        self.close()
+        if os.path.exists(self.jsonPath) and os.path.exists(self.npzPath):
+            with open(self.jsonPath, "r") as f_:
+                self.meta = json.load(f_)
+            self.npz = np.load(self.npzPath)
+        return self
+
+    def isUpToDate(self):
+        """
+        Returns True if the loaded index was built from the ROOT file as it is now (same modification time and size).
+        Indices built before the trees were recorded are outdated as well.
+        """
+        stat = os.stat(self.ROOTfile)
+        return self.meta["mtime"] == stat.st_mtime and self.meta["size"] == stat.st_size and "trees" in self.meta
+
+    def update(self, verbose=True):
+        """
+        Loads the index and rebuilds it if the ROOT file changed since it was built. Returns the index itself.
+        """
+        self.load()
+        if self.isUpToDate():
+            if verbose:
+                print("Index of %s is up to date." % self.ROOTfile)
+            return self
+
+        stat = os.stat(self.ROOTfile)
+        oldEntries = self.meta["histograms"]
+        meta = {"mtime" : stat.st_mtime, "size" : stat.st_size, "keys" : [], "histograms" : {}, "trees" : {}}
+        arrays = {}
+        nReused = 0
+        with uproot.open(self.ROOTfile) as f:
+            classnames = f.classnames()
+            meta["keys"] = sorted(key for key in classnames.keys() if ("=" not in key))
+            for key in meta["keys"]:
+                classname = classnames[key]
+                if classname in TREECLASSES:
+                    meta["trees"][key] = classname
+                    continue
+                if getHistType(classname) is None:
+                    continue
+                tkey = f.key(key)
+                compressedHash = hashBytes(readPayload(tkey))
+                arrayNames = ["h%i_%i" % (len(meta["histograms"]), i) for i in range(2)]
+
+                # reuse the old entry if the payload did not change
+                old = oldEntries.get(key)
+                if old is not None and old["class"] == classname and old["compressedHash"] == compressedHash:
+                    entryArrays = [self.npz[name] for name in old["arrays"]]
+                    entry = dict(old)
+                    nReused += 1
+                else:
+                    obj = f[key]
+                    histType, entryArrays = getComparisonArrays(obj)
+                    if histType is None:
+                        continue
+                    entry = {
+                        "class" : classname,
+                        "type" : histType,
+                        "shape" : list(entryArrays[0].shape),
+                        "compressedBytes" : tkey.data_compressed_bytes,
+                        "uncompressedBytes" : tkey.data_uncompressed_bytes,
+                        "compressedHash" : compressedHash,
+                        "uncompressedHash" : hashBytes(readPayload(tkey, uncompressed=True)),
+                        "contentHash" : hashBytes(np.concatenate([np.ravel(a) for a in entryArrays])),
+                        "entries" : float(obj.member("fEntries")),
+                        "sum" : float(np.sum(entryArrays[0])),
+                    }
+                entry["arrays"] = arrayNames[:len(entryArrays)]
+                arrays.update(zip(entry["arrays"], entryArrays))
+                meta["histograms"][key] = entry
+
+        # write the new index (to temporary files first, since the old arrays might still be open)
+        self.close()
+        np.savez(self.npzPath + ".tmp.npz", **arrays)
+        os.replace(self.npzPath + ".tmp.npz", self.npzPath)
+        with open(self.jsonPath + ".tmp", "w") as f_:
+            json.dump(meta, f_, indent=1)
+        os.replace(self.jsonPath + ".tmp", self.jsonPath)
+
+        if verbose:
+            print("Indexed %i histograms of %s (%i unchanged entries reused)." % (len(meta["histograms"]), self.ROOTfile, nReused))
+        return self.load()
+
+    def keys(self):
+        """
+        Returns all keys of the ROOT file (like `uproot.open(ROOTfile).keys()`).
+        """
+        return self.meta["keys"]
+
+    def iterkeys(self, folder=None):
+        """
+        Yields the keys of all objects in `folder` and its subfolders (see `iterFolderKeys`).
+        """
+        if folder is None:
+            yield from self.meta["keys"]
+            return
+
+        prefix = folder.strip("/") + "/"
+        if any(key.startswith(prefix) for key in self.meta["keys"]):
+            yield from (key for key in self.meta["keys"] if key.startswith(prefix))
+        else:
+            yield from (key for key in self.meta["keys"] if folder in key)
+
+    def entry(self, key):
+        """
+        Returns the index entry of the histogram under `key` or None if `key` is not an indexed histogram.
+        """
+        return self.meta["histograms"].get(key)
+
+    def classname(self, key):
+        """
+        Returns the class of the histogram or tree under `key` or None if `key` is neither.
+        """
+        entry = self.entry(key)
+        return entry["class"] if entry is not None else self.meta["trees"].get(key)
+
+    def arrays(self, key):
+        """
+        Returns the compared arrays of the histogram under `key` (see `getComparisonArrays`).
+        """
+        return [self.npz[name] for name in self.meta["histograms"][key]["arrays"]]
+
+    def tree(self, key):
+        """
+        Returns the tree under `key`, read from the ROOT file itself (which is opened on first use).
+        """
+        if self.file is None:
+            self.file = openROOTfile(self.ROOTfile)
+        return self.file[key]
+
+    def close(self):
+        if self.npz is not None:
+            self.npz.close()
+            self.npz = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# ------------------------------------------------------------------------------------------
+
+#########################################################################################
+# For usage from command line
+#########################################################################################
+
+import argparse
+parser = argparse.ArgumentParser(description="Build (or update) the sidecar index of a ROOT file which can be used as reference in compareROOT.")
+parser.add_argument("DQMfile", type=str, help="Path to the ROOT DQM file to be indexed")
+parser.add_argument("-o", "--output", default=None, type=str, help="Base path of the index files (default is <DQMfile>.index)")
+def main():
+    print("="*30)
+    print("  Start indexROOTfile()")
+    print("="*30)
+
+    args = parser.parse_args()
+
+    index = ROOTfileIndex(args.DQMfile, indexPath=args.output)
+    print("Index the following ROOT file:")
+    print(" * DQM file:", args.DQMfile)
+    print(" * index files: %s and %s" % (index.jsonPath, index.npzPath))
+    print("")
+
+    # build the index
+    index.update()
+    index.close()
+
+    print("="*30)
+    print("  End indexROOTfile()")
+    print("="*30)
+
+if __name__ == "__main__":
+    main()
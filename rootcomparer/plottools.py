@@ -0,0 +1,83 @@
+# import packages
+import os
+import re
+import multiprocessing
+import numpy as np
+import matplotlib.pyplot as plt
+
+# ------------------------------------------------------------------------------------------
+# plots of the differences between two histograms
+# ------------------------------------------------------------------------------------------
+
+def getPlotName(key):
+    """
+    Returns a file name for the diff plot of the histogram under `key` (the path with all special characters replaced).
+    """
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", key.split(";")[0]).strip("_") + ".png"
+
+
+def plotDiff(key, diff, filename):
+    """
+    Plots the reference and candidate histogram and their difference (candidate - reference) bin by bin
+    and marks the differing bins.
+
+    :param key: path of the histogram (used as title)
+    :param diff: differences of the histogram as returned by `stattools.binDiffs`
+    :param filename: path of the output file
+    """
+    ref = diff["reference"]
+    cand = diff["candidate"]
+    differingBins = np.asarray(diff["differingBins"])
+
+    if ref.ndim == 1:
+        fig, (ax, axDiff) = plt.subplots(2, 1, sharex=True, gridspec_kw={"height_ratios" : [3, 1]}, figsize=(8, 6))
+        bins = np.arange(len(ref) + 1)
+        ax.stairs(ref, bins, label="reference", color="black")
+        ax.stairs(cand, bins, label="candidate", color="tab:red", linestyle="--")
+        ax.legend()
+        ax.set_ylabel("value")
+        axDiff.stairs(cand - ref, bins, color="tab:red")
+        if len(differingBins):
+            axDiff.plot(differingBins[:, 0] + 0.5, (cand - ref)[differingBins[:, 0]], "x", color="black", label="differing bins")
+            axDiff.legend()
+        axDiff.axhline(0, color="grey", linewidth=0.5)
+        axDiff.set_xlabel("bin index")
+        axDiff.set_ylabel("cand. - ref.")
+    else:
+        fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+        # symmetric color scale for the difference
+        limit = np.abs(cand - ref).max() or 1
+        for ax, array, title, kwargs in zip(axes, [ref, cand, cand - ref], ["reference", "candidate", "candidate - reference"],
+                                            [{}, {}, {"cmap" : "RdBu_r", "vmin" : -limit, "vmax" : limit}]):
+            mesh = ax.pcolormesh(array.T, **kwargs)
+            fig.colorbar(mesh, ax=ax)
+            ax.set_title(title)
+            ax.set_xlabel("bin index x")
+            ax.set_ylabel("bin index y")
+        if len(differingBins):
+            axes[2].plot(differingBins[:, 0] + 0.5, differingBins[:, 1] + 0.5, "x", color="black", markersize=3)
+
+    fig.suptitle("%s\n%i differing bins, max. deviation %g (relative %g)" % (key, len(differingBins), diff["maxAbsDeviation"], diff["maxRelDeviation"]), fontsize=9)
+    fig.savefig(filename, dpi=100, bbox_inches="tight")
+    plt.close(fig)
+
+
+def plotDiffs(diffs, directory, jobs=1):
+    """
+    Renders the diff plots of all histograms that were compared bin by bin (see `plotDiff`) into the given directory.
+    With `jobs` larger than 1, the plots are rendered in parallel processes.
+
+    :param diffs: dictionary of the differences per histogram key (see `emptyResults` in `compareROOTfiles`)
+    :param directory: output directory
+    :param jobs: number of parallel processes
+    :return: list of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(key, diff, os.path.join(directory, getPlotName(key))) for key, diff in diffs.items() if "differingBins" in diff]
+    if jobs > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(jobs, len(tasks))) as pool:
+            pool.starmap(plotDiff, tasks)
+    else:
+        for task in tasks:
+            plotDiff(*task)
+    return [task[2] for task in tasks]
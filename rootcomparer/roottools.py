@@ -0,0 +1,145 @@
+# import packages
+import hashlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import uproot
+import numpy as np
+
+# types of compared histograms and their labels in the summary
+HISTTYPES = ["TH1", "TH2", "TProfile"]
+# classes of trees, which are compared chunk by chunk (see `treetools.compareTrees`)
+TREECLASSES = ["TTree", "TNtuple", "TNtupleD"]
+# types of all compared objects
+OBJECTTYPES = HISTTYPES + ["TTree"]
+
+
+def getHistType(classname):
+    """
+    Returns the histogram type ("TH1", "TH2" or "TProfile") of a ROOT class name or None for any other class.
+    """
+    if classname.startswith("TH1"):
+        return "TH1"
+    elif classname.startswith("TH2"):
+        return "TH2"
+    elif classname == "TProfile":
+        return "TProfile"
+    return None
+
+
+def getComparisonArrays(obj):
+    """
+    Returns the histogram type of an object read from a ROOT file and the list of arrays which are compared
+    for this type: the bin contents for TH1 and TH2, the bin contents and errors for TProfiles.
+    For any other object, the type is None and the list is empty.
+    """
+    if isinstance(obj, uproot.behaviors.TH1.TH1):
+        return "TH1", [obj.to_numpy()[0]]
+    elif isinstance(obj, uproot.behaviors.TH2.TH2):
+        return "TH2", [obj.to_numpy()[0]]
+    elif isinstance(obj, uproot.behaviors.TProfile.TProfile):
+        return "TProfile", [obj.values(), obj.errors()]
+    return None, []
+
+
+def readPayload(key, uncompressed=False):
+    """
+    Returns the raw bytes of the object stored under the given TKey (without the key header) as numpy array,
+    without interpreting them. By default, the compressed bytes are returned as they are stored in the file.
+    """
+    if uncompressed:
+        chunk, _ = key.get_uncompressed_chunk_cursor()
+        return chunk.raw_data
+    start = key.data_cursor.index
+    return key.file.chunk(start, start + key.data_compressed_bytes).raw_data
+
+
+def hashBytes(array):
+    """
+    Returns the hex digest of the content hash of the given array (or bytes).
+    """
+    return hashlib.sha1(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def isDirectory(directory, path):
+    """
+    Returns True if `path` is a (sub)directory of the given opened ROOT file or directory.
+    """
+    try:
+        return directory.key(path).fClassName in ("TDirectory", "TDirectoryFile")
+    except KeyError:
+        return False
+
+
+def iterFolderKeys(directory, folder=None):
+    """
+    Lazily yields the paths (relative to the given opened ROOT file or directory) of all objects in `folder` and its
+    subfolders. Only the keys of the requested folder are read, the rest of the file is never traversed.
+    If `folder` is no directory in the file, all keys of the file containing `folder` are yielded instead.
+    """
+    if folder is None:
+        yield from directory.iterkeys(recursive=True)
+        return
+
+    path = folder.strip("/")
+    if isDirectory(directory, path):
+        for key in directory[path].iterkeys(recursive=True):
+            yield path + "/" + key
+    else:
+        for key in directory.iterkeys(recursive=True):
+            if folder in key:
+                yield key
+
+
+class DirectoryCache(MutableMapping):
+    """
+    Object cache for uproot which keeps all directories, such that resolving the path of a key never reads and parses
+    the same directory twice, but at most `limit` other objects (the least recently used ones are dropped first).
+    """
+
+    def __init__(self, limit=0):
+        self.limit = limit
+        self.directories = {}
+        self.objects = OrderedDict()
+
+    def __getitem__(self, where):
+        if where in self.directories:
+            return self.directories[where]
+        out = self.objects[where]
+        self.objects.move_to_end(where)
+        return out
+
+    def __setitem__(self, where, what):
+        if isinstance(what, uproot.reading.ReadOnlyDirectory):
+            self.directories[where] = what
+        elif self.limit > 0:
+            self.objects[where] = what
+            self.objects.move_to_end(where)
+            while len(self.objects) > self.limit:
+                self.objects.popitem(last=False)
+
+    def __delitem__(self, where):
+        if where in self.directories:
+            del self.directories[where]
+        else:
+            del self.objects[where]
+
+    def __iter__(self):
+        yield from self.directories
+        yield from self.objects
+
+    def __len__(self):
+        return len(self.directories) + len(self.objects)
+
+
+def openROOTfile(ROOTfile, objectCache=0, arrayCache=100):
+    """
+    Opens a ROOT file with uproot with capped caches. Each object is usually read only once when comparing files,
+    so caching objects (100 by default in uproot) only keeps decompressed histograms alive. By default, only the
+    directories are cached (see `DirectoryCache`), which are needed again for every key.
+
+    :param ROOTfile: path to the ROOT file
+    :param objectCache: maximum number of objects other than directories kept in uproot's object cache
+    :param arrayCache: maximum size of uproot's array cache in MB (0 disables the cache)
+    """
+    return uproot.open(ROOTfile, object_cache=DirectoryCache(objectCache),
+                       array_cache=("%g MB" % arrayCache) if arrayCache > 0 else None)
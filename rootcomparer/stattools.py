@@ -0,0 +1,173 @@
+# import packages
+import numpy as np
+
+# ------------------------------------------------------------------------------------------
+# vectorized comparison tests on stacks of histograms
+# ------------------------------------------------------------------------------------------
+# All functions take stacks of M same-shaped histograms, i.e. arrays of shape (M, ...), one histogram per row,
+# and evaluate the test for all M pairs of reference and candidate histograms at once.
+
+# available comparison tests
+TESTS = ["allclose", "chi2", "ks", "pull"]
+
+
+def flattenStack(stack):
+    """
+    Reshapes a stack of histograms of shape (M, ...) into shape (M, nBins).
+    """
+    stack = np.asarray(stack, dtype=np.float64)
+    return stack.reshape(len(stack), -1)
+
+
+def allcloseStacked(ref, cand, tolerance=1e-5):
+    """
+    Returns for each pair of histograms whether all bins agree within the absolute `tolerance` (like `np.allclose`).
+    """
+    return np.isclose(flattenStack(ref), flattenStack(cand), atol=tolerance).all(axis=1)
+
+
+def chi2Test(ref, cand, refErr=None, candErr=None):
+    """
+    Returns the p-values of the chi2 test for each pair of histograms.
+
+    Without errors, the histograms are treated as unweighted counts and only their shapes are compared
+    (like ROOT's `TH1::Chi2Test` with option "UU"). With errors (e.g. for profiles), the chi2 is the sum of
+    the squared differences over the squared combined errors in all bins with non-zero errors.
+    """
+    # scipy is only needed for the statistical tests
+    from scipy import stats
+
+    ref = flattenStack(ref)
+    cand = flattenStack(cand)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if refErr is None:
+            nRef = ref.sum(axis=1, keepdims=True)
+            nCand = cand.sum(axis=1, keepdims=True)
+            filled = (ref + cand) > 0
+            terms = (nCand * ref - nRef * cand)**2 / (ref + cand) / (nRef * nCand)
+            ndf = filled.sum(axis=1) - 1
+        else:
+            variance = flattenStack(refErr)**2 + flattenStack(candErr)**2
+            filled = variance > 0
+            terms = (ref - cand)**2 / variance
+            ndf = filled.sum(axis=1)
+        chi2 = np.where(filled, terms, 0).sum(axis=1)
+        pValues = stats.chi2.sf(chi2, np.maximum(ndf, 1))
+
+    pValues = np.where(ndf > 0, pValues, 1.)
+    if refErr is None:
+        # one empty and one filled histogram are incompatible, two empty ones are identical
+        emptyRef = nRef[:, 0] == 0
+        emptyCand = nCand[:, 0] == 0
+        pValues = np.where(emptyRef | emptyCand, np.where(emptyRef & emptyCand, 1., 0.), pValues)
+    return np.nan_to_num(pValues, nan=0.)
+
+
+def ksTest(ref, cand):
+    """
+    Returns the p-values of the Kolmogorov-Smirnov test for each pair of 1D histograms, computed from the maximum distance
+    of the normalized cumulative distributions and the effective number of entries.
+    """
+    # scipy is only needed for the statistical tests
+    from scipy import stats
+
+    ref = flattenStack(ref)
+    cand = flattenStack(cand)
+    nRef = ref.sum(axis=1)
+    nCand = cand.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distance = np.abs(ref.cumsum(axis=1) / nRef[:, np.newaxis] - cand.cumsum(axis=1) / nCand[:, np.newaxis]).max(axis=1)
+        nEffective = nRef * nCand / (nRef + nCand)
+        pValues = stats.kstwobign.sf(distance * np.sqrt(nEffective))
+
+    # one empty and one filled histogram are incompatible, two empty ones are identical
+    emptyRef = nRef == 0
+    emptyCand = nCand == 0
+    pValues = np.where(emptyRef | emptyCand, np.where(emptyRef & emptyCand, 1., 0.), pValues)
+    return np.nan_to_num(pValues, nan=0.)
+
+
+def maxPull(ref, cand, refErr=None, candErr=None):
+    """
+    Returns the maximum absolute bin-wise pull `(ref - cand) / sigma` for each pair of histograms.
+    Without errors, Poisson errors are assumed, i.e. `sigma = sqrt(ref + cand)`.
+    """
+    ref = flattenStack(ref)
+    cand = flattenStack(cand)
+    if refErr is None:
+        variance = np.abs(ref) + np.abs(cand)
+    else:
+        variance = flattenStack(refErr)**2 + flattenStack(candErr)**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pulls = np.where(variance > 0, np.abs(ref - cand) / np.sqrt(variance), np.where(ref == cand, 0, np.inf))
+    return pulls.max(axis=1, initial=0)
+
+
+def runTests(histType, refArrays, candArrays, tests=("allclose",), tolerance=1e-5, pValue=0.01, pullThreshold=5.):
+    """
+    Runs the requested comparison tests on stacks of same-shaped histograms of one type.
+    Returns a boolean array which is True for each pair passing all tests.
+
+    :param histType: type of the histograms ("TH1", "TH2" or "TProfile")
+    :param refArrays: stacks of the compared arrays of the reference histograms (see `getComparisonArrays`)
+    :param candArrays: stacks of the compared arrays of the candidate histograms
+    :param tests: tests to be run, any of "allclose", "chi2", "ks" (only applied to TH1 histograms) and "pull"
+    :param tolerance: absolute tolerance of the "allclose" test
+    :param pValue: minimum p-value for passing the "chi2" and "ks" tests
+    :param pullThreshold: maximum absolute pull in any bin for passing the "pull" test
+    """
+    passed = np.ones(len(refArrays[0]), dtype=bool)
+    # profiles are compared by their mean values and their errors
+    errors = (refArrays[1], candArrays[1]) if histType == "TProfile" else (None, None)
+
+    for test in tests:
+        if test == "allclose":
+            for ref, cand in zip(refArrays, candArrays):
+                passed &= allcloseStacked(ref, cand, tolerance=tolerance)
+        elif test == "chi2":
+            passed &= chi2Test(refArrays[0], candArrays[0], *errors) >= pValue
+        elif test == "ks":
+            # the KS test only makes sense for 1D distributions, not for profiles, and the cumulative distribution
+            # of a TH2 would depend on the arbitrary order of its bins
+            if histType == "TH1":
+                passed &= ksTest(refArrays[0], candArrays[0]) >= pValue
+        elif test == "pull":
+            passed &= maxPull(refArrays[0], candArrays[0], *errors) <= pullThreshold
+        else:
+            raise ValueError("Unknown comparison test %s. Choose from: %s" % (test, ", ".join(TESTS)))
+    return passed
+
+
+def binDiffs(histType, refArrays, candArrays, tolerance=1e-5):
+    """
+    Returns the bin-wise differences for each pair of histograms in stacks of same-shaped histograms of one type.
+    For each pair, a dictionary holds the indices of the bins differing by more than `tolerance` (in any of the compared
+    arrays), the maximum absolute and relative deviation of the (mean) values and the values of both histograms.
+
+    :param histType: type of the histograms ("TH1", "TH2" or "TProfile")
+    :param refArrays: stacks of the compared arrays of the reference histograms (see `getComparisonArrays`)
+    :param candArrays: stacks of the compared arrays of the candidate histograms
+    :param tolerance: absolute tolerance for a bin to be considered different
+    """
+    ref = np.asarray(refArrays[0], dtype=np.float64)
+    cand = np.asarray(candArrays[0], dtype=np.float64)
+    differing = np.zeros(ref.shape, dtype=bool)
+    for refArray, candArray in zip(refArrays, candArrays):
+        differing |= ~np.isclose(refArray, candArray, atol=tolerance)
+
+    absDeviation = np.abs(cand - ref)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relDeviation = np.where(ref != 0, absDeviation / np.abs(ref), np.where(absDeviation > 0, np.inf, 0))
+    binAxes = tuple(range(1, ref.ndim))
+    maxAbsDeviation = absDeviation.max(axis=binAxes, initial=0)
+    maxRelDeviation = relDeviation.max(axis=binAxes, initial=0)
+
+    return [{
+        "type" : histType,
+        "shape" : list(ref.shape[1:]),
+        "differingBins" : np.argwhere(differing[j]),
+        "maxAbsDeviation" : float(maxAbsDeviation[j]),
+        "maxRelDeviation" : float(maxRelDeviation[j]),
+        "reference" : ref[j].copy(),
+        "candidate" : cand[j].copy(),
+    } for j in range(len(ref))]
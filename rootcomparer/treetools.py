@@ -0,0 +1,66 @@
+# import packages
+import uproot
+import awkward as ak
+
+# ------------------------------------------------------------------------------------------
+# chunked comparison of TTrees and TNtuples
+# ------------------------------------------------------------------------------------------
+
+def getLeafBranches(tree):
+    """
+    Returns the full paths of all branches of the tree which hold data (no subbranches) and can be read by uproot.
+    """
+    def isReadableLeaf(branch):
+        return not branch.branches and not isinstance(branch.interpretation, uproot.interpretation.identify.UnknownInterpretation)
+    return tree.keys(recursive=True, full_paths=True, filter_branch=isReadableLeaf)
+
+
+def columnsClose(column1, column2, tolerance=1e-5):
+    """
+    Returns True if two columns (awkward arrays of one branch) agree within the given tolerance (like `np.allclose`).
+    Numerical columns, flat or jagged, are compared with one vectorized call; columns with different structures
+    (e.g. different numbers of elements per entry) differ, all other columns have to be equal.
+    """
+    try:
+        return bool(ak.all(ak.isclose(column1, column2, atol=tolerance, equal_nan=True)))
+    except (ValueError, TypeError):
+        # the structures cannot be broadcast against each other or the content is not numerical
+        return ak.array_equal(column1, column2, equal_nan=True, dtype_exact=False)
+
+
+def compareTrees(tree1, tree2, tolerance=1e-5, stepSize="100 MB", earlyStop=False):
+    """
+    Compares two trees branch by branch. Both trees are read in aligned chunks of the same entry ranges, such that
+    only one chunk per tree is held in memory at a time, and all branches of a chunk are compared column-wise.
+    Returns whether the trees agree and their differences: a dictionary with the sorted list of differing (or missing)
+    branches (`differingBranches`) and, if the numbers of entries differ, both numbers of entries (`entries`).
+
+    :param tree1: first tree (uproot TTree)
+    :param tree2: second tree (uproot TTree)
+    :param tolerance: absolute tolerance for comparing numerical branches
+    :param stepSize: size of the chunks, either a number of entries or a memory size such as "100 MB"
+                     (converted to a number of entries using the first tree)
+    :param earlyStop: if True, stop at the first chunk with differing branches instead of reading the full trees
+    """
+    branches1 = getLeafBranches(tree1)
+    branches2 = getLeafBranches(tree2)
+    differing = set(branches1).symmetric_difference(branches2)
+    branches = [branch for branch in branches1 if branch in branches2]
+
+    if tree1.num_entries != tree2.num_entries:
+        return False, {"differingBranches" : sorted(differing), "entries" : [tree1.num_entries, tree2.num_entries]}
+    if not branches or tree1.num_entries == 0:
+        return not differing, {"differingBranches" : sorted(differing)}
+
+    if isinstance(stepSize, str):
+        stepSize = tree1.num_entries_for(stepSize, branches)
+    stepSize = max(int(stepSize), 1)
+
+    for chunk1, chunk2 in zip(tree1.iterate(branches, step_size=stepSize, library="ak"),
+                              tree2.iterate(branches, step_size=stepSize, library="ak")):
+        for branch in branches:
+            if branch not in differing and not columnsClose(chunk1[branch], chunk2[branch], tolerance=tolerance):
+                differing.add(branch)
+        if differing and earlyStop:
+            break
+    return not differing, {"differingBranches" : sorted(differing)}
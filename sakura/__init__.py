@@ -16,7 +16,10 @@ from sakura.tools.plotting_helpers import setStyle, xlabel, ylabel, cmslabel, sa
 # import helpers
 from sakura.tools.getRatioHist import getRatioHist
 from sakura.tools.getSumHist import getSumHist
+from sakura.tools.getEfficiencyHist import getEfficiencyHist
+from sakura.tools.histIO import saveHists, loadHists
 
 # import Histogram classes
 from sakura.histograms.Hist import Hist
-from sakura.histograms.Hist2D import Hist2D
\ No newline at end of file
+from sakura.histograms.Hist2D import Hist2D
+from sakura.histograms.HistCollection import HistCollection
\ No newline at end of file
@@ -1,4 +1,6 @@
 # dictionary for hist names for an easier handling during plotting
+from functools import lru_cache
+
 EFF = "effic"
 DUP = "duplicatesRate"
 PIL = "pileuprate"
@@ -39,6 +41,8 @@ BIN_DICT = {
     },
 }
 
+# the resolved names are memoized, as the same names are looked up for many histograms
+@lru_cache(maxsize=None)
 def HIST_NAME(count_quantity, bin_quantity):
     # first part of the hist name
     if count_quantity in HIST_DICT.keys():
@@ -2,19 +2,41 @@ import matplotlib.pyplot as plt
 import numpy as np
 from sakura.dictionaries.hist_dictionary import HIST_NAME
 from sakura.tools.plotting_helpers import xlabel, ylabel
+from sakura.tools.lazy_helpers import LazySlot, read_cached
+from sakura.tools.label_helpers import cached_label_index
+from sakura.tools.rebin_helpers import get_rebin_positions, rebin_array
+
+def read_TH1(TH1):
+    # views of the bin edges, values, variances and bin labels of an uproot histogram
+    return TH1.axis().edges(), TH1.values(), TH1.variances(), TH1.axis("x").labels()
+
 
 class Hist:
-    # bin edges of the histogram
-    edges = 0
-    bin_quantity = None
-    bin_labels = None
-    # values of the histogram
-    values = 0
-    count_quantity = None
-    # uncertainties of the counts
-    errors = 0
-    
-    def __init__(self, ROOTbranch=None, count_quantity=None, bin_quantity=None, scale_for_values=None):
+    # compact, array-backed histogram:
+    #  - edges: bin edges of the histogram
+    #  - values: values (counts) of the histogram
+    #  - errors/variances: uncertainties of the counts (only one of them is stored, the other one is derived on demand)
+    #  - bin_quantity, count_quantity: names of the quantities on the x and y axis
+    #  - bin_labels: list of strings if the xticks are labeled, else None
+    # The arrays are views whenever possible (e.g. of the arrays of the uproot histogram), so they are never modified
+    # in place. Operations like `scale` assign new arrays instead.
+    # In lazy mode, only the location of the histogram is recorded and the arrays are read on first use.
+    __slots__ = ("_source", "_edges", "_values", "_errors", "_variances", "_bin_labels", "_label_index", "bin_quantity", "count_quantity")
+    edges = LazySlot("_edges")
+    values = LazySlot("_values")
+    bin_labels = LazySlot("_bin_labels")
+
+    def __init__(self, ROOTbranch=None, count_quantity=None, bin_quantity=None, scale_for_values=None, lazy=False, cache=None):
+        self._source = None
+        self._edges = 0
+        self._values = 0
+        self._errors = 0
+        self._variances = None
+        self._bin_labels = None
+        self._label_index = None
+        self.bin_quantity = bin_quantity
+        self.count_quantity = count_quantity
+
         if ROOTbranch is not None:
             # check if count and bin quantities are given seperately
             #  - if not: take count_quantity as name of the histogram
@@ -24,26 +46,100 @@ class Hist:
             else:
                 hist_name = HIST_NAME(count_quantity, bin_quantity)
 
-            # load the histogram
-            TH1 = ROOTbranch[hist_name]
+            # remember where to load the histogram from (and the scale factor, e.g. 1/N_events)
+            # and load it right away unless in lazy mode
+            self._source = (ROOTbranch, hist_name, scale_for_values, cache)
+            if not lazy:
+                self._load()
 
-            # fill the histogram information
-            self.edges = TH1.axis().edges()
-            self.values = TH1.values()
-            self.errors = TH1.errors()
+    @classmethod
+    def from_arrays(cls, edges, values, errors=None, variances=None, bin_labels=None, count_quantity=None, bin_quantity=None):
+        """
+        Creates a histogram from existing arrays without copying them. Either the errors or the variances of the values
+        can be given; if none of them is given, Poisson uncertainties (variances = values) are assumed.
+        """
+        hist = cls(count_quantity=count_quantity, bin_quantity=bin_quantity)
+        hist.edges = np.asarray(edges)
+        hist.values = np.asarray(values)
+        if errors is not None:
+            hist.errors = errors
+        else:
+            hist.variances = hist.values if variances is None else variances
+        hist.bin_labels = bin_labels
+        return hist
 
-            # remember the bin and count quantities
-            self.bin_quantity = bin_quantity
-            self.count_quantity = count_quantity
-            
-            # bin_label is a list of strings if the xticks are labeled
-            # else, it is None
-            self.bin_labels = TH1.axis("x").labels()
-            
-            # if a scale factor for the values are given (e.g. 1/N_events) apply it to values and errors
-            if scale_for_values is not None:
-                self.values *= scale_for_values
-                self.errors *= scale_for_values
+    @classmethod
+    def from_uproot(cls, TH1, count_quantity=None, bin_quantity=None):
+        """
+        Creates a histogram from an uproot TH1 (or TProfile) without copying its values and variances.
+        """
+        hist = cls(count_quantity=count_quantity, bin_quantity=bin_quantity)
+        hist._edges, hist._values, hist.variances, hist._bin_labels = read_TH1(TH1)
+        return hist
+
+    @property
+    def loaded(self):
+        # False if the histogram was created in lazy mode and was not used yet
+        return self._source is None
+
+    def _load(self):
+        ROOTbranch, hist_name, scale_for_values, cache = self._source
+        self._source = None
+        self._edges, self._values, self._variances, self._bin_labels = read_cached(ROOTbranch, hist_name, read_TH1, cache)
+        self._errors = None
+
+        # if a scale factor for the values are given (e.g. 1/N_events) apply it to values and errors
+        if scale_for_values is not None:
+            self.scale(scale_for_values)
+
+    @property
+    def errors(self):
+        if self._source is not None:
+            self._load()
+        if self._errors is None:
+            self._errors = np.sqrt(self._variances)
+        return self._errors
+
+    @errors.setter
+    def errors(self, errors):
+        if self._source is not None:
+            self._load()
+        self._errors = errors if np.isscalar(errors) else np.asarray(errors)
+        self._variances = None
+
+    @property
+    def variances(self):
+        if self._source is not None:
+            self._load()
+        if self._variances is None:
+            self._variances = np.square(self._errors)
+        return self._variances
+
+    @variances.setter
+    def variances(self, variances):
+        if self._source is not None:
+            self._load()
+        self._variances = variances if np.isscalar(variances) else np.asarray(variances)
+        self._errors = None
+
+    def scale(self, factor):
+        # scale values and uncertainties by a factor (e.g. 1/N_events)
+        # new arrays are assigned, as the old ones might be views of other arrays
+        if self._source is not None:
+            self._load()
+        self._values = self._values * factor
+        if self._variances is not None:
+            self._variances = self._variances * factor**2
+        if self._errors is not None:
+            self._errors = self._errors * abs(factor)
+        return self
+
+    def rebin(self, factor=None, edges=None):
+        # returns a new histogram with either `factor` bins merged or rebinned to new edges (subset of the old ones)
+        # the values are summed, the errors combined in quadrature and the bin labels are dropped
+        positions = get_rebin_positions(self.edges, factor=factor, new_edges=edges)
+        return Hist.from_arrays(self.edges[positions], rebin_array(self.values, positions), variances=rebin_array(self.variances, positions),
+                                count_quantity=self.count_quantity, bin_quantity=self.bin_quantity)
 
     def plot(self, ax=None, **kwargs):
         # if bin_labels is not None, assume the prefered plot type is an x-labeled hist
@@ -79,16 +175,27 @@ class Hist:
         xlabel(self.bin_quantity, ax)
         return handle
 
+    @property
+    def label_index(self):
+        # index of the bin labels (None if the bins are not labeled), built on first use
+        self._label_index = cached_label_index(self._label_index, self.bin_labels)
+        return self._label_index
+
     def get_value_from_label(self, label):
         if self.bin_labels is None:
             return None
         # return the count value given the label that bin
-        index = self.bin_labels.index(label)
-        return self.values[index]
+        return self.values[self.label_index.position(label)]
 
     def get_error_from_label(self, label):
         if self.bin_labels is None:
             return None
         # return the count value given the label that bin
-        index = self.bin_labels.index(label)
-        return self.errors[index]
\ No newline at end of file
+        return self.errors[self.label_index.position(label)]
+
+    def take(self, labels):
+        # return the values and errors of the bins with the given labels (one vectorized gather)
+        if self.bin_labels is None:
+            return None
+        positions = self.label_index.positions(labels)
+        return self.values[positions], self.errors[positions]
@@ -3,44 +3,192 @@ from matplotlib.colors import LogNorm
 import numpy as np
 from sakura.dictionaries.hist_dictionary import HIST_NAME
 from sakura.tools.plotting_helpers import xlabel, ylabel
+from sakura.tools.lazy_helpers import LazySlot, read_cached
+from sakura.tools.label_helpers import cached_label_index
+from sakura.tools.rebin_helpers import get_rebin_positions, rebin_array
+from sakura.histograms.Hist import Hist
+from sakura.histograms.HistCollection import HistStack
+
+def read_TH2(TH2):
+    # views of the bin edges, values, variances and bin labels of an uproot histogram
+    return TH2.axis("x").edges(), TH2.axis("y").edges(), TH2.values(), TH2.variances(), TH2.axis("x").labels(), TH2.axis("y").labels()
+
 
 class Hist2D:
     # bin edges of the histogram
-    edges_x = 0
+    # (bin_labels_x/y are lists of strings if the ticks are labeled, else None)
+    edges_x = LazySlot("_edges_x")
     bin_quantity_x = None
-    bin_labels_x = None
-    edges_y = 0
+    bin_labels_x = LazySlot("_bin_labels")
+    edges_y = LazySlot("_edges_y")
     bin_quantity_y = None
-    bin_labels_y = None
+    bin_labels_y = LazySlot("_bin_labels_y")
     # values of the histogram
-    values = 0
+    values = LazySlot("_values")
     count_quantity = None
     # uncertainties of the counts
-    errors = 0
+    # (only one of errors/variances is stored, the other one is derived on demand)
+    _errors = None
+    _variances = None
+    # bin_label is a list of strings if the xticks are labeled
+    # else, it is None (same as bin_labels_x)
+    bin_labels = LazySlot("_bin_labels")
+    # indices of the bin labels (see label_index_x/y)
+    _label_index_x = None
+    _label_index_y = None
     
-    def __init__(self, ROOTbranch, hist_name, count_quantity=None, bin_quantity_x=None, bin_quantity_y=None, scale_for_values=None):
-        # load the histogram
-        TH2 = ROOTbranch[hist_name]
-
-        # fill the histogram information
-        self.edges_x = TH2.axis("x").edges()
-        self.edges_y = TH2.axis("y").edges()
-        self.values = TH2.values()
-        self.errors = TH2.errors()
-
+    def __init__(self, ROOTbranch, hist_name, count_quantity=None, bin_quantity_x=None, bin_quantity_y=None, scale_for_values=None, lazy=False, cache=None):
         # remember the bin and count quantities
         self.bin_quantity_x = bin_quantity_x
         self.bin_quantity_y = bin_quantity_y
         self.count_quantity = count_quantity
-        
-        # bin_label is a list of strings if the xticks are labeled
-        # else, it is None
-        self.bin_labels = TH2.axis("x").labels()
-        
+
+        # remember where to load the histogram from and load it right away unless in lazy mode
+        # (in lazy mode, the arrays are read on first use)
+        self._source = (ROOTbranch, hist_name, scale_for_values, cache)
+        if not lazy:
+            self._load()
+
+    @classmethod
+    def from_arrays(cls, edges_x, edges_y, values, errors=None, variances=None, bin_labels=None, bin_labels_y=None, count_quantity=None, bin_quantity_x=None, bin_quantity_y=None):
+        # creates a histogram from existing arrays without copying them
+        # either the errors or the variances can be given, else Poisson uncertainties (variances = values) are assumed
+        hist = cls.__new__(cls)
+        hist._source = None
+        hist.edges_x, hist.edges_y = np.asarray(edges_x), np.asarray(edges_y)
+        hist.values = np.asarray(values)
+        if errors is not None:
+            hist.errors = errors
+        else:
+            hist.variances = hist.values if variances is None else variances
+        hist.bin_labels = bin_labels
+        hist.bin_labels_y = bin_labels_y
+        hist.count_quantity = count_quantity
+        hist.bin_quantity_x = bin_quantity_x
+        hist.bin_quantity_y = bin_quantity_y
+        return hist
+
+    @property
+    def loaded(self):
+        # False if the histogram was created in lazy mode and was not used yet
+        return self._source is None
+
+    def _load(self):
+        ROOTbranch, hist_name, scale_for_values, cache = self._source
+        self._source = None
+
+        # fill the histogram information
+        self._edges_x, self._edges_y, self._values, self._variances, self._bin_labels, self._bin_labels_y = read_cached(ROOTbranch, hist_name, read_TH2, cache)
+        self._errors = None
+
         # if a scale factor for the values are given (e.g. 1/N_events) apply it to values and errors
         if scale_for_values is not None:
-            self.values *= scale_for_values
-            self.errors *= scale_for_values
+            self.scale(scale_for_values)
+
+    @property
+    def errors(self):
+        if self._source is not None:
+            self._load()
+        if self._errors is None:
+            self._errors = np.sqrt(self._variances)
+        return self._errors
+
+    @errors.setter
+    def errors(self, errors):
+        if self._source is not None:
+            self._load()
+        self._errors = errors if np.isscalar(errors) else np.asarray(errors)
+        self._variances = None
+
+    @property
+    def variances(self):
+        if self._source is not None:
+            self._load()
+        if self._variances is None:
+            self._variances = np.square(self._errors)
+        return self._variances
+
+    @variances.setter
+    def variances(self, variances):
+        if self._source is not None:
+            self._load()
+        self._variances = variances if np.isscalar(variances) else np.asarray(variances)
+        self._errors = None
+
+    def scale(self, factor):
+        # scale values and uncertainties by a factor (e.g. 1/N_events)
+        # new arrays are assigned, as the old ones might be views of other arrays
+        if self._source is not None:
+            self._load()
+        self._values = self._values * factor
+        if self._variances is not None:
+            self._variances = self._variances * factor**2
+        if self._errors is not None:
+            self._errors = self._errors * abs(factor)
+        return self
+
+    def rebin(self, factor_x=None, factor_y=None, edges_x=None, edges_y=None):
+        # returns a new histogram rebinned per axis by merging `factor` bins or to new edges (subset of the old ones)
+        # the values are summed, the errors combined in quadrature and the bin labels are dropped
+        edges = [self.edges_x, self.edges_y]
+        values = self.values
+        variances = self.variances
+        for axis, (factor, new_edges) in enumerate([(factor_x, edges_x), (factor_y, edges_y)]):
+            if factor is None and new_edges is None:
+                continue
+            positions = get_rebin_positions(edges[axis], factor=factor, new_edges=new_edges)
+            edges[axis] = edges[axis][positions]
+            values = rebin_array(values, positions, axis=axis - 2)
+            variances = rebin_array(variances, positions, axis=axis - 2)
+        return Hist2D.from_arrays(edges[0], edges[1], values, variances=variances, count_quantity=self.count_quantity,
+                                  bin_quantity_x=self.bin_quantity_x, bin_quantity_y=self.bin_quantity_y)
+
+    def _axis_info(self, axis):
+        # edges, bin quantity and bin labels of the given axis (0: x, 1: y)
+        if axis == 0:
+            return self.edges_x, self.bin_quantity_x, self.bin_labels_x
+        if axis == 1:
+            return self.edges_y, self.bin_quantity_y, self.bin_labels_y
+        raise ValueError("axis has to be 0 (x) or 1 (y), got %s" % axis)
+
+    def project(self, axis=0):
+        # returns the projection onto the given axis (0: x, 1: y) as Hist, i.e. the sum over the other axis
+        # (the errors are combined in quadrature)
+        edges, bin_quantity, bin_labels = self._axis_info(axis)
+        return Hist.from_arrays(edges, np.sum(self.values, axis=1 - axis), variances=np.sum(self.variances, axis=1 - axis),
+                                bin_labels=bin_labels, count_quantity=self.count_quantity, bin_quantity=bin_quantity)
+
+    def slices(self, indices, axis=0):
+        # returns the 1D slices at the bins `indices` along `axis` (0: x, 1: y) as HistStack, one row per slice
+        # the values are views of the 2D histogram if the indices are equally spaced (e.g. a range of bins)
+        edges, bin_quantity, bin_labels = self._axis_info(1 - axis)
+        # (no indices give an empty stack with zero rows)
+        indices = np.atleast_1d(indices).astype(int, copy=False)
+        steps = np.diff(indices) if len(indices) > 1 else np.ones(1, dtype=int)
+        if len(indices) > 0 and steps[0] > 0 and np.all(steps == steps[0]):
+            indices = slice(indices[0], indices[-1] + 1, steps[0])
+        values = np.moveaxis(self.values, axis, 0)[indices]
+        variances = np.moveaxis(self.variances, axis, 0)[indices]
+        return HistStack(edges, bin_labels, [(self.count_quantity, bin_quantity)] * len(values), values, variances)
+
+    def profile(self, axis=0, ignore_zero=False):
+        # returns the mean (values) and the standard deviation (errors) of the bin centers of the other axis
+        # for each bin along `axis` (0: x, 1: y) as Hist, weighted with the values of the histogram
+        # if ignore_zero is True, the bins with center 0 on the other axis are ignored
+        edges, bin_quantity, bin_labels = self._axis_info(axis)
+        other_edges = self._axis_info(1 - axis)[0]
+        centers = (other_edges[:-1] + other_edges[1:]) / 2
+        weights = np.moveaxis(self.values, axis, 0)
+        if ignore_zero:
+            mask = centers != 0
+            centers = centers[mask]
+            weights = weights[:, mask]
+        sums = np.sum(weights, axis=1)
+        nonzero = sums != 0
+        means = np.divide(weights @ centers, sums, out=np.full(sums.shape, np.nan), where=nonzero)
+        variances = np.divide(weights @ np.square(centers), sums, out=np.zeros(sums.shape), where=nonzero)
+        np.subtract(variances, np.square(means), out=variances, where=nonzero)
+        return Hist.from_arrays(edges, means, variances=np.maximum(variances, 0), bin_labels=bin_labels, count_quantity=self.count_quantity, bin_quantity=bin_quantity)
 
     def plot(self, ax=None, plot_zeros_special=False, **kwargs):
         self.plot_hist2d(ax, plot_zeros_special=plot_zeros_special, **kwargs)
@@ -66,16 +214,42 @@ class Hist2D:
         ax.yaxis.set_ticks_position('left')
         return cax
 
+    @property
+    def label_index_x(self):
+        # index of the x bin labels (None if the bins are not labeled), built on first use
+        self._label_index_x = cached_label_index(self._label_index_x, self.bin_labels_x)
+        return self._label_index_x
+
+    @property
+    def label_index_y(self):
+        # index of the y bin labels (None if the bins are not labeled), built on first use
+        self._label_index_y = cached_label_index(self._label_index_y, self.bin_labels_y)
+        return self._label_index_y
+
     def get_value_from_label(self, label):
         if self.bin_labels is None:
             return None
         # return the count value given the label that bin
-        index = self.bin_labels.index(label)
-        return self.values[index]
+        return self.values[self.label_index_x.position(label)]
 
     def get_error_from_label(self, label):
         if self.bin_labels is None:
             return None
         # return the count value given the label that bin
-        index = self.bin_labels.index(label)
-        return self.errors[index]
\ No newline at end of file
+        return self.errors[self.label_index_x.position(label)]
+
+    def take(self, labels_x=None, labels_y=None):
+        # return the values and errors of the bins with the given x and/or y labels (one vectorized gather)
+        # with only one of them given, all bins of the other axis are returned
+        # (None if one of the given axes is not labeled, as in Hist.take)
+        if (labels_x is not None and self.bin_labels_x is None) or (labels_y is not None and self.bin_labels_y is None):
+            return None
+        index = [slice(None), slice(None)]
+        if labels_x is not None:
+            index[0] = self.label_index_x.positions(labels_x)
+        if labels_y is not None:
+            index[1] = self.label_index_y.positions(labels_y)
+        if labels_x is not None and labels_y is not None:
+            index = np.ix_(*index)
+        index = tuple(index)
+        return self.values[index], self.errors[index]
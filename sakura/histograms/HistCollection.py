@@ -0,0 +1,203 @@
+import matplotlib.pyplot as plt
+import numpy as np
+from sakura.dictionaries.hist_dictionary import HIST_NAME
+from sakura.dictionaries.label_dictionary import LABEL_DICT
+from sakura.histograms.Hist import Hist
+from sakura.tools.plotting_helpers import xlabel
+from sakura.tools.label_helpers import cached_label_index
+from sakura.tools.rebin_helpers import get_rebin_positions, rebin_array
+
+class HistStack:
+    # histograms with identical binning stored as stacked 2D arrays (one row per histogram)
+    __slots__ = ("edges", "bin_labels", "keys", "values", "variances", "_label_index")
+
+    def __init__(self, edges, bin_labels, keys, values, variances):
+        self.edges = edges
+        self.bin_labels = bin_labels
+        self._label_index = None
+        # (count_quantity, bin_quantity) of the histogram in each row
+        self.keys = keys
+        self.values = values
+        self.variances = variances
+
+    @classmethod
+    def from_hists(cls, hists):
+        # stack a list of Hist objects with the same binning (the binning of the first one is taken)
+        hists = list(hists)
+        return cls(hists[0].edges, hists[0].bin_labels, [(hist.count_quantity, hist.bin_quantity) for hist in hists],
+                   np.stack([hist.values for hist in hists]), np.stack([hist.variances for hist in hists]))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def hist(self, row):
+        # returns the histogram in the given row as Hist (views of the row)
+        count_quantity, bin_quantity = self.keys[row]
+        return Hist.from_arrays(self.edges, self.values[row], variances=self.variances[row], bin_labels=self.bin_labels,
+                                count_quantity=count_quantity, bin_quantity=bin_quantity)
+
+    def rebin(self, factor=None, edges=None):
+        # rebins all histograms of the stack at once (see Hist.rebin)
+        positions = get_rebin_positions(self.edges, factor=factor, new_edges=edges)
+        return HistStack(self.edges[positions], None, self.keys, rebin_array(self.values, positions), rebin_array(self.variances, positions))
+
+    @property
+    def errors(self):
+        return np.sqrt(self.variances)
+
+    @property
+    def label_index(self):
+        # index of the bin labels (None if the bins are not labeled), built on first use
+        self._label_index = cached_label_index(self._label_index, self.bin_labels)
+        return self._label_index
+
+    def take(self, labels):
+        # return the values and errors of the bins with the given labels for all histograms of the stack at once
+        # (arrays with one row per histogram)
+        if self.bin_labels is None:
+            return None
+        positions = self.label_index.positions(labels)
+        return self.values[:, positions], np.sqrt(self.variances[:, positions])
+
+    @property
+    def centers(self):
+        return (self.edges[1:] + self.edges[:-1]) / 2
+
+    @property
+    def widths(self):
+        return self.edges[1:] - self.edges[:-1]
+
+
+class HistCollection:
+    """
+    Collection of all histograms `HIST_NAME(count_quantity, bin_quantity)` of one ROOT branch for the given count and
+    bin quantities (e.g. effic, fakerate, duplicatesRate, pileuprate vs. eta, phi, pt, coll, hit). All histograms are
+    loaded in one pass and the ones with the same binning are stored as stacked 2D arrays (`stacks`), such that
+    arithmetic and plotting run over all histograms of a stack at once.
+    """
+
+    def __init__(self, ROOTbranch, count_quantities, bin_quantities, scale_for_values=None):
+        self.count_quantities = list(count_quantities)
+        self.bin_quantities = list(bin_quantities)
+        # list of HistStack and the position (stack, row) of each histogram
+        self.stacks = []
+        self._index = {}
+
+        # load all histograms and group them by their binning
+        groups = {}
+        for bin_quantity in self.bin_quantities:
+            for count_quantity in self.count_quantities:
+                TH1 = ROOTbranch[HIST_NAME(count_quantity, bin_quantity)]
+                edges = TH1.axis().edges()
+                bin_labels = TH1.axis("x").labels()
+                binning = (edges.tobytes(), None if bin_labels is None else tuple(bin_labels))
+                if binning not in groups:
+                    groups[binning] = (edges, bin_labels, [])
+                groups[binning][2].append(((count_quantity, bin_quantity), TH1.values(), TH1.variances()))
+
+        # stack the histograms with the same binning
+        for edges, bin_labels, entries in groups.values():
+            keys, values, variances = zip(*entries)
+            self._add_stack(HistStack(edges, bin_labels, list(keys), np.stack(values), np.stack(variances)))
+
+        # if a scale factor for the values are given (e.g. 1/N_events) apply it to values and errors
+        if scale_for_values is not None:
+            self.scale(scale_for_values)
+
+    @classmethod
+    def from_stacks(cls, stacks):
+        # creates a collection from existing stacks (e.g. the results of getRatioHist for two collections)
+        collection = cls.__new__(cls)
+        collection.stacks = []
+        collection._index = {}
+        for stack in stacks:
+            collection._add_stack(stack)
+        keys = list(collection._index)
+        collection.count_quantities = list(dict.fromkeys(key[0] for key in keys))
+        collection.bin_quantities = list(dict.fromkeys(key[1] for key in keys))
+        return collection
+
+    def _add_stack(self, stack):
+        for row, key in enumerate(stack.keys):
+            self._index[key] = (stack, row)
+        self.stacks.append(stack)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def keys(self):
+        return self._index.keys()
+
+    def __getitem__(self, key):
+        # returns the histogram of (count_quantity, bin_quantity) as Hist (views of the rows of its stack)
+        stack, row = self._index[key]
+        return stack.hist(row)
+
+    def stack(self, keys):
+        # returns the histograms of the given (count_quantity, bin_quantity) keys as one HistStack, rows in the order of `keys`
+        # (the stack itself if the keys are all rows of one stack in the same order, else the rows are gathered)
+        positions = [self._index[key] for key in keys]
+        stacks = {id(stack) : stack for stack, _ in positions}
+        if len(stacks) == 1:
+            stack = positions[0][0]
+            rows = [row for _, row in positions]
+            if rows == list(range(len(stack))):
+                return stack
+            return HistStack(stack.edges, stack.bin_labels, list(keys), stack.values[rows], stack.variances[rows])
+        edges = positions[0][0].edges
+        if any(not np.array_equal(stack.edges, edges) for stack in stacks.values()):
+            raise ValueError("Cannot stack histograms with different binnings")
+        return HistStack(edges, positions[0][0].bin_labels, list(keys), np.stack([stack.values[row] for stack, row in positions]),
+                         np.stack([stack.variances[row] for stack, row in positions]))
+
+    def scale(self, factor):
+        # scale all histograms at once
+        # (new stacks are assigned, as other collections, e.g. the one a rebinned collection was made from,
+        # might share the old stacks and Hist objects might hold views of their arrays)
+        stacks = self.stacks
+        self.stacks = []
+        self._index = {}
+        for stack in stacks:
+            self._add_stack(HistStack(stack.edges, stack.bin_labels, stack.keys, stack.values * factor, stack.variances * factor**2))
+        return self
+
+    def rebin(self, factor=None, edges=None, bin_quantity=None):
+        # returns a new collection with all histograms (or the ones vs. `bin_quantity`) rebinned (see Hist.rebin)
+        stacks = []
+        for stack in self.stacks:
+            if bin_quantity is None or all(key[1] == bin_quantity for key in stack.keys):
+                stack = stack.rebin(factor=factor, edges=edges)
+            stacks.append(stack)
+        return HistCollection.from_stacks(stacks)
+
+    def plot(self, bin_quantity, count_quantities=None, ax=None, **kwargs):
+        # plot the histograms of all (or the given) count quantities vs. one bin quantity as errorbar hists
+        if ax is None:
+            ax = plt.gca()
+        if count_quantities is None:
+            count_quantities = self.count_quantities
+        handles = []
+        for stack in self.stacks:
+            rows = [row for row, key in enumerate(stack.keys) if key[1] == bin_quantity and key[0] in count_quantities]
+            if not rows:
+                continue
+            if stack.bin_labels is not None:
+                x = np.arange(len(stack.bin_labels))
+                xerr = 0.5
+                ax.set_xticks(x, labels=stack.bin_labels, rotation=30, ha='right')
+            else:
+                x = stack.centers
+                xerr = stack.widths / 2
+            errors = stack.errors[rows]
+            for row, yerr in zip(rows, errors):
+                count_quantity = stack.keys[row][0]
+                handles.append(ax.errorbar(x, stack.values[row], yerr=yerr, xerr=xerr, linestyle="",
+                                           label=LABEL_DICT.get(count_quantity, count_quantity), **kwargs))
+        xlabel(bin_quantity, ax)
+        return handles
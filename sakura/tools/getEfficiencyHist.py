@@ -0,0 +1,32 @@
+from sakura.histograms.HistCollection import HistStack
+from sakura.tools.stack_helpers import like_input, pair_stacks
+import numpy as np
+
+def getEfficiencyHist(passHist, totalHist):
+    """
+    Calculates the efficiency Histogram pass / total for two given histograms, where the passing entries are a subset
+    of the total ones. The error is the binomial error sqrt(eff * (1 - eff) / total), generalized to weighted
+    histograms as for TH1::Divide with option "B" in ROOT.
+
+    Both arguments can also be stacks of histograms (a list of Hist with the same binning, a HistStack or a
+    HistCollection), then all efficiencies are computed at once. A single total histogram is used for all passing ones.
+    Bins without entries in the total histogram get an efficiency of NaN and an error of 0.
+    """
+    return like_input(passHist, [getEfficiencyStack(passed, total) for passed, total in pair_stacks(passHist, totalHist)])
+
+
+def getEfficiencyStack(passed, total):
+    # efficiency e = p/t with the variance ((1 - 2e) var_p + e^2 var_t) / t^2 (only evaluated in bins with t != 0),
+    # which is e (1 - e) / t for unweighted histograms
+    shape = np.broadcast_shapes(passed.values.shape, total.values.shape)
+    nonzero = np.broadcast_to(total.values != 0, shape)
+    values = np.divide(passed.values, total.values, out=np.full(shape, np.nan), where=nonzero)
+    variances = np.multiply(values, values, out=np.zeros(shape), where=nonzero)
+    np.multiply(variances, total.variances, out=variances, where=nonzero)
+    weights = np.multiply(values, -2, out=np.zeros(shape), where=nonzero)
+    np.add(weights, 1, out=weights, where=nonzero)
+    np.multiply(weights, passed.variances, out=weights, where=nonzero)
+    np.add(variances, weights, out=variances, where=nonzero)
+    np.divide(variances, np.square(total.values), out=variances, where=nonzero)
+    np.maximum(variances, 0, out=variances)
+    return HistStack(passed.edges, passed.bin_labels, passed.keys, values, variances)
@@ -1,22 +1,38 @@
-from sakura.histograms.Hist import Hist
+from sakura.histograms.HistCollection import HistStack
+from sakura.tools.stack_helpers import as_stacks, like_input, pair_stacks
 import numpy as np
 
 def getRatioHist(numHist, denomHist = None):
     """
     Calculates the ratio Histogram for two given histograms. The error is calculated via error propagation.
-    Note, this does not yield the correct error if an efficiency is wanted!
+    Note, this does not yield the correct error if an efficiency is wanted! (see getEfficiencyHist)
 
     If only one histogram is given it computes the ratio with itself.
+
+    Both arguments can also be stacks of histograms (a list of Hist with the same binning, a HistStack or a
+    HistCollection), then all ratios are computed at once. A single denominator histogram is used for all numerators.
+    Bins with a zero denominator get a ratio of NaN and an error of 0.
     """
-    ratioHist = Hist()
-    ratioHist.edges = numHist.edges
-    
     if denomHist is None:
-        ratioHist.values = np.ones_like(numHist.values)
-        ratioHist.errors = np.where(numHist.values == 0, 0, numHist.errors / numHist.values)
-    else:
-        denomIsZero = denomHist.values == 0
-        ratioHist.values = np.where(denomIsZero, np.nan, numHist.values / denomHist.values)
-        ratioHist.errors = np.where(denomIsZero, 0, np.abs(numHist.values / denomHist.values) * np.sqrt((numHist.errors/numHist.values)**2 + (denomHist.errors/denomHist.values)**2))
+        return like_input(numHist, [getSelfRatioStack(stack) for stack in as_stacks(numHist)])
+    return like_input(numHist, [getRatioStack(num, denom) for num, denom in pair_stacks(numHist, denomHist)])
+
+
+def getSelfRatioStack(stack):
+    # ratio of the histograms with themselves: ones with the relative errors
+    nonzero = stack.values != 0
+    values = np.ones(stack.values.shape)
+    variances = np.divide(stack.variances, np.square(stack.values), out=np.zeros(stack.values.shape), where=nonzero)
+    return HistStack(stack.edges, stack.bin_labels, stack.keys, values, variances)
+
 
-    return ratioHist
\ No newline at end of file
+def getRatioStack(num, denom):
+    # ratio r = n/d with the variance (var_n + r^2 var_d) / d^2 (only evaluated in bins with d != 0)
+    shape = np.broadcast_shapes(num.values.shape, denom.values.shape)
+    nonzero = np.broadcast_to(denom.values != 0, shape)
+    values = np.divide(num.values, denom.values, out=np.full(shape, np.nan), where=nonzero)
+    variances = np.multiply(values, values, out=np.zeros(shape), where=nonzero)
+    np.multiply(variances, denom.variances, out=variances, where=nonzero)
+    np.add(variances, num.variances, out=variances, where=nonzero)
+    np.divide(variances, np.square(denom.values), out=variances, where=nonzero)
+    return HistStack(num.edges, num.bin_labels, num.keys, values, variances)
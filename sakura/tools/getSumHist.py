@@ -1,15 +1,22 @@
-from sakura.histograms.Hist import Hist
+from sakura.histograms.HistCollection import HistStack
+from sakura.tools.stack_helpers import like_input, pair_stacks
 import numpy as np
 
 def getSumHist(Hist1, Hist2):
     """
     Calculates the sum Histogram for two given histograms. The error is calculated via error propagation.
     Note, this does not yield the correct error if an efficiency is wanted!
+
+    Both arguments can also be stacks of histograms (a list of Hist with the same binning, a HistStack or a
+    HistCollection), then all sums are computed at once. A single histogram as second argument is added to all
+    histograms of the first one.
     """
-    sumHist = Hist()
-    sumHist.edges = Hist1.edges
+    return like_input(Hist1, [getSumStack(stack1, stack2) for stack1, stack2 in pair_stacks(Hist1, Hist2)])
 
-    sumHist.values = Hist1.values + Hist2.values
-    sumHist.errors = np.sqrt((Hist1.errors)**2 + (Hist2.errors)**2)
 
-    return sumHist
\ No newline at end of file
+def getSumStack(stack1, stack2):
+    # sum of the values and the variances
+    shape = np.broadcast_shapes(stack1.values.shape, stack2.values.shape)
+    values = np.add(stack1.values, stack2.values, out=np.empty(shape))
+    variances = np.add(stack1.variances, stack2.variances, out=np.empty(shape))
+    return HistStack(stack1.edges, stack1.bin_labels, stack1.keys, values, variances)
@@ -0,0 +1,109 @@
+# saving and loading of sakura histograms to a compact, memory-mappable binary format
+import os
+import json
+import numpy as np
+from sakura.histograms.Hist import Hist
+from sakura.histograms.Hist2D import Hist2D
+from sakura.histograms.HistCollection import HistStack, HistCollection
+
+# version of the file format
+FORMAT_VERSION = 2
+
+
+def getHistFilePaths(path):
+    """Returns the paths of the two files a histogram file consists of: `<path>.json` (metadata such as labels and
+    quantities) and `<path>.npy` (all arrays concatenated in one flat float64 array).
+    """
+    for extension in (".json", ".npy"):
+        if path.endswith(extension):
+            path = path[:-len(extension)]
+    return path + ".json", path + ".npy"
+
+
+def saveHists(hists, path):
+    """Saves histograms with their edges, values, uncertainties, labels and quantities to a compact binary format,
+    which can be loaded again without copying the arrays (see `loadHists`). Arrays shared by several histograms
+    (e.g. the edges) are stored only once.
+
+    Args:
+        hists (Hist, Hist2D, HistStack, HistCollection or dict): Histograms to be saved. A dictionary can map names to any of these types.
+        path (string): Base path of the output files (see `getHistFilePaths`).
+    """
+    arrays = []
+    offsets = {}
+    size = [0]
+
+    def ref(array):
+        # store each array once and refer to it by its offset and shape in the flat data array
+        # (the array itself is kept in `offsets`, such that its id cannot be reused while saving)
+        if id(array) not in offsets:
+            array_ = np.asarray(array, dtype=np.float64)
+            offsets[id(array)] = ([size[0], list(array_.shape)], array)
+            arrays.append(array_.ravel())
+            size[0] += array_.size
+        return offsets[id(array)][0]
+
+    def node(obj):
+        if isinstance(obj, Hist):
+            return {"type" : "Hist", "edges" : ref(obj.edges), "values" : ref(obj.values), "variances" : ref(obj.variances),
+                    "bin_labels" : obj.bin_labels, "count_quantity" : obj.count_quantity, "bin_quantity" : obj.bin_quantity}
+        if isinstance(obj, Hist2D):
+            return {"type" : "Hist2D", "edges_x" : ref(obj.edges_x), "edges_y" : ref(obj.edges_y), "values" : ref(obj.values),
+                    "variances" : ref(obj.variances), "bin_labels" : obj.bin_labels_x, "bin_labels_y" : obj.bin_labels_y,
+                    "count_quantity" : obj.count_quantity, "bin_quantity_x" : obj.bin_quantity_x, "bin_quantity_y" : obj.bin_quantity_y}
+        if isinstance(obj, HistStack):
+            return {"type" : "HistStack", "edges" : ref(obj.edges), "values" : ref(obj.values), "variances" : ref(obj.variances),
+                    "bin_labels" : obj.bin_labels, "keys" : [list(key) for key in obj.keys]}
+        if isinstance(obj, HistCollection):
+            return {"type" : "HistCollection", "stacks" : [node(stack) for stack in obj.stacks]}
+        if isinstance(obj, dict):
+            return {"type" : "dict", "items" : {str(name) : node(value) for name, value in obj.items()}}
+        raise TypeError("Cannot save objects of type %s" % type(obj).__name__)
+
+    meta = {"version" : FORMAT_VERSION, "content" : node(hists)}
+    jsonPath, npyPath = getHistFilePaths(path)
+    directory = os.path.dirname(jsonPath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.save(npyPath, np.concatenate(arrays) if arrays else np.zeros(0))
+    with open(jsonPath, "w") as f_:
+        json.dump(meta, f_)
+
+
+def loadHists(path, mmap=True):
+    """Loads histograms saved with `saveHists`. By default, the data file is memory-mapped, such that all arrays are
+    read-only views of the file and only the parts which are actually used are read from disk.
+
+    Args:
+        path (string): Base path of the files (see `getHistFilePaths`).
+        mmap (bool, optional): If False, the data is read into memory at once. Defaults to True.
+    """
+    jsonPath, npyPath = getHistFilePaths(path)
+    with open(jsonPath, "r") as f_:
+        meta = json.load(f_)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported version %s of the histogram file %s" % (meta.get("version"), jsonPath))
+    data = np.load(npyPath, mmap_mode="r" if mmap else None)
+
+    def array(ref):
+        offset, shape = ref
+        return data[offset:offset + int(np.prod(shape))].reshape(shape)
+
+    def obj(node):
+        if node["type"] == "Hist":
+            return Hist.from_arrays(array(node["edges"]), array(node["values"]), variances=array(node["variances"]),
+                                    bin_labels=node["bin_labels"], count_quantity=node["count_quantity"], bin_quantity=node["bin_quantity"])
+        if node["type"] == "Hist2D":
+            return Hist2D.from_arrays(array(node["edges_x"]), array(node["edges_y"]), array(node["values"]), variances=array(node["variances"]),
+                                      bin_labels=node["bin_labels"], bin_labels_y=node["bin_labels_y"], count_quantity=node["count_quantity"],
+                                      bin_quantity_x=node["bin_quantity_x"], bin_quantity_y=node["bin_quantity_y"])
+        if node["type"] == "HistStack":
+            return HistStack(array(node["edges"]), node["bin_labels"], [tuple(key) for key in node["keys"]],
+                             array(node["values"]), array(node["variances"]))
+        if node["type"] == "HistCollection":
+            return HistCollection.from_stacks([obj(stack) for stack in node["stacks"]])
+        if node["type"] == "dict":
+            return {name : obj(value) for name, value in node["items"].items()}
+        raise ValueError("Unknown type %s in the histogram file %s" % (node["type"], jsonPath))
+
+    return obj(meta["content"])
@@ -0,0 +1,53 @@
+# index of the bin labels of a histogram axis for fast lookups of many labels
+import numpy as np
+
+
+class LabelIndex:
+    """Maps the bin labels of an axis to the bin indices. Single labels are looked up in a dictionary, many labels at
+    once with one vectorized `np.searchsorted` in the sorted labels (see `positions`).
+    """
+    __slots__ = ("labels", "index", "_sorted", "_order")
+
+    def __init__(self, labels):
+        self.labels = labels
+        # the first bin is taken for repeated labels (as with list.index)
+        self.index = {label : i for i, label in reversed(list(enumerate(labels)))}
+        array = np.asarray(labels)
+        self._order = np.argsort(array, kind="stable")
+        self._sorted = array[self._order]
+
+    def position(self, label):
+        """Returns the bin index of the given label.
+        """
+        try:
+            return self.index[label]
+        except KeyError:
+            raise ValueError("%r is not a bin label" % (label,)) from None
+
+    def positions(self, labels):
+        """Returns the bin indices of all given labels as array.
+
+        Args:
+            labels (list): Labels to look up.
+        """
+        labels = np.asarray(labels)
+        if len(self._sorted) == 0:
+            # no bin labels: only an empty list of labels can be looked up
+            if labels.size:
+                raise ValueError("Not bin labels: %s" % ", ".join(str(label) for label in labels.ravel()))
+            return np.zeros(labels.shape, dtype=int)
+        found = np.minimum(np.searchsorted(self._sorted, labels), len(self._sorted) - 1)
+        missing = self._sorted[found] != labels
+        if np.any(missing):
+            raise ValueError("Not bin labels: %s" % ", ".join(str(label) for label in labels[missing]))
+        return self._order[found]
+
+
+def cached_label_index(cached, labels):
+    """Returns the LabelIndex of `labels` (None if the axis has no labels), reusing `cached` if it was built for the same list of labels.
+    """
+    if labels is None:
+        return None
+    if cached is not None and cached.labels is labels:
+        return cached
+    return LabelIndex(labels)
@@ -0,0 +1,40 @@
+# helpers for histograms which read their arrays from the ROOT file only on first use
+
+
+class LazySlot:
+    """Attribute of a histogram which is stored in the slot `slot`. If the histogram was created in lazy mode, its
+    arrays are read on the first access (or assignment) of any such attribute (see `_load` of the histogram classes).
+    """
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj._source is not None:
+            obj._load()
+        return getattr(obj, self.slot)
+
+    def __set__(self, obj, value):
+        if obj._source is not None:
+            obj._load()
+        setattr(obj, self.slot, value)
+
+
+def read_cached(ROOTbranch, hist_name, read, cache=None):
+    """Reads a histogram from the ROOT branch and returns `read(histogram)`. If a (shared) cache is given, e.g. a
+    dictionary used for all histograms of a notebook, the result is taken from it if the same histogram was read before.
+
+    Args:
+        ROOTbranch: Directory of the ROOT file (as opened with uproot).
+        hist_name (string): Name of the histogram in the directory.
+        read (function): Function returning the needed arrays of the uproot histogram.
+        cache (MutableMapping, optional): Shared cache of the read arrays. Defaults to None.
+    """
+    if cache is None:
+        return read(ROOTbranch[hist_name])
+    key = (getattr(ROOTbranch, "file_path", id(ROOTbranch)), getattr(ROOTbranch, "object_path", None), hist_name, read.__qualname__)
+    if key not in cache:
+        cache[key] = read(ROOTbranch[hist_name])
+    return cache[key]
@@ -0,0 +1,45 @@
+# vectorized rebinning of histograms (and stacks of histograms)
+import numpy as np
+
+
+def get_rebin_positions(edges, factor=None, new_edges=None):
+    """Returns the positions of the new bin edges in the old edges (as indices), either when merging `factor` bins
+    or when rebinning to new edges which are a subset of the old ones. When merging by a factor, the last bin
+    contains the remaining bins if the number of bins is not divisible by the factor.
+
+    Args:
+        edges (array): Old bin edges.
+        factor (int, optional): Number of merged bins. Defaults to None.
+        new_edges (array, optional): New bin edges (subset of the old ones). Defaults to None.
+    """
+    edges = np.asarray(edges)
+    nBins = len(edges) - 1
+    if (factor is None) == (new_edges is None):
+        raise ValueError("Give either a factor or new edges for rebinning")
+    if factor is not None:
+        if int(factor) != factor or factor < 1:
+            raise ValueError("The rebinning factor has to be a positive integer, got %s" % factor)
+        return np.append(np.arange(0, nBins, int(factor)), nBins)
+
+    # closest old edge for each new edge
+    new_edges = np.asarray(new_edges, dtype=float)
+    positions = np.argmin(np.abs(edges[:, None] - new_edges[None, :]), axis=0)
+    if len(new_edges) < 2 or not np.allclose(edges[positions], new_edges) or np.any(np.diff(positions) <= 0):
+        raise ValueError("The new edges have to be an increasing subset of the old edges")
+    return positions
+
+
+def rebin_array(array, positions, axis=-1):
+    """Sums the bins of an array (e.g. values or variances) between the given positions (see `get_rebin_positions`)
+    along one axis with `np.add.reduceat`. Bins outside of the new edges are dropped.
+
+    Args:
+        array (array): Array with the bins along `axis` (any number of other axes, e.g. stacks of histograms).
+        positions (array): Positions of the new bin edges in the old edges.
+        axis (int, optional): Axis of the bins. Defaults to -1.
+    """
+    # view of the bins within the new edges
+    array = np.asarray(array)
+    inner = [slice(None)] * array.ndim
+    inner[axis] = slice(positions[0], positions[-1])
+    return np.add.reduceat(array[tuple(inner)], positions[:-1] - positions[0], axis=axis)
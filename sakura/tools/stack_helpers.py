@@ -0,0 +1,47 @@
+# helpers for functions that work on single histograms as well as on stacks of histograms
+from sakura.histograms.Hist import Hist
+from sakura.histograms.HistCollection import HistStack, HistCollection
+
+
+def as_stacks(hists):
+    """Returns the given histograms as list of HistStack.
+
+    Args:
+        hists (Hist, list of Hist, HistStack or HistCollection): Histograms. A list of Hist objects has to share the same binning.
+    """
+    if isinstance(hists, HistCollection):
+        return hists.stacks
+    if isinstance(hists, HistStack):
+        return [hists]
+    if isinstance(hists, Hist):
+        return [HistStack.from_hists([hists])]
+    return [HistStack.from_hists(hists)]
+
+
+def like_input(hists, stacks):
+    """Converts the resulting stacks back to the type of the input histograms `hists` (see `as_stacks`).
+    """
+    if isinstance(hists, HistCollection):
+        return HistCollection.from_stacks(stacks)
+    if isinstance(hists, HistStack):
+        return stacks[0]
+    if isinstance(hists, Hist):
+        return stacks[0].hist(0)
+    return [stacks[0].hist(row) for row in range(len(stacks[0]))]
+
+
+def pair_stacks(hists1, hists2):
+    """Returns the pairs of stacks of two sets of histograms. A single stack (e.g. a common denominator) is paired with all stacks of the other set.
+    The rows of two HistCollection objects are paired by their (count_quantity, bin_quantity) key, all other sets by position.
+    """
+    if isinstance(hists1, HistCollection) and isinstance(hists2, HistCollection):
+        if set(hists1.keys()) != set(hists2.keys()):
+            raise ValueError("Cannot pair collections with different histograms: %s" % sorted(set(hists1.keys()) ^ set(hists2.keys()), key=str))
+        return [(stack, hists2.stack(stack.keys)) for stack in hists1.stacks]
+    stacks1 = as_stacks(hists1)
+    stacks2 = as_stacks(hists2)
+    if len(stacks2) == 1:
+        stacks2 = stacks2 * len(stacks1)
+    if len(stacks1) != len(stacks2):
+        raise ValueError("Cannot pair %i stacks of histograms with %i stacks" % (len(stacks1), len(stacks2)))
+    return list(zip(stacks1, stacks2))
@@ -26,7 +26,9 @@ setup(name="sakura",
                     ['makeCutPlots = simplotter.makeCutPlots:main',
                      'makeGeneralPlots = simplotter.makeGeneralPlots:main',
                      'makeGeneralComparisonPlots = simplotter.makeGeneralComparisonPlots:main',
-                     'compareROOT = rootcomparer.compareROOTfiles:main']},
+                     'compareROOT = rootcomparer.compareROOTfiles:main',
+                     'compareROOTbatch = rootcomparer.compareROOTbatch:main',
+                     'indexROOT = rootcomparer.indexROOTfile:main']},
       packages=find_packages(),
       zip_safe=False,
       classifiers=[
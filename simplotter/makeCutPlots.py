@@ -6,9 +6,12 @@ from pathlib import Path
 import multiprocessing
 import functools
 from simplotter.dataconfig.layerPairs import simplePixelLayerPairs
-from simplotter.plotterfunctions.plotCutParameter import plotCutParameter
+from simplotter.plotterfunctions.plotCutParameter import plotCutParameter, getCutParameterBranches, getCutParameterEfficiencyPairs, estimateCutParameterCost
 from simplotter.utils.CellCut import CellCut
 from simplotter.utils.plotttools import setStyle
+from simplotter.utils.PlotManifest import PlotManifest
+from simplotter.utils import intervaltools
+from simplotter.utils.pooltools import getPlotTasks, initWorker, runPlotTask, sortTasksByCost, getNumberOfThreads, parseNumberOfThreads
 from simplotter.utils.utils import valToLatexStr
 
 CUTlist_vectors = ["caDCACuts", "caThetaCuts", "phiCuts", "minInner", "maxInner", "minOuter", "maxOuter", 
@@ -66,56 +69,66 @@ def getCutParameters(cutFile="cutParameters/currentCuts.yml"):
 
 
 # define function that performs the plotting of all cuts
-def makeCutPlots(dqmFile, cutFile="cutParameters/currentCuts.yml", cut=None, nThreads=20, **kwargs):
+def makeCutPlots(dqmFile, cutFile="cutParameters/currentCuts.yml", cut=None, nThreads="auto", prefetch=False, incremental=False, **kwargs):
 
+    # the manifest keeps the input hashes (for the incremental mode) and the durations of the plots
+    manifest = PlotManifest(kwargs.get("directory", "plots"))
+    # in incremental mode, the histograms are needed in the main process to hash them
+    prefetch = prefetch or incremental
 
     # open the DQM file
-    rootFile = uproot.open(dqmFile)["DQMData/Run 1/Tracking/Run summary/TrackingMCTruth"]
+    dqmFolder = "DQMData/Run 1/Tracking/Run summary/TrackingMCTruth"
+    rootFile = uproot.open(dqmFile)[dqmFolder]
 
     # get cut parameters and values
     GlobalCellCuts, LayerCellCuts = getCutParameters(cutFile)
 
-    print("setup multiprocessing...")
-    pool = multiprocessing.Pool(nThreads)
-    producePlot = functools.partial(plotCutParameter, rootFile, **kwargs)
-
     # if no cut is given, plot all of them
     if cut is None:
-
-        print("make global cell cut plots...")
-        pool.map(producePlot, GlobalCellCuts.values())
-        # the above is the parallelized version of:
-        # for cut in GlobalCellCuts.keys():
-        #     cellCut = GlobalCellCuts[cut]
-        #     plotCutParameter(rootFile, cellCut, **kwargs)
-
-        print("make layer-dependent cell cut plots")
-        for cut in LayerCellCuts.keys():
-            print("  for %s..." % cut)
-            pool.map(producePlot, LayerCellCuts[cut])
-            # the above is the parallelized version of:
-            # for cellCut in LayerCellCuts[cut]:
-            #     plotCutParameter(rootFile, cellCut, **kwargs)
-        
-        
+        cellCuts = list(GlobalCellCuts.values()) + [cellCut for cut in LayerCellCuts.keys() for cellCut in LayerCellCuts[cut]]
     
     # otherwise just plot the given cut parameter
+    elif cut in GlobalCellCuts.keys():
+        cellCuts = [GlobalCellCuts[cut]]
+    elif cut in LayerCellCuts.keys():
+        cellCuts = LayerCellCuts[cut]
     else:
-        if cut in GlobalCellCuts.keys():
-            cellCut = GlobalCellCuts[cut]
-            plotCutParameter(rootFile, cellCut, **kwargs)
-        
-        elif cut in LayerCellCuts.keys():
-            pool.map(producePlot, LayerCellCuts[cut])
-            # the above is the parallelized version of:
-            # for cellCut in LayerCellCuts[cut]:
-            #     plotCutParameter(rootFile, cellCut, **kwargs)
-        
-        else:
-            raise ValueError('Invalid parameter `cut`! Specify the cut parameter you want to plot from the list below or `None` to plot all of them.'
-                             +'\nList of valid `cut` parameters: ' + str(list(GlobalCellCuts.keys()) + list(LayerCellCuts.keys())))
-    
+        raise ValueError('Invalid parameter `cut`! Specify the cut parameter you want to plot from the list below or `None` to plot all of them.'
+                         +'\nList of valid `cut` parameters: ' + str(list(GlobalCellCuts.keys()) + list(LayerCellCuts.keys())))
+
+    # put all plots in one queue, the most expensive ones first
+    tasks = getPlotTasks(rootFile, cellCuts, prefetch=prefetch, manifest=manifest, incremental=incremental,
+                         getBranches=functools.partial(getCutParameterBranches, **kwargs), **kwargs)
+    tasks = sortTasksByCost(tasks, functools.partial(estimateCutParameterCost, rootFile=rootFile, **kwargs), durations=manifest.durations)
+
+    # with prefetched histograms, compute the efficiency and fake rate uncertainties of all plots (e.g. all layer pairs
+    # of a cut) with one vectorized call per binning and hand them to the workers in their interval cache
+    intervals = None
+    if prefetch:
+        pairs = [pair for hists, cellCut in tasks for pair in getCutParameterEfficiencyPairs(cellCut, hists, **kwargs)]
+        intervaltools.maxCacheSize = max(intervaltools.maxCacheSize, len(pairs))
+        intervaltools.batchEfficiencyUncertainties([num for num, _ in pairs], [denom for _, denom in pairs])
+        intervals = dict(intervaltools.intervalCache)
+
+    print("setup multiprocessing...")
+    # unless the histograms are prefetched, each worker opens the DQM file once on its own
+    pool = multiprocessing.Pool(getNumberOfThreads(nThreads), initializer=initWorker,
+                                initargs=(None, None, intervals) if prefetch else (dqmFile, dqmFolder))
+    producePlot = functools.partial(runPlotTask, plotCutParameter, **kwargs)
+
+    print("make %i cell cut plots..." % len(tasks))
+    for key, duration, outputs in pool.imap_unordered(producePlot, tasks):
+        manifest.recordDuration(key, duration)
+        manifest.recordOutputs(key, outputs)
+    # the above is the parallelized version of:
+    # for cellCut in cellCuts:
+    #     plotCutParameter(rootFile, cellCut, **kwargs)
+
     pool.close()
+    pool.join()
+
+    # remember the inputs and durations of the produced plots for the next run
+    manifest.save()
 
 
 
@@ -141,7 +154,9 @@ parser.add_argument("--fullXRange", default=False, action='store_true', help="fl
 parser.add_argument("--onlySim", default=False, action='store_true', help="flag to plot only the SimDoublets distribtuions (no RecoDoublets)")
 parser.add_argument("--onlyReco", default=False, action='store_true', help="flag to plot only the RecoDoublets distribtuions (no SimDoublets)")
 parser.add_argument("--pdf", default=False, action='store_true', help="flag to save the plots in pdf instead of png")
-parser.add_argument("-t", "--nThreads", default=20, type=int,  help="Number of threads used for parallel plotting")
+parser.add_argument("-t", "--nThreads", default="auto", type=parseNumberOfThreads, help="Number of threads used for parallel plotting (default `auto` uses all available cores)")
+parser.add_argument("--prefetch", default=False, action='store_true', help="flag to read all histograms once in the main process and only pass their content to the parallel workers")
+parser.add_argument("--incremental", default=False, action='store_true', help="flag to only redo the plots whose input histograms or configuration changed since the last run in the same directory")
 
 def main():
     print("="*30)
@@ -244,7 +259,12 @@ def main():
         limitXRange = True
         print(" * limit the x range of the plots to the non-empty bins")
 
-    print(" * plot with %i threads in parallel" % args.nThreads)
+    nThreads = getNumberOfThreads(args.nThreads)
+    print(" * plot with %i threads in parallel" % nThreads)
+    if args.prefetch:
+        print(" * prefetch all histograms before plotting")
+    if args.incremental:
+        print(" * only redo plots with changed inputs (incremental mode)")
     print(" * output directory for plots:", args.directory)
 
     print("\n")        
@@ -253,7 +273,7 @@ def main():
                  "rlabel" : args.rlabel,
                  "com" : args.com}
     # produce the plots
-    makeCutPlots(args.DQM, cutFile=cutFile, cut=args.cut, nThreads=args.nThreads,
+    makeCutPlots(args.DQM, cutFile=cutFile, cut=args.cut, nThreads=nThreads, prefetch=args.prefetch, incremental=args.incremental,
                  directory=args.directory, nEvents=nEvents,
                  cmsConfig=cmsConfig, limitXRange=limitXRange,
                  plotSimDoublets=plotSimDoublets, plotRecoDoublets=plotRecoDoublets
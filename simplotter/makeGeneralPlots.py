@@ -5,7 +5,9 @@ import functools
 
 from simplotter.utils.PlotConfig import PlotConfig
 from simplotter.utils.plotttools import setStyle
-from simplotter.plotterfunctions.plotHistogram import plotHistogram
+from simplotter.plotterfunctions.plotHistogram import plotHistogram, getHistogramBranches
+from simplotter.utils.PlotManifest import PlotManifest
+from simplotter.utils.pooltools import getPlotTasks, initWorker, runPlotTask, getNumberOfThreads, parseNumberOfThreads
 # from simplotter.plotterfunctions.plotSimNtuplets import plotSimNtuplets
 # from simplotter.plotterfunctions.plotEfficiency import plotEfficiency
 # from simplotter.plotterfunctions.plotEfficiency2D import plotEfficiency2D
@@ -71,14 +73,24 @@ GENERALPLOTLIST = [
 # ------------------------------------------------------------------------------------------
 
 # define function that performs the plotting of all cuts
-def makeGeneralPlots(dqmFile, nThreads=20, layerPairs=None, startingPairs=None, **kwargs):
+def makeGeneralPlots(dqmFile, nThreads="auto", layerPairs=None, startingPairs=None, prefetch=False, incremental=False, **kwargs):
+
+    # the manifest keeps the input hashes (for the incremental mode) and the durations of the plots
+    manifest = PlotManifest(kwargs.get("directory", "plots"))
+    # in incremental mode, the histograms are needed in the main process to hash them
+    prefetch = prefetch or incremental
 
     # open the DQM file
-    rootFile = uproot.open(dqmFile)["DQMData/Run 1/Tracking/Run summary/TrackingMCTruth"]
+    dqmFolder = "DQMData/Run 1/Tracking/Run summary/TrackingMCTruth"
+    rootFile = uproot.open(dqmFile)[dqmFolder]
 
     print("setup multiprocessing...")
-    pool = multiprocessing.Pool(nThreads)
-    producePlot = functools.partial(plotHistogram, rootFile, layerPairs=layerPairs, startingPairs=startingPairs, **kwargs)
+    # unless the histograms are prefetched, each worker opens the DQM file once on its own
+    pool = multiprocessing.Pool(getNumberOfThreads(nThreads), initializer=None if prefetch else initWorker, initargs=(dqmFile, dqmFolder))
+    producePlot = functools.partial(runPlotTask, plotHistogram, layerPairs=layerPairs, startingPairs=startingPairs, **kwargs)
+    tasks = getPlotTasks(rootFile, GENERALPLOTLIST, prefetch=prefetch, manifest=manifest, incremental=incremental,
+                         getBranches=functools.partial(getHistogramBranches, **kwargs),
+                         layerPairs=layerPairs, startingPairs=startingPairs, **kwargs)
 
     # -------------------------------------
     #  general plots
@@ -87,7 +99,14 @@ def makeGeneralPlots(dqmFile, nThreads=20, layerPairs=None, startingPairs=None,
     print(" General plots")
     print("-"*30)
 
-    pool.map(producePlot, GENERALPLOTLIST)
+    for key, duration, outputs in pool.imap_unordered(producePlot, tasks):
+        manifest.recordDuration(key, duration)
+        manifest.recordOutputs(key, outputs)
+    pool.close()
+
+    # remember the inputs and durations of the produced plots for the next run
+    manifest.save()
+
     # print("make LayerPair plots...")
     # # plot the layerPairs
     # plotLayerPairs(rootFile, "SimDoublets/layerPairs", 
@@ -253,7 +272,9 @@ parser.add_argument("--fullXRange", default=False, action='store_true', help="fl
 parser.add_argument("--onlySim", default=False, action='store_true', help="flag to plot only the Sim distribtuions (no Reco)")
 parser.add_argument("--onlyReco", default=False, action='store_true', help="flag to plot only the Reco distribtuions (no Sim)")
 parser.add_argument("--pdf", default=False, action='store_true', help="flag to save the plots in pdf instead of png")
-parser.add_argument("-t", "--nThreads", default=20, type=int,  help="Number of threads used for parallel plotting")
+parser.add_argument("-t", "--nThreads", default="auto", type=parseNumberOfThreads, help="Number of threads used for parallel plotting (default `auto` uses all available cores)")
+parser.add_argument("--prefetch", default=False, action='store_true', help="flag to read all histograms once in the main process and only pass their content to the parallel workers")
+parser.add_argument("--incremental", default=False, action='store_true', help="flag to only redo the plots whose input histograms or configuration changed since the last run in the same directory")
 
 def main():
     print("="*30)
@@ -331,7 +352,12 @@ def main():
         limitXRange = True
         print(" * limit the x range of the plots to the non-empty bins")
 
-    print(" * plot with %i threads in parallel" % args.nThreads)
+    nThreads = getNumberOfThreads(args.nThreads)
+    print(" * plot with %i threads in parallel" % nThreads)
+    if args.prefetch:
+        print(" * prefetch all histograms before plotting")
+    if args.incremental:
+        print(" * only redo plots with changed inputs (incremental mode)")
     print(" * output directory for plots:", args.directory)
     print("\n")        
 
@@ -340,7 +366,7 @@ def main():
                  "com" : args.com}
     # produce the plots
     makeGeneralPlots(args.DQM, layerPairs=layerPairs, startingPairs=startingPairs, 
-                     nThreads=args.nThreads, directory=args.directory, 
+                     nThreads=nThreads, prefetch=args.prefetch, incremental=args.incremental, directory=args.directory, 
                      nEvents=nEvents, cmsConfig=cmsConfig, limitXRange=limitXRange,
                      plotSim=plotSim, plotReco=plotReco
                      )
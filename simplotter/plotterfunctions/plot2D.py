@@ -6,7 +6,7 @@ def plot2D_(theHist, fig, ax, zLabel="", logZ=False, nEvents=None, cmap="plasma"
     # get histogram data
     w, x, y = theHist.to_numpy()
     if nEvents is not None:
-        w /= nEvents
+        w = w / nEvents
 
     # set limits
     vmin = np.nanmin(np.ma.masked_equal(w, 0.0, copy=False)) * 0.999
@@ -1,7 +1,7 @@
 import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-from simplotter.utils.histtools import getHist, findXLimits
+from simplotter.utils.histtools import getHist, getPassBranch, findXLimits
 from simplotter.utils.plotttools import savefig, cmslabel, Colors, legend, plotPercentageBoxSim
 from simplotter.utils.utils import valToLatexStr, limitXNone, toRGBA
 from simplotter.plotterfunctions.plotRatio import plotRatioEfficiency
@@ -191,6 +191,89 @@ def plotCutSimDoublets(rootFile, cellCut, subfolder, ax=None, axRatio=None, nEve
 
 
 
+def getCutSubfolder(cellCut):
+    """
+    Returns the subfolder in the ROOT file holding the histograms of the given cut parameter.
+    """
+    subfolder = "CAParameters/" + ("doubletCuts/" if cellCut.isDoubletCut else 
+                                  ("connectionCuts/" if cellCut.isConnectionCut else
+                                   "startingCuts/"))
+    if (cellCut.isLayerDependent) and (cellCut.isDoubletCut):
+        subfolder += "lp_%i_%i/" % (cellCut.innerLayer, cellCut.outerLayer)
+    elif cellCut.isDoubletCut:
+        subfolder += "global/"
+    elif (cellCut.isLayerDependent) and (cellCut.isConnectionCut or cellCut.isStartingCut):
+        subfolder += "layer_%i/" % cellCut.innerLayer
+    elif not (cellCut.isConnectionCut or cellCut.isStartingCut):
+        raise ValueError('Provided cut "%s" is neither DoubletCut nor ConnectionCut nor StartingCut. ' % cellCut.histname +
+                         'If it is, please specify this in its CellCut object ' +
+                         'by setting the respective isXXXXCut to True.')
+    return subfolder
+
+
+def getCutParameterBranches(cellCut, plotSimDoublets=True, plotRecoDoublets=True, **kwargs):
+    """
+    Returns the list of all histogram branches that `plotCutParameter` reads for the given cut parameter.
+    Additional keyword arguments of `plotCutParameter` are accepted and ignored.
+    """
+    subfolder = getCutSubfolder(cellCut)
+    branches = []
+    if plotSimDoublets:
+        branches += ["SimPixelTracks/%s%s" % (subfolder,cellCut.histname),
+                     getPassBranch("SimPixelTracks/%s%s" % (subfolder,cellCut.histname)),
+                     "SimPixelTracks/%s%s_passThisCut" % (subfolder,cellCut.histname)]
+    if plotRecoDoublets:
+        branches += ["FakePixelTracks/%s%s" % (subfolder,cellCut.histname),
+                     "TruePixelTracks/%s%s" % (subfolder,cellCut.histname)]
+    return branches
+
+
+def getCutParameterEfficiencyPairs(cellCut, hists, plotSimDoublets=True, plotRecoDoublets=True, **kwargs):
+    """
+    Returns the pairs `(num, denom)` of the count arrays of the ratio panels of `plotCutParameter` for the given cut
+    parameter, i.e. the Sim efficiency (pass/total) and the Reco fake rate (fake/(true+fake)), taken from the
+    prefetched `hists`. Pairs with missing histograms are left out. Additional keyword arguments are ignored.
+    """
+    subfolder = getCutSubfolder(cellCut)
+    pairs = []
+    if plotSimDoublets:
+        branch = "SimPixelTracks/%s%s" % (subfolder,cellCut.histname)
+        if branch in hists and getPassBranch(branch) in hists:
+            pairs.append((hists[getPassBranch(branch)].values(), hists[branch].values()))
+    if plotRecoDoublets:
+        fakeBranch = "FakePixelTracks/%s%s" % (subfolder,cellCut.histname)
+        trueBranch = "TruePixelTracks/%s%s" % (subfolder,cellCut.histname)
+        if fakeBranch in hists and trueBranch in hists:
+            pairs.append((hists[fakeBranch].values(), (hists[trueBranch] + hists[fakeBranch]).values()))
+    return pairs
+
+
+
+def estimateCutParameterCost(cellCut, hists=None, rootFile=None, plotSimDoublets=True, plotRecoDoublets=True, **kwargs):
+    """
+    Returns a rough estimate of the cost (arbitrary units) of `plotCutParameter` for the given cut parameter.
+    It grows with the number of bins of the histograms, the use of twin axes (Sim and Reco plotted) and log scales.
+    The number of bins is taken from the prefetched `hists` if given. Otherwise, it is estimated from the
+    uncompressed sizes in the keys of the histograms in `rootFile`, such that no histogram has to be read.
+    Additional keyword arguments of `plotCutParameter` are accepted and ignored.
+    """
+    if hists is not None:
+        nBins = sum(h.values(flow=True).size for h in hists.values())
+    elif rootFile is not None:
+        # about 12 bytes per bin (value and sum of squared weights)
+        branches = getCutParameterBranches(cellCut, plotSimDoublets=plotSimDoublets, plotRecoDoublets=plotRecoDoublets)
+        nBins = sum(rootFile.key(branch).data_uncompressed_bytes for branch in branches if branch in rootFile) / 12
+    else:
+        nBins = 0
+    cost = 1 + nBins / 50
+    if plotSimDoublets and plotRecoDoublets:
+        cost *= 2
+    if cellCut.isLog or cellCut.isLogY:
+        cost *= 1.5
+    return cost
+
+
+
 # ------------------------------------------------------------------------------------------
 # main function for plotting
 # ------------------------------------------------------------------------------------------
@@ -202,7 +285,8 @@ def plotCutParameter(rootFile, cellCut, directory="plots",
     Produces and saves the full plot for a given cut parameter.
     
     Args:
-        rootFile (opened ROOT file): The object returned by `uproot.open(filename.root)`.
+        rootFile (opened ROOT file or dict): The object returned by `uproot.open(filename.root)` or the prefetched
+                                             histograms as returned by `prefetchHists`.
         cellCut (CellCut object): This object contains all information specifying the cut:
                                   histname, label, type, min/max values, innerLayer, ...
         directory (str, optional): directory where to save the plot.
@@ -214,19 +298,7 @@ def plotCutParameter(rootFile, cellCut, directory="plots",
         plotRecoDoublets (bool, optional): To enable/disable the plotting of the reconstructed doublets used in RecoTracks.
     """
     # specify subfolder depending on layer-pair dependence
-    subfolder = "CAParameters/" + ("doubletCuts/" if cellCut.isDoubletCut else 
-                                  ("connectionCuts/" if cellCut.isConnectionCut else
-                                   "startingCuts/"))
-    if (cellCut.isLayerDependent) and (cellCut.isDoubletCut):
-        subfolder += "lp_%i_%i/" % (cellCut.innerLayer, cellCut.outerLayer)
-    elif cellCut.isDoubletCut:
-        subfolder += "global/"
-    elif (cellCut.isLayerDependent) and (cellCut.isConnectionCut or cellCut.isStartingCut):
-        subfolder += "layer_%i/" % cellCut.innerLayer
-    elif not (cellCut.isConnectionCut or cellCut.isStartingCut):
-        raise ValueError('Provided cut "%s" is neither DoubletCut nor ConnectionCut nor StartingCut. ' % cellCut.histname +
-                         'If it is, please specify this in its CellCut object ' +
-                         'by setting the respective isXXXXCut to True.')
+    subfolder = getCutSubfolder(cellCut)
     
     # create new figure
     fig, (ax1, ax2) = plt.subplots(2, 1, sharex=True, height_ratios=[3, 1])
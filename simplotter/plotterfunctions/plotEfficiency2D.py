@@ -24,13 +24,7 @@ def plotEfficiency2D(ROOTfile, histname, directory="plots", x_label="", y_label=
     ylabel(y_label)
 
     if plot_ymean:
-        yvals = (h.edges_y[:-1] + h.edges_y[1:]) / 2
-        zvals = h.values
-        if ignore_zero:
-            mask = yvals!=0
-            yvals = yvals[mask]
-            zvals = zvals[:, mask]
-        means = np.sum(yvals*zvals, axis=1) / np.sum(zvals, axis=1)
+        means = h.profile(axis=0, ignore_zero=ignore_zero).values
         ax.stairs(means, h.edges_x, color="k", label="mean")
         ax.legend()
 
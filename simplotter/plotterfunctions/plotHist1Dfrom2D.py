@@ -3,7 +3,7 @@ import matplotlib as mpl
 import re
 from simplotter.utils.utils import valToLatexStr, toRGBA, limitXNone
 from simplotter.utils.plotttools import cmslabel, savefig, legend, Colors
-from simplotter.utils.histtools import getHist, histSlice1DFrom2D, findXLimits
+from simplotter.utils.histtools import getHist, histSlices1DFrom2D, findXLimits
 from simplotter.plotterfunctions.plotRatio import plotRatioEfficiency
 
 def plotContineousHistSim(plotConfig, histTotal=None, histPass=None, ax=None, axRatio=None, nEvents=None):
@@ -13,14 +13,15 @@ def plotContineousHistSim(plotConfig, histTotal=None, histPass=None, ax=None, ax
     if ax is None:
         ax = plt.gca()
 
+    # the flow bins of the slices are not drawn
     if histPass is not None:
-        histPass.plot1d(ax=ax, histtype="fill", hatch='//', facecolor="w", edgecolor=Colors.passed,  
+        histPass.plot1d(ax=ax, flow="none", histtype="fill", hatch='//', facecolor="w", edgecolor=Colors.passed,  
                         label="TrackingParticles (w/ alive SimNtuplet)" if plotConfig.isParticles else "%ss (pass all cuts)" % plotConfig.simSubject % plotConfig.simSubject)
-        histPass.plot1d(ax=ax, histtype="step",color=Colors.passed, linewidth=2,
+        histPass.plot1d(ax=ax, flow="none", histtype="step",color=Colors.passed, linewidth=2,
                         label="TrackingParticles (w/ alive SimNtuplet)" if plotConfig.isParticles else "%ss (pass all cuts)" % plotConfig.simSubject % plotConfig.simSubject)
 
     if histTotal is not None:
-        histTotal.plot1d(ax=ax, histtype="step", label="%ss (all)" % plotConfig.simSubject, color=Colors.total, linewidth=2)
+        histTotal.plot1d(ax=ax, flow="none", histtype="step", label="%ss (all)" % plotConfig.simSubject, color=Colors.total, linewidth=2)
 
     # scale according to number of events if given
     if nEvents is not None:
@@ -47,16 +48,17 @@ def plotContineousHistReco(plotConfig, histTrue=None, histFake=None, ax=None, ax
         ax = plt.gca()
 
     alpha = 0.25
+    # the flow bins of the slices are not drawn
     if histTrue is not None:
-        histTrue.plot1d(ax=ax, histtype="fill", facecolor=toRGBA(Colors.true,alpha),
+        histTrue.plot1d(ax=ax, flow="none", histtype="fill", facecolor=toRGBA(Colors.true,alpha),
                         label="true PixelTracks" if plotConfig.isParticles else ("%ss of true PixelTracks" % plotConfig.recoSubject))
-        histTrue.plot1d(ax=ax, histtype="step", color=Colors.true, linestyle="dashed",
+        histTrue.plot1d(ax=ax, flow="none", histtype="step", color=Colors.true, linestyle="dashed",
                         label="true PixelTracks" if plotConfig.isParticles else ("%ss of true PixelTracks" % plotConfig.recoSubject))
 
     if histFake is not None:
-        histFake.plot1d(ax=ax, histtype="fill", facecolor=toRGBA(Colors.fake,alpha),
+        histFake.plot1d(ax=ax, flow="none", histtype="fill", facecolor=toRGBA(Colors.fake,alpha),
                         label="fake PixelTracks" if plotConfig.isParticles else ("%ss of fake PixelTracks" % plotConfig.recoSubject))
-        histFake.plot1d(ax=ax, histtype="step", color=Colors.fake, linestyle="dashed",
+        histFake.plot1d(ax=ax, flow="none", histtype="step", color=Colors.fake, linestyle="dashed",
                         label="fake PixelTracks" if plotConfig.isParticles else ("%ss of fake PixelTracks" % plotConfig.recoSubject))
 
     # scale according to number of events if given
@@ -127,14 +129,21 @@ def plotHist1Dfrom2D(rootFile, plotConfig, directory="plots",
     histTotal = getHist(rootFile, "SimPixelTracks/%s" % (plotConfig.histname)) if plotSim else None
     histPass  = getHist(rootFile, "SimPixelTracks/%s" % (plotConfig.histname), isPass=True) if plotSim else None
 
+    # get all slices at once
+    def getSlices(hist):
+        if hist is None:
+            return [(None, None)] * nPlots
+        return histSlices1DFrom2D(hist, plotConfig.slices, axis=plotConfig.axis, axisIsDiscrete=plotConfig.axisIsDiscrete)
+    slicesTrue, slicesFake, slicesTotal, slicesPass = [getSlices(hist) for hist in [histTrue, histFake, histTotal, histPass]]
+
     xLim = (None, None)
 
     # plot the histograms
     for i, bin in enumerate(plotConfig.slices):
         if plotSim:
             # get slices
-            histTotal_, slice = histSlice1DFrom2D(histTotal, bin, axis=plotConfig.axis, axisIsDiscrete=plotConfig.axisIsDiscrete)
-            histPass_,  slice = histSlice1DFrom2D(histPass, bin, axis=plotConfig.axis, axisIsDiscrete=plotConfig.axisIsDiscrete)
+            histTotal_, slice = slicesTotal[i]
+            histPass_,  slice = slicesPass[i]
 
             # plot histogram
             xLim_ = plotContineousHistSim(plotConfig, histTotal=histTotal_, histPass=histPass_, ax=axs[2*i], axRatio=axs[2*i+1], nEvents=nEvents)
@@ -142,8 +151,8 @@ def plotHist1Dfrom2D(rootFile, plotConfig, directory="plots",
             
         if plotReco:
             # get slices
-            histTrue_, slice = histSlice1DFrom2D(histTrue, bin, axis=plotConfig.axis, axisIsDiscrete=plotConfig.axisIsDiscrete)
-            histFake_, slice = histSlice1DFrom2D(histFake, bin, axis=plotConfig.axis, axisIsDiscrete=plotConfig.axisIsDiscrete)
+            histTrue_, slice = slicesTrue[i]
+            histFake_, slice = slicesFake[i]
 
             # plot histogram
             xLim_ = plotContineousHistReco(plotConfig, histTrue=histTrue_, histFake=histFake_, ax=axsc[2*i], axRatio=axsc[2*i+1], axCumSum=axsCumSum[i], nEvents=nEvents)
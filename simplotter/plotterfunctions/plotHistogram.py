@@ -2,8 +2,41 @@ from simplotter.plotterfunctions.plotHist1D import plotHist1D
 from simplotter.plotterfunctions.plotHist2D import plotHist2D
 from simplotter.plotterfunctions.plotRatio2D import plotRatio2D
 from simplotter.plotterfunctions.plotProfile import plotProfile
-from simplotter.plotterfunctions.plotSimNtuplets import plotSimNtuplets
+from simplotter.plotterfunctions.plotSimNtuplets import plotSimNtuplets, getSimNtupletBranches
 from simplotter.plotterfunctions.plotHist1Dfrom2D import plotHist1Dfrom2D
+from simplotter.utils.histtools import getPassBranch
+
+
+def getHistogramBranches(plotConfig, plotSim=True, plotReco=True, **kwargs):
+    """
+    Returns the list of all histogram branches that `plotHistogram` reads for the given PlotConfig.
+    Additional keyword arguments of `plotHistogram` are accepted and ignored.
+    """
+    # overwrite plotSim and plotReco if specified in plotConfig
+    plotReco = plotReco and not plotConfig.onlySim
+    plotSim = plotSim and not plotConfig.onlyReco
+
+    if not (plotReco | plotSim):
+        return []
+
+    simBranch = "SimPixelTracks/%s" % plotConfig.histname
+    recoBranches = ["TruePixelTracks/%s" % plotConfig.histname, "FakePixelTracks/%s" % plotConfig.histname]
+
+    if "SimNtuplet" in plotConfig.type:
+        return list(getSimNtupletBranches(plotConfig).values())
+    
+    branches = []
+    if plotSim:
+        if "ratio" in plotConfig.type and plotConfig.ratiohistname is not None:
+            branches += [simBranch, "SimPixelTracks/%s" % plotConfig.ratiohistname]
+        elif ("1D" in plotConfig.type) or ("ratio" in plotConfig.type):
+            branches += [simBranch, getPassBranch(simBranch)]
+        else:
+            branches += [simBranch]
+    if plotReco:
+        branches += recoBranches
+    return branches
+
 
 def plotHistogram(rootFile, plotConfig, directory="plots", 
                   nEvents=None, cmsConfig=None, limitXRange=False, 
@@ -13,7 +46,8 @@ def plotHistogram(rootFile, plotConfig, directory="plots",
     Plots a histogram for given PlotConfig. Decides which plotting function to use based on the given plotConfig.type.
 
     Args:
-        rootFile (opened ROOT file): The object returned by `uproot.open(filename.root)`.
+        rootFile (opened ROOT file or dict): The object returned by `uproot.open(filename.root)` or the prefetched
+                                             histograms as returned by `prefetchHists`.
         plotConfig (PlotConfig object): This object contains all information specifying the histogram:
                                         histname, xLabel, yLabel, type, ...
         directory (str, optional): directory where to save the plot.
@@ -1,10 +1,10 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.stats import binomtest
 from sakura.tools.plotting_helpers import xlabel, ylabel, cmslabel, savefig
 from sakura.histograms.Hist import Hist
 from pathlib import Path
 from simplotter.dataconfig.pdgIdDict import pdgIdDict
+from simplotter.utils.intervaltools import clopperPearsonInterval
 
 
 def plotPdgId(ROOTfile, directory="plots", num_events=None, cmsconfig=None):
@@ -21,30 +21,21 @@ def plotPdgId(ROOTfile, directory="plots", num_events=None, cmsconfig=None):
     hTot = Hist(ROOTfile, histname, scale_for_values = 1/num_events)
     hPass = Hist(ROOTfile, pass_histname, scale_for_values = 1/num_events)
 
-    # loop over the particles in the dict and fill
-    x = np.arange(len(pdgIdDict.keys()))
-    x_labels = []
-    yTot= np.array([])
-    yPass= np.array([])
-    yEff = []
-    yEffErrUp = []
-    yEffErrLow = []
-    for pdgid in pdgIdDict.keys():
-        i = np.argwhere(hTot.edges == pdgid)[0]
-        yTot = np.append(yTot, hTot.values[i])
-        yPass = np.append(yPass, hPass.values[i])
-        x_labels.append(pdgIdDict[pdgid])
+    # collect the bins of the particles in the dict
+    pdgIds = list(pdgIdDict.keys())
+    x = np.arange(len(pdgIds))
+    x_labels = [pdgIdDict[pdgid] for pdgid in pdgIds]
+    bins = [np.argwhere(hTot.edges == pdgid)[0][0] for pdgid in pdgIds]
+    yTot = hTot.values[bins]
+    yPass = hPass.values[bins]
 
-        if yTot[-1]>0:
-            # error calculation with eff
-            result = binomtest(k=round(yPass[-1]*num_events), n=round(yTot[-1]*num_events))
-            yEff.append(result.statistic)
-            yEffErrLow.append(result.proportion_ci(0.683).low)
-            yEffErrUp.append(result.proportion_ci(0.683).high)
-        else:
-            yEff.append(0)
-            yEffErrLow.append(0)
-            yEffErrUp.append(0)
+    # efficiency with Clopper-Pearson errors for all particles at once
+    nTot = np.round(yTot*num_events)
+    nPass = np.round(yPass*num_events)
+    hasEntries = yTot > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yEff = np.where(hasEntries, nPass / nTot, 0)
+        yEffErrLow, yEffErrUp = np.where(hasEntries, clopperPearsonInterval(nPass, nTot, coverage=0.683), 0)
     
 
     # create new figure
@@ -1,4 +1,5 @@
 from hist.intervals import ratio_uncertainty
+from simplotter.utils.intervaltools import efficiencyUncertainty
 import matplotlib.pyplot as plt
 
 def plotRatio(num, denom, cellCut=None, ax=None, uncertainty_type="poisson", fmt=".", **kwargs):
@@ -6,11 +7,19 @@ def plotRatio(num, denom, cellCut=None, ax=None, uncertainty_type="poisson", fmt
         ax = plt.gca()
         
     ratio = num / denom
-    ratioErr = ratio_uncertainty(
-        num=num.values(),
-        denom=denom.values(),
-        uncertainty_type=uncertainty_type,
-    )
+    if uncertainty_type in ("efficiency", "wilson"):
+        # vectorized and cached efficiency intervals (Clopper-Pearson for "efficiency")
+        ratioErr = efficiencyUncertainty(
+            num=num.values(),
+            denom=denom.values(),
+            method="wilson" if uncertainty_type == "wilson" else "clopper-pearson",
+        )
+    else:
+        ratioErr = ratio_uncertainty(
+            num=num.values(),
+            denom=denom.values(),
+            uncertainty_type=uncertainty_type,
+        )
     # if cellCut is given set the errors outside the cut limits to zero
     if cellCut is not None:
         outside = (ratio.axes.edges[0][1:] <= cellCut.min) | (ratio.axes.edges[0][:-1] >= cellCut.max) 
@@ -4,29 +4,39 @@ from simplotter.utils.histtools import getHist
 from simplotter.utils.plotttools import cmslabel, savefig
 
 
-def plotSimNtuplets(rootFile, plotConfig, directory="plots", cmsConfig=None, saveas="png", rootFileMTV=None):
+colorPalette1 = ["#C0FB2D", "#1B2021", "#016FB9", "#61E8E1", "#773FF8", "#336346", "#88958D", "#ff00ff", "#ff00ff", "#DEDEDE"]
+colorPalette2 = ["#648FFF", "#785EF0", "#DC267F", "#FE6100", "#FFB000", "#FFB000", "#ff00ff", "#ff00ff", "#DEDEDE"]
+
+colorPalette = colorPalette1
+
+# status categories of the SimNtuplets (one histogram per category)
+categories = {
+    "Alive" : {"label" : "built", "color" : colorPalette[0]},
+    "NotStartingPair" : {"label" : "Ntuplet does not start in a starting pair", "color" : colorPalette[5]},
+    "KilledTripletConnections" : {"label" : "has killed triplet connections", "color" : colorPalette[4]},
+    "KilledDoubletConnections" : {"label" : "has killed doublet connections", "color" : colorPalette[3]},
+    "KilledDoublets" : {"label" : "has killed doublets", "color" : colorPalette[2]},
+    "MissingLayerPair" : {"label" : "is missing a layer pair", "color" : colorPalette[1]},
+    "TooShort" : {"label" : "shorter than reco threshold", "color" : colorPalette[6]},
+    "UndefDoubletCuts" : {"label" : "has undef doublet cuts", "color" : colorPalette[7]},
+    "UndefConnectionCuts" : {"label" : "has undef connection cuts", "color" : colorPalette[8]},
+}
 
-    colorPalette1 = ["#C0FB2D", "#1B2021", "#016FB9", "#61E8E1", "#773FF8", "#336346", "#88958D", "#ff00ff", "#ff00ff", "#DEDEDE"]
-    colorPalette2 = ["#648FFF", "#785EF0", "#DC267F", "#FE6100", "#FFB000", "#FFB000", "#ff00ff", "#ff00ff", "#DEDEDE"]
 
+def getSimNtupletBranches(plotConfig, **kwargs):
+    """
+    Returns the dictionary of the histogram branches that `plotSimNtuplets` reads for each category.
+    Additional keyword arguments of `plotSimNtuplets` are accepted and ignored.
+    """
     xQuantity = "eta" if "eta" in plotConfig.xLabel else "pt"
+    return {c : "SimPixelTracks/SimNtuplets/%s/frac%s_vs_%s" % (plotConfig.histname, c, xQuantity) for c in categories}
 
-    colorPalette = colorPalette1
+
+def plotSimNtuplets(rootFile, plotConfig, directory="plots", cmsConfig=None, saveas="png", rootFileMTV=None):
     
     # load histograms
-    categories = {
-        "Alive" : {"label" : "built", "color" : colorPalette[0]},
-        "NotStartingPair" : {"label" : "Ntuplet does not start in a starting pair", "color" : colorPalette[5]},
-        "KilledTripletConnections" : {"label" : "has killed triplet connections", "color" : colorPalette[4]},
-        "KilledDoubletConnections" : {"label" : "has killed doublet connections", "color" : colorPalette[3]},
-        "KilledDoublets" : {"label" : "has killed doublets", "color" : colorPalette[2]},
-        "MissingLayerPair" : {"label" : "is missing a layer pair", "color" : colorPalette[1]},
-        "TooShort" : {"label" : "shorter than reco threshold", "color" : colorPalette[6]},
-        "UndefDoubletCuts" : {"label" : "has undef doublet cuts", "color" : colorPalette[7]},
-        "UndefConnectionCuts" : {"label" : "has undef connection cuts", "color" : colorPalette[8]},
-    }
     hists = {
-        c : getHist(rootFile, "SimPixelTracks/SimNtuplets/%s/frac%s_vs_%s" % (plotConfig.histname, c, xQuantity)) for c in categories
+        c : getHist(rootFile, branch) for c, branch in getSimNtupletBranches(plotConfig).items()
         }
     
     # create new figure
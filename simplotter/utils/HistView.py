@@ -0,0 +1,278 @@
+from collections import namedtuple
+import numpy as np
+import uproot
+import hist
+
+# traits of a HistViewAxis as required by the plottable protocol (used by mplhep)
+AxisTraits = namedtuple("AxisTraits", ["underflow", "overflow", "circular", "discrete"])
+
+
+def readOnly(array):
+    """
+    Returns a read-only view of the given array (or None), such that the arrays shared with uproot cannot be
+    modified in place by accident.
+    """
+    if array is None:
+        return None
+    array = array.view()
+    array.flags.writeable = False
+    return array
+
+
+class HistViewAxis:
+    """
+    Small class describing one axis of a HistView by its bin edges (and the bin labels for categorical axes).
+    It implements the axis part of the plottable protocol, so it can be plotted with mplhep directly.
+    """
+    __slots__ = ("edges", "labels", "label", "name")
+
+    def __init__(self, edges, labels=None, label="", name=""):
+        self.edges = readOnly(np.asarray(edges, dtype=np.float64))
+        self.labels = None if labels is None else list(labels)
+        self.label = label
+        self.name = name
+
+    @classmethod
+    def fromUproot(cls, axis):
+        """
+        Creates the axis from an uproot TAxis. As in `to_hist()`, labelled axes become categorical axes with unit bins.
+        """
+        fLabels = axis.member("fLabels", none_if_missing=True)
+        if fLabels is None:
+            return cls(axis.edges(), label=axis.member("fTitle"), name=axis.member("fName"))
+        try:
+            labels = [int(x) for x in fLabels]
+        except ValueError:
+            labels = [str(x) for x in fLabels]
+        return cls(np.arange(len(labels) + 1), labels=labels, label=axis.member("fTitle"), name=axis.member("fName"))
+
+    @property
+    def centers(self):
+        return (self.edges[1:] + self.edges[:-1]) / 2
+
+    @property
+    def widths(self):
+        return self.edges[1:] - self.edges[:-1]
+
+    @property
+    def traits(self):
+        # categorical axes only have an overflow bin (like in hist)
+        return AxisTraits(underflow=self.labels is None, overflow=True, circular=False, discrete=self.labels is not None)
+
+    def toBoostAxis(self):
+        """
+        Returns the corresponding `hist.axis` object.
+        """
+        if self.labels is None:
+            return hist.axis.Variable(self.edges, label=self.label, name=self.name)
+        if isinstance(self.labels[0], str):
+            return hist.axis.StrCategory(self.labels, label=self.label, name=self.name)
+        return hist.axis.IntCategory(self.labels, label=self.label, name=self.name)
+
+    def __len__(self):
+        return len(self.edges) - 1
+
+    def __getitem__(self, index):
+        if self.labels is not None:
+            return self.labels[index]
+        return (self.edges[index], self.edges[index + 1])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other):
+        return isinstance(other, HistViewAxis) and np.array_equal(self.edges, other.edges) and self.labels == other.labels
+
+    def __reduce__(self):
+        return (HistViewAxis, (self.edges, self.labels, self.label, self.name))
+
+    def __repr__(self):
+        return "HistViewAxis(%i bins from %g to %g)" % (len(self), self.edges[0], self.edges[-1])
+
+
+class HistViewAxes(tuple):
+    """
+    Tuple of the HistViewAxis objects of a HistView with the `edges`, `centers` and `widths` shortcuts of `hist`.
+    """
+    __slots__ = ()
+
+    @property
+    def edges(self):
+        return tuple(axis.edges for axis in self)
+
+    @property
+    def centers(self):
+        return tuple(axis.centers for axis in self)
+
+    @property
+    def widths(self):
+        return tuple(axis.widths for axis in self)
+
+
+class HistView:
+    """
+    Lightweight, read-only histogram wrapping the numpy arrays of an uproot histogram without copying them.
+    It offers the part of the `hist.Hist` interface used by the plotting functions (values, variances, counts, axes,
+    sum, to_numpy, plot1d and the `+` and `/` operators) and implements the plottable protocol, so it can be
+    passed to mplhep directly. A full `hist.Hist` is only built on demand with `to_hist()`.
+
+    All arrays include the under- and overflow bins of each axis (as in ROOT).
+    """
+    __slots__ = ("axes", "kind", "_values", "_variances", "_counts")
+
+    def __init__(self, axes, values, variances=None, counts=None, kind="COUNT"):
+        """
+        Args:
+            axes (iterable(HistViewAxis)): Axes of the histogram.
+            values (np.array): Bin contents including flow bins.
+            variances (np.array, optional): Variances of the bin contents including flow bins.
+            counts (np.array, optional): Effective number of entries per bin including flow bins. As in hist, they
+                                         are only returned by `counts()` for profiles, for histograms (and if None)
+                                         the counts are equal to the values.
+            kind (str, optional): "COUNT" for histograms and "MEAN" for profiles.
+        """
+        self.axes = HistViewAxes(axes)
+        self.kind = kind
+        self._values = readOnly(values)
+        self._variances = readOnly(variances)
+        self._counts = readOnly(counts)
+
+    @classmethod
+    def fromUproot(cls, uprootHist):
+        """
+        Creates the HistView of an uproot histogram (TH1, TH2 or TProfile). The arrays are taken from the uproot object
+        without copying (unless they have to be converted to float64). Profiles are converted with `to_hist()` once.
+
+        Args:
+            uprootHist (uproot histogram): Histogram as read from the opened ROOT file.
+        """
+        axes = [HistViewAxis.fromUproot(axis) for axis in uprootHist.axes]
+
+        if isinstance(uprootHist, uproot.behaviors.TProfile.Profile):
+            # take the arrays of `to_hist()`, such that the variances are the ones of the (Weighted)Mean storage of hist
+            # (and not the squared errors of ROOT, which depend on the error mode of the profile)
+            profile = uprootHist.to_hist()
+            arrays = [np.asarray(array, dtype=np.float64) for array in (profile.values(flow=True), profile.variances(flow=True), profile.counts(flow=True))]
+            if axes[0].labels is not None:
+                # categorical axes have no underflow bin in hist
+                arrays = [np.concatenate(([0.], array)) for array in arrays]
+            return cls(axes, *arrays, kind="MEAN")
+
+        values = np.asarray(uprootHist.values(flow=True), dtype=np.float64)
+        variances = np.asarray(uprootHist.variances(flow=True), dtype=np.float64)
+
+        # for weighted histograms, compute the effective counts as `hist` does
+        sumw2 = uprootHist.member("fSumw2", none_if_missing=True)
+        counts = None
+        if sumw2 is not None and len(sumw2) == uprootHist.member("fNcells"):
+            counts = effectiveCounts(values, variances)
+        return cls(axes, values, variances, counts)
+
+    @property
+    def ndim(self):
+        return len(self.axes)
+
+    def _inner(self, array, flow):
+        if flow or array is None:
+            return array
+        return array[(slice(1, -1),) * self.ndim]
+
+    def values(self, flow=False):
+        return self._inner(self._values, flow)
+
+    def variances(self, flow=False):
+        return self._inner(self._variances, flow)
+
+    def counts(self, flow=False):
+        return self._inner(self._counts if self.kind == "MEAN" and self._counts is not None else self._values, flow)
+
+    def sum(self, flow=False):
+        return np.sum(self.values(flow=flow))
+
+    def to_numpy(self, flow=False):
+        """
+        Returns the values and the edges of all axes like `hist.Hist.to_numpy()`. The values are read-only.
+        """
+        return (self.values(flow=flow), *self.axes.edges)
+
+    def to_hist(self):
+        """
+        Materialises the histogram as a full `hist.Hist`.
+        """
+        boostAxes = [axis.toBoostAxis() for axis in self.axes]
+        # categorical axes have no underflow bin in hist
+        slicer = tuple(slice(1, None) if axis.labels is not None else slice(None) for axis in self.axes)
+        values = self._values[slicer]
+        variances = None if self._variances is None else self._variances[slicer]
+
+        if self.kind == "MEAN":
+            counts = self._counts[slicer]
+            outHist = hist.Hist(*boostAxes, storage=hist.storage.Mean())
+            view = outHist.view(flow=True)
+            view.count = counts
+            view.value = values
+            view._sum_of_deltas_squared = variances * counts * (counts - 1)
+        elif self._counts is None:
+            outHist = hist.Hist(*boostAxes, storage=hist.storage.Double())
+            outHist.view(flow=True)[...] = values
+        else:
+            outHist = hist.Hist(*boostAxes, storage=hist.storage.Weight())
+            view = outHist.view(flow=True)
+            view.value = values
+            view.variance = variances
+        return outHist
+
+    def plot1d(self, ax=None, **kwargs):
+        """
+        Plots the 1D histogram with `mplhep.histplot` (same as `hist.Hist.plot1d`).
+        """
+        import mplhep
+        return mplhep.histplot(self, ax=ax, **kwargs)
+
+    def _checkCompatible(self, other):
+        if self.axes != other.axes:
+            raise ValueError("Cannot combine histograms with different axes: %s and %s" % (self.axes, other.axes))
+
+    def __add__(self, other):
+        if isinstance(other, HistView):
+            self._checkCompatible(other)
+            values = self._values + other._values
+            variances = None if (self._variances is None or other._variances is None) else self._variances + other._variances
+            counts = None
+            if self._counts is not None or other._counts is not None:
+                counts = effectiveCounts(values, variances)
+        else:
+            values = self._values + other
+            variances = self._variances
+            counts = self._counts
+        return HistView(self.axes, values, variances, counts, kind=self.kind)
+
+    def __truediv__(self, other):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if isinstance(other, HistView):
+                self._checkCompatible(other)
+                values = self._values / other._values
+                variances = None
+                if self._variances is not None and other._variances is not None:
+                    # uncorrelated error propagation (as done by boost-histogram)
+                    variances = (self._variances + other._variances * values**2) / other._values**2
+            else:
+                values = self._values / other
+                variances = None if self._variances is None else self._variances / other**2
+        return HistView(self.axes, values, variances, kind=self.kind)
+
+    def __reduce__(self):
+        return (HistView, (tuple(self.axes), self._values, self._variances, self._counts, self.kind))
+
+    def __repr__(self):
+        return "HistView(%s, kind=%s, sum=%g)" % (", ".join(repr(axis) for axis in self.axes), self.kind, self.sum())
+
+
+def effectiveCounts(values, variances):
+    """
+    Returns the effective number of entries `values**2 / variances` (and `values` where the variance is zero).
+    """
+    if variances is None:
+        return values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(variances > 0, values**2 / variances, values)
@@ -0,0 +1,117 @@
+import json
+import hashlib
+from pathlib import Path
+import numpy as np
+import matplotlib.pyplot as plt
+from simplotter.utils.CellCut import CellCut
+from simplotter.plotterfunctions.plotCutParameter import getCutSubfolder
+
+
+def getPlotKey(config):
+    """
+    Returns a unique key for the plot produced from the given CellCut or PlotConfig.
+    """
+    if isinstance(config, CellCut):
+        return getCutSubfolder(config) + config.histname
+    else:
+        return "%s/%s" % (config.type, config.plotname)
+
+
+def hashPlotInputs(config, hists, **kwargs):
+    """
+    Computes the content hash of everything that goes into a single plot: the arrays of the input histograms,
+    the fields of the CellCut/PlotConfig, the plotting arguments (e.g. cmsConfig) and the matplotlib style.
+
+    Args:
+        config (CellCut or PlotConfig): Config of the plot.
+        hists (dict): Prefetched histograms of the plot as returned by `prefetchHists`.
+        **kwargs: Arguments passed to the plotting function.
+    """
+    sha = hashlib.sha256()
+
+    # histograms
+    for branch in sorted(hists.keys()):
+        histView = hists[branch]
+        sha.update(branch.encode())
+        for axis in histView.axes:
+            sha.update(repr(axis.labels).encode())
+            sha.update(axis.edges.tobytes())
+        sha.update(histView.kind.encode())
+        for array in (histView.values(flow=True), histView.variances(flow=True), histView.counts(flow=True)):
+            if array is not None:
+                sha.update(np.ascontiguousarray(array).tobytes())
+
+    # configuration of the plot
+    sha.update(repr(sorted(vars(config).items())).encode())
+    sha.update(repr(sorted(kwargs.items())).encode())
+    sha.update(repr(sorted(plt.rcParams.items())).encode())
+
+    return sha.hexdigest()
+
+
+class PlotManifest:
+    """
+    Small class keeping track of the plots in an output directory: the input hashes and output files of the plots
+    (used to skip all plots whose inputs did not change since the last run and whose files still exist) and the time
+    it took to produce each plot (used to schedule the most expensive plots first).
+    """
+    # name of the manifest file in the output directory
+    filename = "plotManifest.json"
+
+    def __init__(self, directory):
+        self.path = Path(directory) / self.filename
+        # hashes, output files and durations (in seconds) of the plots as saved in the last run
+        self.hashes = {}
+        self.outputs = {}
+        self.durations = {}
+        if self.path.exists():
+            with open(self.path, "r") as f_:
+                manifest = json.load(f_)
+            # manifests of older versions are a flat dictionary `{key : hash}`
+            if "hashes" not in manifest:
+                manifest = {"hashes" : manifest}
+            self.hashes = manifest["hashes"]
+            self.outputs = manifest.get("outputs", {})
+            self.durations = manifest.get("durations", {})
+        # hashes of the plots produced in this run (only saved once they are done)
+        self.newHashes = {}
+
+    def isUpToDate(self, key, hash):
+        """
+        Returns True if the plot under `key` was produced from inputs with the same `hash` before
+        and all files it saved are still there.
+        """
+        if self.hashes.get(key) != hash or key not in self.outputs:
+            return False
+        return all(Path(filename).exists() for filename in self.outputs[key])
+
+    def stage(self, key, hash):
+        """
+        Remembers the new `hash` of the plot under `key`. It is only written to the manifest by `save`.
+        """
+        self.newHashes[key] = hash
+
+    def recordOutputs(self, key, filenames):
+        """
+        Remembers the files saved by the plot under `key`. If no new hash was staged for the plot (e.g. it was
+        produced without prefetched histograms), its old hash is dropped, as the files might come from other inputs now.
+        """
+        self.outputs[key] = list(filenames)
+        if key not in self.newHashes:
+            self.hashes.pop(key, None)
+
+    def recordDuration(self, key, duration):
+        """
+        Remembers the time in seconds it took to produce the plot under `key`.
+        """
+        self.durations[key] = duration
+
+    def save(self):
+        """
+        Writes all hashes and output files of the plots produced in this run and the measured durations to the manifest file.
+        """
+        self.hashes.update(self.newHashes)
+        self.newHashes = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f_:
+            json.dump({"hashes" : self.hashes, "outputs" : self.outputs, "durations" : self.durations}, f_, indent=1, sort_keys=True)
@@ -1,23 +1,51 @@
 import numpy as np
-import hist
+from simplotter.utils.HistView import HistView
+
+def getPassBranch(branch):
+    """Returns the branch of the pass histogram belonging to the given `branch` (a "pass_" is inserted in front of the histogram name).
+
+    Args:
+        branch (string): branch of the total histogram in the rootFile (relative to the open directory in the file).
+    """
+    pass_branch = branch.split("/")
+    pass_branch[-1] = "pass_"+pass_branch[-1]
+    return "/".join(pass_branch)
+
 
 def getHist(rootFile, branch, isPass=False):
-    """This function imports the histogram under `branch` of the given `rootFile` and returns the `Hist`. 
+    """This function imports the histogram under `branch` of the given `rootFile` and returns it as a lightweight
+    `HistView` (use `.to_hist()` on it if a full `hist.Hist` is needed).
 
     Args:
-        rootFile (opened ROOT file): The object returned by `uproot.open(filename.root)`.
+        rootFile (opened ROOT file or dict): The object returned by `uproot.open(filename.root)` or a dictionary of
+                                             prefetched histograms as returned by `prefetchHists`.
         branch (string): branch of the desired histogram in the rootFile (relative to the open directory in the file).
         isPass (bool, optional): if true, take the pass histogram instead of the total
-    """    
+    """
     if isPass:
         # if pass histogram, insert a "pass_" in the branch path
-        pass_branch = branch.split("/")
-        pass_branch[-1] = "pass_"+pass_branch[-1]
-        pass_branch = "/".join(pass_branch)
-        return rootFile[pass_branch].to_hist()
+        branch = getPassBranch(branch)
+
+    # if the histograms were prefetched, they are already HistViews
+    if isinstance(rootFile, dict):
+        return rootFile[branch]
     else:
-        return rootFile[branch].to_hist()
-    
+        return HistView.fromUproot(rootFile[branch])
+
+
+def prefetchHists(rootFile, branches):
+    """
+    Reads all histograms under the given `branches` of the `rootFile` once and returns them as `HistView` objects,
+    which only carry the numpy arrays of the histograms and can be shipped to worker processes cheaply.
+    Branches which do not exist in the `rootFile` are skipped, such that the error is raised only when
+    the plot that needs them is produced.
+
+    Args:
+        rootFile (opened ROOT file): The object returned by `uproot.open(filename.root)`.
+        branches (iterable(string)): branches of the histograms to be read (relative to the open directory in the file).
+    """
+    return {branch : HistView.fromUproot(rootFile[branch]) for branch in sorted(set(branches)) if branch in rootFile}
+
 
 
 
@@ -27,25 +55,45 @@ def histSlice1DFrom2D(inHist, bin, axis=0, axisIsDiscrete=False):
     It returns the sliced out histogram together with the value or range of the chosen bin along axis.
 
     Args:
-        inHist (hist.Hist): Input 2D histogram from which a slice be taken.
+        inHist (HistView): Input 2D histogram from which a slice be taken.
         bin (int): the bin along the given axis that shall be taken.
         axis (int, optional): axis to take the bin from (the axis that is reduced).
     """
-    edges = inHist.axes.edges[axis].flatten()
-    values = np.take(inHist.values(), [bin], axis=axis).flatten()
-    variances = np.take(inHist.variances(), [bin], axis=axis).flatten()
-    
-    outHist = hist.Hist(inHist.axes[~axis])
-    outHist[:] = values
+    return histSlices1DFrom2D(inHist, [bin], axis=axis, axisIsDiscrete=axisIsDiscrete)[0]
+
+
+def histSlices1DFrom2D(inHist, bins, axis=0, axisIsDiscrete=False):
+    """
+    Takes a 2D histogram as input and returns the histogram slices of all `bins` along `axis` as 1D histograms at once.
+    The slices are views of the 2D histogram if the bins are equally spaced (e.g. a range of bins), otherwise
+    they are taken out with one gather per array. The flow bins of the slices are the flow bins of the other axis
+    of the 2D histogram.
+    It returns a list of the sliced out histograms together with the value or range of the chosen bins along axis
+    (see `histSlice1DFrom2D`).
+
+    Args:
+        inHist (HistView): Input 2D histogram from which the slices are taken.
+        bins (list(int)): the bins along the given axis that shall be taken.
+        axis (int, optional): axis to take the bins from (the axis that is reduced).
+    """
+    bins = np.atleast_1d(bins).astype(int, copy=False)
+    # (same as `Hist2D.slices`, shifted by the underflow bin)
+    index = bins + 1
+    steps = np.diff(bins) if len(bins) > 1 else np.ones(1, dtype=int)
+    if len(bins) > 0 and steps[0] > 0 and np.all(steps == steps[0]):
+        index = slice(bins[0] + 1, bins[-1] + 2, steps[0])
+    values = np.moveaxis(inHist.values(flow=True), axis, 0)[index]
+    variances = np.moveaxis(inHist.variances(flow=True), axis, 0)[index]
 
     # if slice is discrete, return the center of the sliced bin
     # else return the edges of the bin
     if axisIsDiscrete:
-        slice = round(inHist.axes.centers[axis].flatten()[bin])
+        slices = [round(center) for center in inHist.axes.centers[axis].flatten()[bins]]
     else:
-        slice = inHist.axes.edges[axis].flatten()[bin:bin+2]
+        edges = inHist.axes.edges[axis].flatten()
+        slices = [edges[bin:bin+2] for bin in bins]
 
-    return outHist, slice
+    return [(HistView([inHist.axes[~axis]], values[i], variances[i]), slice) for i, slice in enumerate(slices)]
 
 
 
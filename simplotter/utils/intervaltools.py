@@ -0,0 +1,134 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from scipy import stats
+
+# default coverage of the intervals: one standard deviation (~0.68)
+COVERAGE = stats.norm.cdf(1) - stats.norm.cdf(-1)
+
+# cache of the computed uncertainties keyed by the input arrays (see `getCacheKey`)
+intervalCache = OrderedDict()
+# maximum number of entries kept in the cache (the oldest are dropped first)
+maxCacheSize = 4096
+
+
+def clopperPearsonInterval(num, denom, coverage=COVERAGE):
+    """
+    Computes the Clopper-Pearson interval of the efficiency `num/denom` for arrays of any shape, e.g. a stack of
+    many histograms, in one vectorized call. Returns an array of shape `(2, *num.shape)` with the lower and upper limits.
+
+    Args:
+        num (np.array): Numerator or number of successes.
+        denom (np.array): Denominator or number of trials.
+        coverage (float, optional): Central coverage of the interval.
+    """
+    num = np.asarray(num, dtype=np.float64)
+    denom = np.asarray(denom, dtype=np.float64)
+    if np.any(num > denom):
+        raise ValueError("Found numerator larger than denominator while calculating the efficiency interval")
+    interval = np.stack((stats.beta.ppf((1 - coverage) / 2, num, denom - num + 1),
+                         stats.beta.ppf((1 + coverage) / 2, num + 1, denom - num)))
+    interval[0, num == 0] = 0
+    interval[1, num == denom] = 1
+    return interval
+
+
+def wilsonInterval(num, denom, coverage=COVERAGE):
+    """
+    Computes the Wilson score interval of the efficiency `num/denom` for arrays of any shape in one vectorized call.
+    Returns an array of shape `(2, *num.shape)` with the lower and upper limits (NaN where `denom` is zero).
+
+    Args:
+        num (np.array): Numerator or number of successes.
+        denom (np.array): Denominator or number of trials.
+        coverage (float, optional): Central coverage of the interval.
+    """
+    num = np.asarray(num, dtype=np.float64)
+    denom = np.asarray(denom, dtype=np.float64)
+    if np.any(num > denom):
+        raise ValueError("Found numerator larger than denominator while calculating the efficiency interval")
+    z = stats.norm.ppf((1 + coverage) / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eff = num / denom
+        center = (eff + z**2 / (2 * denom)) / (1 + z**2 / denom)
+        halfWidth = z / (1 + z**2 / denom) * np.sqrt(eff * (1 - eff) / denom + z**2 / (4 * denom**2))
+    return np.stack((center - halfWidth, center + halfWidth))
+
+
+# available methods for the efficiency intervals
+INTERVALS = {
+    "clopper-pearson" : clopperPearsonInterval,
+    "wilson" : wilsonInterval,
+}
+
+
+def getCacheKey(num, denom, method, coverage):
+    """
+    Returns the key of the uncertainties of `num/denom` in the `intervalCache`, i.e. a hash of the input arrays.
+    """
+    sha = hashlib.sha1()
+    sha.update(("%s %r %r" % (method, coverage, num.shape)).encode())
+    sha.update(np.ascontiguousarray(num, dtype=np.float64).tobytes())
+    sha.update(np.ascontiguousarray(denom, dtype=np.float64).tobytes())
+    return sha.digest()
+
+
+def batchEfficiencyUncertainties(nums, denoms, method="clopper-pearson", coverage=COVERAGE):
+    """
+    Computes the uncertainties of the efficiencies `num/denom` for many pairs of pass and total arrays at once.
+    All pairs that are not cached yet are stacked by shape and their intervals are computed in one vectorized call
+    per shape. The results are cached, such that the same efficiency (or fake rate) is never computed twice.
+
+    Returns a list with one array of shape `(2, *num.shape)` per pair holding the lower and upper uncertainty
+    (distance of the interval limits from the efficiency), as `hist.intervals.ratio_uncertainty` does.
+
+    Args:
+        nums (iterable(np.array)): Numerators or numbers of successes.
+        denoms (iterable(np.array)): Denominators or numbers of trials.
+        method (str, optional): Type of the interval, "clopper-pearson" or "wilson".
+        coverage (float, optional): Central coverage of the interval.
+    """
+    if method not in INTERVALS:
+        raise ValueError("Unknown interval method %s. Choose one of: %s" % (method, ", ".join(INTERVALS.keys())))
+
+    nums = [np.asarray(num, dtype=np.float64) for num in nums]
+    denoms = [np.asarray(denom, dtype=np.float64) for denom in denoms]
+    keys = [getCacheKey(num, denom, method, coverage) for num, denom in zip(nums, denoms)]
+
+    # group the pairs which are not cached yet by their shape
+    missing = {}
+    for i, key in enumerate(keys):
+        if key in intervalCache:
+            intervalCache.move_to_end(key)
+        else:
+            missing.setdefault(nums[i].shape, {}).setdefault(key, i)
+
+    # compute the intervals of each group with one stacked call
+    for indices in missing.values():
+        indices = list(indices.values())
+        num = np.stack([nums[i] for i in indices])
+        denom = np.stack([denoms[i] for i in indices])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            uncertainties = np.abs(INTERVALS[method](num, denom, coverage=coverage) - num / denom)
+        for j, i in enumerate(indices):
+            intervalCache[keys[i]] = uncertainties[:, j]
+
+    # return copies, so the cached arrays cannot be modified by the caller
+    results = [intervalCache[key].copy() for key in keys]
+    while len(intervalCache) > maxCacheSize:
+        intervalCache.popitem(last=False)
+    return results
+
+
+def efficiencyUncertainty(num, denom, method="clopper-pearson", coverage=COVERAGE):
+    """
+    Returns the (cached) lower and upper uncertainty of the efficiency `num/denom` as an array of shape `(2, *num.shape)`.
+    Drop-in replacement of `hist.intervals.ratio_uncertainty(num, denom, uncertainty_type="efficiency")`.
+
+    Args:
+        num (np.array): Numerator or number of successes.
+        denom (np.array): Denominator or number of trials.
+        method (str, optional): Type of the interval, "clopper-pearson" or "wilson".
+        coverage (float, optional): Central coverage of the interval.
+    """
+    return batchEfficiencyUncertainties([num], [denom], method=method, coverage=coverage)[0]
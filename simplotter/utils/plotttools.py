@@ -5,6 +5,9 @@ import matplotlib as mpl
 import numpy as np
 from pathlib import Path
 
+# files written by `savefig` in this process (used to check that the outputs of a plot exist, see `PlotManifest`)
+savedFiles = []
+
 # colors used for plots
 class Colors:
     true = "#1ca01c"
@@ -90,6 +93,7 @@ def savefig(filename, dpi=165, bbox_inches="tight", **kwargs):
     
     # save the plot
     plt.savefig(filename, dpi=dpi, bbox_inches=bbox_inches, **kwargs)
+    savedFiles.append(filename)
 
 
 def combineSubplotHandlesLabels(axs):
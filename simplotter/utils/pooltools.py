@@ -0,0 +1,157 @@
+import os
+import argparse
+import time
+import uproot
+from simplotter.utils import plotttools, intervaltools
+from simplotter.utils.histtools import prefetchHists
+from simplotter.utils.PlotManifest import getPlotKey, hashPlotInputs
+
+# ROOT directory of the DQM file opened once in each worker process (see `initWorker`)
+workerRootFile = None
+
+
+def initWorker(dqmFile=None, folder=None, intervals=None):
+    """
+    Initializer for the worker processes of the multiprocessing pool. Opens the DQM file once per worker
+    and keeps the given folder in the process-global `workerRootFile`, such that the open directory does not
+    have to be pickled and sent along with every single task.
+
+    Args:
+        dqmFile (str, optional): Path to the DQM file. If None (e.g. prefetched histograms), no file is opened.
+        folder (str, optional): Folder in the DQM file which is passed as `rootFile` to the plotting functions.
+        intervals (dict, optional): Efficiency uncertainties computed in the parent process, which are added
+                                    to the `intervalCache` of the worker (see `intervaltools`).
+    """
+    global workerRootFile
+    if dqmFile is not None:
+        workerRootFile = uproot.open(dqmFile)[folder]
+    if intervals is not None:
+        intervaltools.maxCacheSize = max(intervaltools.maxCacheSize, len(intervals))
+        intervaltools.intervalCache.update(intervals)
+
+
+def plotInWorker(plotFunction, rootFile, config, **kwargs):
+    """
+    Calls `plotFunction(rootFile, config, **kwargs)` in a worker process. If `rootFile` is None,
+    the DQM directory opened by `initWorker` is used.
+    """
+    if rootFile is None:
+        rootFile = workerRootFile
+    return plotFunction(rootFile, config, **kwargs)
+
+
+def getNumberOfThreads(nThreads="auto"):
+    """
+    Returns the number of worker processes to be used. If `nThreads` is "auto", use all cores available to this process.
+    """
+    if nThreads != "auto":
+        return int(nThreads)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def parseNumberOfThreads(value):
+    """
+    Type of the `--nThreads` command line argument: "auto" or a positive integer.
+    """
+    if value == "auto":
+        return value
+    try:
+        nThreads = int(value)
+    except ValueError:
+        nThreads = 0
+    if nThreads < 1:
+        raise argparse.ArgumentTypeError("has to be 'auto' or a positive integer, got '%s'" % value)
+    return nThreads
+
+
+def runPlotTask(plotFunction, task, **kwargs):
+    """
+    Runs a single task `(rootFile, config)` as returned by `getPlotTasks` with `plotInWorker` and measures the time it takes.
+    Returns the key of the plot, the duration in seconds and the list of files saved by the plot.
+    """
+    rootFile, config = task
+    plotttools.savedFiles.clear()
+    start = time.perf_counter()
+    plotInWorker(plotFunction, rootFile, config, **kwargs)
+    return getPlotKey(config), time.perf_counter() - start, list(plotttools.savedFiles)
+
+
+def sortTasksByCost(tasks, estimateCost, durations=None):
+    """
+    Sorts the tasks `(rootFile, config)` by their expected cost, the most expensive first, so that the longest plots
+    do not end up as stragglers at the end of the run.
+
+    If a plot was produced before, its measured duration is used as cost. For all other plots, the cost is
+    estimated with `estimateCost(config, hists)` and converted to seconds using the measured plots for calibration.
+
+    Args:
+        tasks (list(tuple)): Tasks as returned by `getPlotTasks`.
+        estimateCost (function): Function returning the estimated cost of a plot (in arbitrary units)
+                                 given its config and the prefetched histograms (None if not prefetched).
+        durations (dict, optional): Measured durations in seconds of the plots in previous runs.
+    """
+    durations = {} if durations is None else durations
+    keys = [getPlotKey(config) for _, config in tasks]
+    estimates = [estimateCost(config, rootFile if isinstance(rootFile, dict) else None) for rootFile, config in tasks]
+
+    # calibrate the estimates on the plots with measured durations
+    measured = [(durations[key], estimate) for key, estimate in zip(keys, estimates) if key in durations]
+    scale = sum(m[0] for m in measured) / sum(m[1] for m in measured) if measured else 1
+
+    costs = [durations[key] if key in durations else scale * estimate for key, estimate in zip(keys, estimates)]
+    return [task for _, task in sorted(zip(costs, tasks), key=lambda c : c[0], reverse=True)]
+
+
+def getPlotTasks(rootFile, configs, getBranches=None, prefetch=False, manifest=None, incremental=False, **kwargs):
+    """
+    Arranges the arguments `(rootFile, config)` of `plotInWorker` for each of the given configs,
+    such that they can be passed to `pool.starmap`. By default, `rootFile` is None and the workers use
+    the DQM file they opened in `initWorker`, so each task only carries its config.
+
+    If `prefetch` is True, all histograms needed by the configs are read once here in the parent process
+    and each task only carries the `HistView`s of its own histograms instead of the open ROOT directory.
+    This way, the workers do not have to read and decompress the same histograms over and over again.
+
+    If a `manifest` is given and the histograms are prefetched, the inputs of each plot are hashed and the new hashes
+    are staged in the manifest. They need to be saved with `manifest.save()` once the plots are done.
+    In `incremental` mode (requires `prefetch`), all plots whose hash is unchanged with respect to the manifest are skipped.
+
+    Args:
+        rootFile (opened ROOT file): The object returned by `uproot.open(filename.root)` (only used if `prefetch` is True).
+        configs (iterable(CellCut or PlotConfig)): The configs of the plots to be produced.
+        getBranches (function, optional): Function returning the list of histogram branches needed for a given config.
+                                          Needs to be provided if `prefetch` is True.
+        prefetch (bool, optional): If True, prefetch the histograms in the parent process.
+        manifest (PlotManifest, optional): Manifest of the plots produced in previous runs.
+        incremental (bool, optional): If True, skip the plots with unchanged inputs.
+        **kwargs: Arguments passed to the plotting function (only used for hashing the plot inputs).
+    """
+    configs = list(configs)
+
+    if not prefetch:
+        return [(None, config) for config in configs]
+
+    # resolve the histograms needed for each plot and read all of them once
+    branches = [getBranches(config) for config in configs]
+    hists = prefetchHists(rootFile, [branch for branchList in branches for branch in branchList])
+
+    # give each task only the histograms it needs
+    tasks = [({branch : hists[branch] for branch in branchList if branch in hists}, config)
+             for branchList, config in zip(branches, configs)]
+
+    if manifest is None:
+        return tasks
+
+    # stage the hashes of all plots to be produced (in incremental mode, only keep the plots with changed inputs)
+    changedTasks = []
+    for taskHists, config in tasks:
+        key = getPlotKey(config)
+        hash = hashPlotInputs(config, taskHists, **kwargs)
+        if not (incremental and manifest.isUpToDate(key, hash)):
+            manifest.stage(key, hash)
+            changedTasks.append((taskHists, config))
+    if len(changedTasks) < len(tasks):
+        print("  skip %i unchanged plot(s)" % (len(tasks) - len(changedTasks)))
+    return changedTasks
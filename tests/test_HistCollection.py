@@ -0,0 +1,27 @@
+import numpy as np
+from sakura.histograms.HistCollection import HistStack, HistCollection
+
+
+def make_collection():
+    # one stack vs. eta and one vs. pt with two histograms each
+    return HistCollection.from_stacks([
+        HistStack(np.arange(5.), None, [("effic", "eta"), ("fakerate", "eta")], np.arange(8.).reshape(2, 4), np.ones((2, 4))),
+        HistStack(np.arange(5.), None, [("effic", "pt"), ("fakerate", "pt")], np.arange(8.).reshape(2, 4), np.ones((2, 4))),
+    ])
+
+
+def test_scale_of_rebinned_collection_keeps_source():
+    coll = make_collection()
+    rebinned = coll.rebin(factor=2, bin_quantity="eta").scale(10)
+    np.testing.assert_array_equal(coll[("effic", "pt")].values, np.arange(4.))
+    np.testing.assert_array_equal(coll[("effic", "pt")].variances, np.ones(4))
+    np.testing.assert_array_equal(rebinned[("effic", "pt")].values, 10 * np.arange(4.))
+    np.testing.assert_array_equal(rebinned[("effic", "eta")].values, [10., 50.])
+
+
+def test_scale_keeps_hists_taken_before():
+    coll = make_collection()
+    hist = coll[("fakerate", "pt")]
+    coll.scale(2)
+    np.testing.assert_array_equal(hist.values, np.arange(4., 8.))
+    np.testing.assert_array_equal(coll[("fakerate", "pt")].values, 2 * np.arange(4., 8.))
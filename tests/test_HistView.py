@@ -0,0 +1,57 @@
+import hist
+import numpy as np
+import pytest
+import uproot
+from simplotter.utils.HistView import HistView
+
+
+def write_and_read(tmp_path, histogram):
+    # write the hist.Hist to a ROOT file and read it back with uproot
+    path = str(tmp_path / "hists.root")
+    with uproot.recreate(path) as f_:
+        f_["h"] = histogram
+    return uproot.open(path)["h"]
+
+
+def assert_same_hist(view, reference):
+    np.testing.assert_allclose(view.values(), reference.values())
+    np.testing.assert_allclose(view.variances(), reference.variances(), equal_nan=True)
+    np.testing.assert_allclose(view.counts(), reference.counts(), equal_nan=True)
+    for viewEdges, edges in zip(view.axes.edges, reference.axes.edges):
+        np.testing.assert_allclose(np.ravel(viewEdges), np.ravel(edges))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(3)
+
+
+def test_TH1(tmp_path, rng):
+    h = hist.Hist(hist.axis.Regular(8, -2, 2), storage=hist.storage.Weight())
+    h.fill(rng.normal(size=200), weight=rng.uniform(0.5, 2, size=200))
+    uprootHist = write_and_read(tmp_path, h)
+    assert_same_hist(HistView.fromUproot(uprootHist), uprootHist.to_hist())
+    assert_same_hist(HistView.fromUproot(uprootHist).to_hist(), uprootHist.to_hist())
+
+
+def test_TH2(tmp_path, rng):
+    h = hist.Hist(hist.axis.Regular(4, -2, 2), hist.axis.Regular(3, 0, 3))
+    h.fill(rng.normal(size=200), rng.uniform(0, 3, size=200))
+    uprootHist = write_and_read(tmp_path, h)
+    assert_same_hist(HistView.fromUproot(uprootHist), uprootHist.to_hist())
+
+
+@pytest.mark.parametrize("storage", [hist.storage.Mean(), hist.storage.WeightedMean()])
+def test_TProfile(tmp_path, rng, storage):
+    h = hist.Hist(hist.axis.Regular(6, 0, 6), storage=storage)
+    x = rng.uniform(0, 5, size=40)
+    weight = {} if isinstance(storage, hist.storage.Mean) else {"weight" : rng.uniform(0.5, 2, size=40)}
+    h.fill(x, sample=rng.normal(2, 1, size=40), **weight)
+    # a bin with a single entry (nan variance in hist)
+    h.fill([5.5], sample=[3.], **({} if not weight else {"weight" : [1.]}))
+    uprootHist = write_and_read(tmp_path, h)
+    reference = uprootHist.to_hist()
+    view = HistView.fromUproot(uprootHist)
+    assert view.kind == "MEAN"
+    assert_same_hist(view, reference)
+    np.testing.assert_allclose(view.to_hist().variances(), reference.variances(), equal_nan=True)
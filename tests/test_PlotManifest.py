@@ -0,0 +1,60 @@
+import hist
+import numpy as np
+import uproot
+from simplotter.utils.PlotConfig import PlotConfig
+from simplotter.utils.PlotManifest import PlotManifest, getPlotKey, hashPlotInputs
+from simplotter.utils.pooltools import getPlotTasks
+
+
+def render(manifest, config, directory):
+    # stand-in for a plot produced by a worker: save a file and record it
+    filename = directory / ("%s.png" % config.plotname)
+    filename.write_text("plot")
+    manifest.recordOutputs(getPlotKey(config), [str(filename)])
+
+
+def make_file(tmp_path):
+    h = hist.Hist(hist.axis.Regular(4, 0, 4))
+    h.fill([0.5, 1.5, 1.5])
+    with uproot.recreate(str(tmp_path / "dqm.root")) as f_:
+        f_["h"] = h
+    return uproot.open(str(tmp_path / "dqm.root"))
+
+
+def test_rendering_without_hash_drops_old_hash(tmp_path):
+    config = PlotConfig("h", type="hist", plotname="p")
+    key = getPlotKey(config)
+    manifest = PlotManifest(tmp_path)
+    manifest.stage(key, "old")
+    render(manifest, config, tmp_path)
+    manifest.save()
+    assert PlotManifest(tmp_path).isUpToDate(key, "old")
+
+    # produced again without prefetching, i.e. without a new hash
+    manifest = PlotManifest(tmp_path)
+    render(manifest, config, tmp_path)
+    manifest.save()
+    assert not PlotManifest(tmp_path).isUpToDate(key, "old")
+
+
+def test_hashes_are_staged_outside_incremental_mode(tmp_path):
+    rootFile = make_file(tmp_path)
+    configs = [PlotConfig("h", type="hist", plotname="p")]
+    getBranches = lambda config : [config.histname]
+
+    manifest = PlotManifest(tmp_path)
+    tasks = getPlotTasks(rootFile, configs, getBranches=getBranches, prefetch=True, manifest=manifest)
+    assert len(tasks) == 1
+    for hists, config in tasks:
+        render(manifest, config, tmp_path)
+    manifest.save()
+
+    manifest = PlotManifest(tmp_path)
+    hash = hashPlotInputs(configs[0], tasks[0][0])
+    assert manifest.isUpToDate(getPlotKey(configs[0]), hash)
+    assert getPlotTasks(rootFile, configs, getBranches=getBranches, prefetch=True, manifest=manifest, incremental=True) == []
+
+
+def test_flat_manifest_is_read_as_hashes(tmp_path):
+    (tmp_path / PlotManifest.filename).write_text('{"hist/p": "abc"}')
+    assert PlotManifest(tmp_path).hashes == {"hist/p": "abc"}
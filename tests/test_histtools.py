@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from simplotter.utils.HistView import HistView, HistViewAxis
+from simplotter.utils.histtools import histSlices1DFrom2D
+
+
+@pytest.fixture
+def hist2D():
+    # 5 x 4 bins plus the flow bins of both axes
+    rng = np.random.default_rng(5)
+    axes = [HistViewAxis(np.linspace(0, 5, 6)), HistViewAxis(np.linspace(-2, 2, 5))]
+    values = rng.uniform(0, 10, (7, 6))
+    return HistView(axes, values, values * 2)
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+@pytest.mark.parametrize("bins", [[0, 1, 2], [1, 3], [3, 0, 2], [2]])
+def test_slices_match_take(hist2D, axis, bins):
+    slices = histSlices1DFrom2D(hist2D, bins, axis=axis)
+    expected = np.moveaxis(np.take(hist2D.values(flow=True), np.asarray(bins) + 1, axis=axis), axis, 0)
+    assert len(slices) == len(bins)
+    for (sliceHist, _), row in zip(slices, expected):
+        np.testing.assert_array_equal(sliceHist.values(flow=True), row)
+        np.testing.assert_array_equal(sliceHist.variances(flow=True), row * 2)
+        np.testing.assert_array_equal(np.ravel(sliceHist.axes.edges[0]), np.ravel(hist2D.axes.edges[1 - axis]))
+
+
+@pytest.mark.parametrize("axis", [0, 1])
+def test_equally_spaced_slices_are_views(hist2D, axis):
+    for sliceHist, _ in histSlices1DFrom2D(hist2D, [0, 2], axis=axis):
+        assert np.shares_memory(sliceHist.values(flow=True), hist2D.values(flow=True))
+        assert np.shares_memory(sliceHist.variances(flow=True), hist2D.variances(flow=True))
+
+
+def test_slice_ranges(hist2D):
+    slices = histSlices1DFrom2D(hist2D, [1, 2], axis=0)
+    np.testing.assert_array_equal([range_ for _, range_ in slices], [[1, 2], [2, 3]])
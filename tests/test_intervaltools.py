@@ -0,0 +1,49 @@
+import numpy as np
+from hist.intervals import ratio_uncertainty
+from simplotter.utils import intervaltools
+from simplotter.utils.CellCut import CellCut
+from simplotter.utils.HistView import HistView, HistViewAxis
+from simplotter.plotterfunctions.plotCutParameter import getCutParameterBranches, getCutParameterEfficiencyPairs
+
+
+def test_batch_matches_hist():
+    rng = np.random.default_rng(1)
+    denoms = [rng.integers(0, 50, size=10).astype(float) for _ in range(5)]
+    nums = [np.floor(denom * rng.random(10)) for denom in denoms]
+    for num, denom, uncertainty in zip(nums, denoms, intervaltools.batchEfficiencyUncertainties(nums, denoms)):
+        np.testing.assert_allclose(uncertainty, ratio_uncertainty(num, denom, uncertainty_type="efficiency"))
+
+
+def test_cached_intervals_are_not_recomputed(monkeypatch):
+    intervaltools.intervalCache.clear()
+    num, denom = np.array([1., 2., 0.]), np.array([4., 2., 3.])
+    intervaltools.batchEfficiencyUncertainties([num, 2 * num], [denom, 2 * denom])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("interval recomputed")
+    monkeypatch.setitem(intervaltools.INTERVALS, "clopper-pearson", fail)
+    np.testing.assert_allclose(intervaltools.efficiencyUncertainty(num, denom),
+                               ratio_uncertainty(num, denom, uncertainty_type="efficiency"))
+
+
+def test_cut_parameter_pairs_hit_the_cache(monkeypatch):
+    # prefetched histograms of all layer pairs of one cut
+    intervaltools.intervalCache.clear()
+    rng = np.random.default_rng(2)
+    cellCuts = [CellCut("dz", isDoubletCut=True, innerLayer=i, outerLayer=i + 1) for i in range(3)]
+    hists = {}
+    for branch in [branch for cellCut in cellCuts for branch in getCutParameterBranches(cellCut)]:
+        hists[branch] = HistView([HistViewAxis(np.arange(9.))], rng.integers(0, 20, size=10).astype(float))
+    for cellCut in cellCuts:
+        total, passing = getCutParameterBranches(cellCut)[:2]
+        hists[passing] = HistView([HistViewAxis(np.arange(9.))], np.minimum(hists[passing].values(flow=True), hists[total].values(flow=True)))
+
+    pairs = [pair for cellCut in cellCuts for pair in getCutParameterEfficiencyPairs(cellCut, hists)]
+    assert len(pairs) == 2 * len(cellCuts)
+    intervaltools.batchEfficiencyUncertainties([num for num, _ in pairs], [denom for _, denom in pairs])
+
+    monkeypatch.setitem(intervaltools.INTERVALS, "clopper-pearson", None)
+    for cellCut in cellCuts:
+        total, passing, _, fake, true = getCutParameterBranches(cellCut)
+        intervaltools.efficiencyUncertainty(hists[passing].values(), hists[total].values())
+        intervaltools.efficiencyUncertainty(hists[fake].values(), (hists[true] + hists[fake]).values())
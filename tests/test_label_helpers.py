@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from sakura.histograms.Hist import Hist
+from sakura.tools.label_helpers import LabelIndex
+
+
+def test_positions():
+    index = LabelIndex(["a", "b", "c", "b"])
+    np.testing.assert_array_equal(index.positions(["c", "b", "a"]), [2, 1, 0])
+    assert index.positions([]).size == 0
+    with pytest.raises(ValueError):
+        index.positions(["a", "d"])
+
+
+def test_positions_without_labels():
+    index = LabelIndex([])
+    assert index.positions([]).size == 0
+    with pytest.raises(ValueError):
+        index.positions(["a"])
+
+
+def test_take_on_empty_labels():
+    hist = Hist.from_arrays(np.zeros(1), np.zeros(0), bin_labels=[])
+    values, errors = hist.take([])
+    assert values.size == 0 and errors.size == 0
+    with pytest.raises(ValueError):
+        hist.take(["a"])
@@ -0,0 +1,12 @@
+import argparse
+import pytest
+from simplotter.utils.pooltools import parseNumberOfThreads, getNumberOfThreads
+
+
+def test_parse_number_of_threads():
+    assert parseNumberOfThreads("auto") == "auto"
+    assert parseNumberOfThreads("4") == 4
+    assert getNumberOfThreads(parseNumberOfThreads("auto")) >= 1
+    for value in ("foo", "0", "-2", "1.5"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parseNumberOfThreads(value)
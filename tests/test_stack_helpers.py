@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sakura.histograms.HistCollection import HistStack, HistCollection
+from sakura.tools.getRatioHist import getRatioHist
+from sakura.tools.getSumHist import getSumHist
+
+KEYS = [("effic", "eta"), ("fakerate", "eta"), ("effic", "pt"), ("fakerate", "pt")]
+
+
+def make_collection(keys, scale=1):
+    # one stack per bin quantity in the order of `keys`, the values of each row only depend on its key
+    stacks = {}
+    for count_quantity, bin_quantity in keys:
+        stacks.setdefault(bin_quantity, []).append((count_quantity, bin_quantity))
+    return HistCollection.from_stacks([
+        HistStack(np.arange(4.), None, stack_keys,
+                  scale * np.array([[100. * (i + 1) + j for j in range(3)] for i in [KEYS.index(key) for key in stack_keys]]),
+                  np.ones((len(stack_keys), 3)))
+        for stack_keys in stacks.values()])
+
+
+def test_ratio_of_collections_in_different_order():
+    coll1 = make_collection(KEYS)
+    coll2 = make_collection(KEYS[::-1], scale=3)
+    ratio = getRatioHist(coll1, coll2)
+    for key in KEYS:
+        np.testing.assert_allclose(ratio[key].values, 1 / 3)
+    same = getRatioHist(coll1, make_collection(KEYS[2:] + KEYS[:2], scale=2))
+    for key in KEYS:
+        np.testing.assert_allclose(same[key].values, 0.5)
+
+
+def test_sum_of_collections_in_different_order():
+    coll1 = make_collection(KEYS)
+    coll2 = make_collection(KEYS[::-1])
+    total = getSumHist(coll1, coll2)
+    for key in KEYS:
+        np.testing.assert_allclose(total[key].values, coll1[key].values + coll2[key].values)
+
+
+def test_pairing_collections_with_different_keys():
+    with pytest.raises(ValueError):
+        getRatioHist(make_collection(KEYS), make_collection(KEYS[:3]))